@@ -1,18 +1,21 @@
 import streamlit as st
-import pandas as pd
 import os
 import sys
 import subprocess
 import matplotlib.pyplot as plt
 from PIL import Image
 
-from utils.translator import translate_text
+from utils.translator import translate_text, translate_batch
+from utils import prediction_log, rollups, sensor_store
+from utils.data_loader import IncrementalTableLoader
+from utils.downsample import downsample_series
+from utils.pagination import paginate
 from ai_recommendations import (
     recommend_irrigation,
     recommend_fertilizer,
     recommend_crop
 )
-from predict_disease import predict_disease
+from disease_server import get_server
 import streamlit.components.v1 as components
 
 def speak_text(text, lang_code):
@@ -72,29 +75,40 @@ if st.sidebar.button(translate_text("🔄 Generate New Sensor Data", lang)):
     st.sidebar.success(translate_text("New data generated successfully!", lang))
 
 # ------------------ LOAD DATA ------------------
-data_path = os.path.join(DATA_DIR, "predicted_crops.csv")
-
-if not os.path.exists(data_path):
+if not (sensor_store.has_data("predictions") or prediction_log.has_segments("predictions")):
     st.warning(translate_text(
         "No prediction data found. Please generate data using the button.",
         lang
     ))
     st.stop()
 
-df = pd.read_csv(data_path)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
+@st.cache_resource
+def get_prediction_loader():
+    """One loader per server process, shared by all sessions"""
+    return IncrementalTableLoader("predictions", index_columns=["farm_id", "recommended_crop"])
+
+
+# Reruns reuse the parsed frame; appended rows are read incrementally.
+# Timestamps are already datetime64 (typed columnar store); farm_id and
+# recommended_crop are categoricals covered by a bitmap index.
+df, df_index = get_prediction_loader().load_indexed()
+
+# Daily (farm, crop) rollup maintained by the prediction writers, plus the
+# rows still in the write-ahead log; the charts below are answered from it
+# instead of the raw rows.
+rollup = rollups.load_live_rollup()
 
 # ------------------ SIDEBAR FILTERS ------------------
 st.sidebar.header(translate_text("🔍 Filter Options", lang))
 
-farms = sorted(df["farm_id"].unique())
+farms = df_index.values("farm_id")
 selected_farms = st.sidebar.multiselect(
     translate_text("🏡 Select Farm(s)", lang),
     farms,
     default=farms
 )
 
-crops = sorted(df["recommended_crop"].unique())
+crops = df_index.values("recommended_crop")
 selected_crops = st.sidebar.multiselect(
     translate_text("🌾 Select Crop(s)", lang),
     crops,
@@ -103,10 +117,11 @@ selected_crops = st.sidebar.multiselect(
 
 
 # ------------------ FILTER DATA ------------------
-filtered = df[
-    (df["farm_id"].isin(selected_farms)) &
-    (df["recommended_crop"].isin(selected_crops))
-]
+filtered = df[df_index.select({
+    "farm_id": selected_farms,
+    "recommended_crop": selected_crops,
+})]
+filtered_rollup = rollups.select(rollup, selected_farms, selected_crops)
 
 st.success(
     translate_text(f"Showing {len(filtered)} records after filtering", lang)
@@ -114,16 +129,23 @@ st.success(
 
 # ------------------ TABLE ------------------
 st.subheader(translate_text("📋 Filtered Crop Predictions", lang))
-st.dataframe(filtered, use_container_width=True)
+# Only the visible page is sent to the browser
+page = paginate(
+    filtered, key="predictions",
+    page_label=translate_text("Page", lang),
+    size_label=translate_text("Rows per page", lang),
+)
+st.dataframe(page, use_container_width=True)
 
 # ------------------ DISTRIBUTION ------------------
 st.subheader(translate_text("🌾 Crop Recommendation Distribution", lang))
-st.bar_chart(filtered["recommended_crop"].value_counts())
+st.bar_chart(rollups.crop_distribution(filtered_rollup))
 
 # ------------------ TIMELINE ------------------
 st.subheader(translate_text("📈 Predictions Over Time", lang))
 
-timeline = filtered.groupby(filtered["timestamp"].dt.date)["recommended_crop"].count()
+# Bounded number of points however many days of history there are
+timeline = downsample_series(rollups.daily_counts(filtered_rollup), max_points=500)
 
 fig, ax = plt.subplots(figsize=(10, 4))  # 👈 wider figure
 timeline.plot(ax=ax, marker="o")
@@ -154,9 +176,14 @@ if not filtered.empty:
         latest["temperature"], latest["humidity"], latest["rainfall"]
     )
 
-    st.success(translate_text(irrigation_msg, lang))
-    st.info(translate_text(fertilizer_msg, lang))
-    st.warning(translate_text(crop_msg, lang))
+    # Translate all three messages in one round trip
+    irrigation_msg, fertilizer_msg, crop_msg = translate_batch(
+        [irrigation_msg, fertilizer_msg, crop_msg], lang
+    )
+
+    st.success(irrigation_msg)
+    st.info(fertilizer_msg)
+    st.warning(crop_msg)
 
 # ======================================================
 # 🌿 PLANT DISEASE DETECTION
@@ -209,7 +236,8 @@ if image_file is not None:
     )
 
     with st.spinner(translate_text("🔍 Analyzing leaf disease...", lang)):
-        label, confidence, info = predict_disease(image)
+        # Shared micro-batching server — concurrent uploads share one forward pass
+        label, confidence, info = get_server().predict(image)
 
     disease_name = label.split("_", 1)[-1].replace("_", " ")
 
@@ -222,13 +250,18 @@ if image_file is not None:
         # -------- DETAILS --------
     st.subheader(translate_text("📖 Disease Details", lang))
 
-    st.write(translate_text(info["description"], lang))
+    description, precautions_label, precautions, treatment_label, treatment = translate_batch(
+        [info["description"], "Precautions", info["precautions"], "Treatment", info["treatment"]],
+        lang
+    )
+
+    st.write(description)
 
-    st.write("**" + translate_text("Precautions", lang) + ":**")
-    st.write(translate_text(info["precautions"], lang))
+    st.write("**" + precautions_label + ":**")
+    st.write(precautions)
 
-    st.write("**" + translate_text("Treatment", lang) + ":**")
-    st.write(translate_text(info["treatment"], lang))
+    st.write("**" + treatment_label + ":**")
+    st.write(treatment)
 
     # -------- VOICE OUTPUT (Full Explanation) --------
 
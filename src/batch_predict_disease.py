@@ -0,0 +1,177 @@
+import argparse
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import predict_disease
+from utils.image_preprocess import load_image, preprocess_batch
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+RESULT_SCHEMA = pa.schema([
+    ("path", pa.string()),
+    ("class", pa.string()),
+    ("confidence", pa.float32()),
+    ("topk_classes", pa.list_(pa.string())),
+    ("topk_scores", pa.list_(pa.float32())),
+])
+
+
+# ---------- INPUT ----------
+def iter_images(root):
+    """Lazily walk the tree in a stable order so reruns see the same sequence"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+
+def walk_key(root, path):
+    """Sort key matching iter_images order: a directory's files (sorted) before its subdirectories"""
+    *dirs, name = os.path.relpath(path, root).split(os.sep)
+    return tuple((1, d) for d in dirs) + ((0, name),)
+
+
+def resume_point(image_dir, output_dir):
+    """walk_key of the last image recorded by earlier (possibly interrupted) runs.
+
+    Parts hold rows in walk order, so only the newest part is read.
+    """
+    parts = sorted(glob.glob(os.path.join(output_dir, "part-*.parquet")))
+    if not parts:
+        return None
+    paths = pq.read_table(parts[-1], columns=["path"]).column("path").to_pylist()
+    return max((walk_key(image_dir, p) for p in paths), default=None)
+
+
+def _decode(path):
+    try:
+        return path, load_image(path)
+    except Exception as e:
+        print(f"⚠️ Skipping unreadable image {path}: {e}")
+        return path, None
+
+
+def decoded_images(paths, pool, max_in_flight):
+    """Decode on the thread pool while keeping at most max_in_flight images in memory"""
+    pending = deque()
+    for path in paths:
+        pending.append(pool.submit(_decode, path))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# ---------- OUTPUT ----------
+class PartWriter:
+    """Buffers result rows and writes them as numbered parquet parts"""
+
+    def __init__(self, output_dir, rows_per_part):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.rows_per_part = rows_per_part
+        self.next_part = len(glob.glob(os.path.join(output_dir, "part-*.parquet")))
+        self.rows = {name: [] for name in RESULT_SCHEMA.names}
+
+    def add(self, paths, probs, top_k):
+        """One row per path, in order; a None in probs records an unreadable image
+        (null class) so a resumed run does not try it again"""
+        for path, p in zip(paths, probs):
+            self.rows["path"].append(path)
+            if p is None:
+                self.rows["class"].append(None)
+                self.rows["confidence"].append(None)
+                self.rows["topk_classes"].append([])
+                self.rows["topk_scores"].append([])
+                continue
+            idx = np.argsort(p)[::-1][:top_k]
+            self.rows["class"].append(predict_disease.IDX_TO_CLASS[int(idx[0])])
+            self.rows["confidence"].append(float(p[idx[0]]))
+            self.rows["topk_classes"].append([predict_disease.IDX_TO_CLASS[int(i)] for i in idx])
+            self.rows["topk_scores"].append([float(p[i]) for i in idx])
+        if len(self.rows["path"]) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.rows["path"]:
+            return
+        table = pa.table(self.rows, schema=RESULT_SCHEMA)
+        part_path = os.path.join(self.output_dir, f"part-{self.next_part:05d}.parquet")
+        # Write-then-rename so an interruption never leaves a half-written part
+        pq.write_table(table, part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+        self.next_part += 1
+        self.rows = {name: [] for name in RESULT_SCHEMA.names}
+
+
+# ---------- PIPELINE ----------
+def scan(image_dir, output_dir, batch_size=32, workers=8, top_k=3, rows_per_part=4096):
+    resume = resume_point(image_dir, output_dir)
+    paths = iter_images(image_dir)
+    if resume is not None:
+        print(f"⏩ Resuming after {os.path.join(image_dir, *(name for _, name in resume))}")
+        paths = (p for p in paths if walk_key(image_dir, p) > resume)
+    writer = PartWriter(output_dir, rows_per_part)
+
+    scanned = unreadable = valid = 0
+    start = last_report = time.perf_counter()
+    batch_paths, batch_pixels = [], []  # pixels is None for unreadable images
+
+    def run_batch():
+        valid = [pixels for pixels in batch_pixels if pixels is not None]
+        probs = iter(np.asarray(predict_disease.predict_batch(preprocess_batch(valid))) if valid else [])
+        writer.add(batch_paths, [None if pixels is None else next(probs) for pixels in batch_pixels], top_k)
+        batch_paths.clear()
+        batch_pixels.clear()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, pixels in decoded_images(paths, pool, max_in_flight=batch_size * 4):
+            batch_paths.append(path)
+            batch_pixels.append(pixels)
+            if pixels is None:
+                unreadable += 1
+            else:
+                scanned += 1
+                valid += 1
+            # Unreadable rows ride along with the next batch (capped, so a run of them still flushes)
+            if valid == batch_size or len(batch_paths) >= batch_size * 4:
+                run_batch()
+                valid = 0
+
+                now = time.perf_counter()
+                if now - last_report >= 5:
+                    print(f"🌿 {scanned} images — {scanned / (now - start):.1f} images/sec")
+                    last_report = now
+
+        if batch_paths:
+            run_batch()
+    writer.flush()
+
+    elapsed = time.perf_counter() - start
+    rate = scanned / elapsed if elapsed > 0 else 0.0
+    print(f"\n✅ Scanned {scanned} images in {elapsed:.1f}s ({rate:.1f} images/sec) → {output_dir}")
+    if unreadable:
+        print(f"⚠️ {unreadable} unreadable images recorded with a null class")
+    return scanned
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk plant disease scan over an image directory")
+    parser.add_argument("image_dir", help="Root directory of leaf images (searched recursively)")
+    parser.add_argument("output_dir", help="Directory for parquet result parts")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=8, help="Decode/preprocess threads")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--rows-per-part", type=int, default=4096)
+    args = parser.parse_args()
+
+    scan(args.image_dir, args.output_dir, args.batch_size, args.workers,
+         args.top_k, args.rows_per_part)
@@ -0,0 +1,69 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.bitmap_index import BitmapIndex
+
+CROPS = np.array([
+    "rice", "maize", "chickpea", "kidneybeans", "pigeonpeas", "mothbeans", "mungbean",
+    "blackgram", "lentil", "pomegranate", "banana", "mango", "grapes", "watermelon",
+    "muskmelon", "apple", "orange", "papaya", "coconut", "cotton", "jute", "coffee",
+])
+
+
+def synthetic_keys(rows, num_farms, seed=0):
+    """farm_id / recommended_crop columns as app.py used to hold them"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "farm_id": rng.integers(1, num_farms + 1, rows).astype(np.int32),
+        "recommended_crop": rng.choice(CROPS, rows).astype(object),
+    })
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare boolean-mask and bitmap-index filtering")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--farms", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🧪 Generating {args.rows:,} rows ({args.farms} farms, {len(CROPS)} crops)...")
+    raw = synthetic_keys(args.rows, args.farms)
+    cat = raw.astype({"farm_id": "category", "recommended_crop": "category"})
+
+    index, build_time = best_of(lambda: BitmapIndex.build(cat, ["farm_id", "recommended_crop"]), 1)
+    print(f"🗂️  Bitmap index built in {build_time:.2f} s "
+          f"({sum(b.nbytes for col in index.bitmaps.values() for b in col.values()) / 1e6:.1f} MB)")
+
+    farms = list(range(1, args.farms + 1))
+    scenarios = {
+        "1 farm, all crops": (farms[:1], list(CROPS)),
+        "5 farms, 3 crops": (farms[:5], list(CROPS[:3])),
+        "half the farms, half the crops": (farms[::2], list(CROPS[::2])),
+        "everything selected": (farms, list(CROPS)),
+    }
+
+    def isin_mask(frame, selected_farms, selected_crops):
+        return ((frame["farm_id"].isin(selected_farms)) &
+                (frame["recommended_crop"].isin(selected_crops))).to_numpy()
+
+    print(f"\n{'scenario':<32} {'rows':>10} {'object mask':>12} {'cat mask':>10} {'bitmap':>9} {'speedup':>8}")
+    for name, (sel_farms, sel_crops) in scenarios.items():
+        expected, raw_time = best_of(lambda: isin_mask(raw, sel_farms, sel_crops), args.repeat)
+        _, cat_time = best_of(lambda: isin_mask(cat, sel_farms, sel_crops), args.repeat)
+        got, bitmap_time = best_of(
+            lambda: index.select({"farm_id": sel_farms, "recommended_crop": sel_crops}), args.repeat)
+        assert np.array_equal(expected, got), name
+        print(f"{name:<32} {int(expected.sum()):>10,} {raw_time * 1e3:>10.1f}ms "
+              f"{cat_time * 1e3:>8.1f}ms {bitmap_time * 1e3:>7.1f}ms {raw_time / bitmap_time:>7.1f}x")
@@ -0,0 +1,69 @@
+import argparse
+import os
+import tempfile
+from datetime import timezone
+
+from utils.fake_firestore import FakeFirestore
+from utils.firestore_sync import FirestoreSnapshot
+from utils.sensor_timeseries import SensorTimeSeries
+
+
+def fill(db, sim, ticks):
+    """Write `ticks` intervals of simulated readings (one document per farm), 500 per batch"""
+    col = db.collection("sensor_data")
+    batch = db.batch()
+    for df in sim.stream(ticks):
+        for row in df.to_dict("records"):
+            ts = row["timestamp"].to_pydatetime().replace(tzinfo=timezone.utc)
+            batch.set(col.document(f"farm_{row['farm_id']}_{ts:%Y%m%dT%H%M%S}"), {
+                "farm_id": row["farm_id"],
+                "farm_name": f"Farm {row['farm_id']}",
+                "temperature_c": row["temperature_C"],
+                "soil_moisture_percent": row["soil_moisture_percent"],
+                "timestamp": ts,
+            })
+            if len(batch) == 500:
+                batch.commit()
+                batch = db.batch()
+    if len(batch):
+        batch.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Firestore reads: full re-stream vs incremental snapshot sync")
+    parser.add_argument("--history", type=int, default=20_000)
+    parser.add_argument("--refreshes", type=int, default=10)
+    parser.add_argument("--farms", type=int, default=5)
+    parser.add_argument("--ticks-per-refresh", type=int, default=1,
+                        help="15-minute intervals (one reading per farm) arriving between refreshes")
+    args = parser.parse_args()
+
+    db = FakeFirestore()
+    sim = SensorTimeSeries(args.farms, seed=0)
+    fill(db, sim, args.history // args.farms)
+    total = args.history // args.farms * args.farms
+
+    snapshot = FirestoreSnapshot(db, path=os.path.join(tempfile.mkdtemp(), "snapshot.sqlite"))
+    db.reads = 0
+    first = snapshot.sync()
+    print(f"📥 Initial {first['mode']} sync: {first['fetched']} docs, {db.reads} reads")
+
+    old_reads = incremental_reads = 0
+    for _ in range(args.refreshes):
+        fill(db, sim, args.ticks_per_refresh)
+        total += args.ticks_per_refresh * args.farms
+
+        db.reads = 0
+        list(db.collection("sensor_data").stream())  # old dashboard: whole collection...
+        list(db.collection("sensor_data").stream())  # ...plus again for the farm list
+        old_reads += db.reads
+
+        db.reads = 0
+        report = snapshot.sync()
+        incremental_reads += db.reads
+        assert report["total"] == total
+
+    print(f"\n{'per refresh':<24} {'reads':>10}")
+    print(f"{'full re-stream (x2)':<24} {old_reads / args.refreshes:>10.0f}")
+    print(f"{'incremental sync':<24} {incremental_reads / args.refreshes:>10.0f}")
+    print(f"\n🏡 Farms from snapshot: {snapshot.distinct('farm_name')}")
@@ -0,0 +1,61 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.forest_engine import FlatForest
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "data", "Crop_recommendation.csv")
+DEFAULT_MODEL = os.path.join(BASE_DIR, "models", "diverse_crop_model.pkl")
+
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+
+def synthetic_rows(n, seed=0):
+    """Rows drawn uniformly over (slightly beyond) the training ranges"""
+    df = pd.read_csv(DATA_PATH)[FEATURES]
+    lo, hi = df.min().values, df.max().values
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(lo * 0.9, hi * 1.1, (n, len(FEATURES))), columns=FEATURES)
+
+
+def time_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FlatForest against sklearn predict")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    flat = FlatForest.from_sklearn(model)
+    print(f"🌲 {len(model.estimators_)} trees, {len(flat.feature)} nodes, max depth {flat.max_depth}")
+
+    # ---------- EXACTNESS ----------
+    X = synthetic_rows(args.rows)
+    check = X.iloc[:100_000]
+    assert np.array_equal(model.predict(check), flat.predict(check)), "predictions differ"
+    assert np.array_equal(model.predict_proba(check), flat.predict_proba(check)), "probabilities differ"
+    print("✅ FlatForest output is bit-for-bit identical to sklearn on 100k rows")
+
+    # ---------- SINGLE ROW LATENCY ----------
+    one = X.iloc[:1]
+    sk_single = time_call(lambda: model.predict(one), 50)
+    flat_single = time_call(lambda: flat.predict(one), 500)
+    print(f"\n⏱️ Single-row latency: sklearn {sk_single * 1e3:.2f} ms | "
+          f"flat {flat_single * 1e3:.2f} ms ({sk_single / flat_single:.1f}x)")
+
+    # ---------- BULK THROUGHPUT ----------
+    sk_bulk = time_call(lambda: model.predict(X), 1)
+    flat_bulk = time_call(lambda: flat.predict(X), 1)
+    print(f"🚀 {args.rows:,}-row throughput: sklearn {args.rows / sk_bulk:,.0f} rows/s | "
+          f"flat {args.rows / flat_bulk:,.0f} rows/s ({sk_bulk / flat_bulk:.1f}x)")
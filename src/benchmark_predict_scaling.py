@@ -0,0 +1,52 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark_forest import synthetic_rows
+from predict_crops import DATA_DIR, MODEL_PATH, predict_streaming, rename_map
+
+
+def write_synthetic_input(path, rows, num_farms=32):
+    """Sensor CSV in simulated_sensor_data.csv layout with rows spread over num_farms"""
+    df = synthetic_rows(rows).round(2)
+    df = df.rename(columns={v: k for k, v in rename_map.items()})
+    rng = np.random.default_rng(1)
+    df.insert(0, 'farm_id', rng.integers(1, num_farms + 1, rows))
+    df.insert(0, 'timestamp', pd.date_range('2025-01-01', periods=rows, freq='min'))
+    df['soil_moisture_percent'] = rng.uniform(10, 60, rows).round(2)
+    df.to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of predict_crops --workers from 1 to N cores")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--partition", choices=["rows", "farm"], default="rows")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(dir=DATA_DIR)
+    try:
+        input_path = os.path.join(tmp_dir, "bench_input.csv")
+        output_path = os.path.join(tmp_dir, "bench_output.csv")
+        print(f"🧪 Writing {args.rows:,} synthetic rows...")
+        write_synthetic_input(input_path, args.rows)
+
+        worker_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < args.max_workers], args.max_workers})
+        baseline = None
+        print(f"\n{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            predict_streaming(args.model, input_path, output_path, args.chunksize,
+                              workers=workers, partition=args.partition)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} {baseline / elapsed:>8.2f}x")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
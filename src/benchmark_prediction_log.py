@@ -0,0 +1,87 @@
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmark_store import synthetic_predictions, timed
+from utils import prediction_log, rollups, sensor_store
+
+
+def use_store(root):
+    """Point the store, the rollup and the legacy CSVs at a scratch directory"""
+    sensor_store.DATA_DIR = root
+    sensor_store.STORE_DIR = os.path.join(root, "store")
+    rollups.ROLLUP_DIR = os.path.join(sensor_store.STORE_DIR, "rollups")
+    rollups.ROLLUP_PATH = os.path.join(rollups.ROLLUP_DIR, "predictions_daily.parquet")
+    rollups.LOCK_PATH = rollups.ROLLUP_PATH + ".lock"
+
+
+def frames(df, frame_rows):
+    return [df.iloc[i:i + frame_rows] for i in range(0, len(df), frame_rows)]
+
+
+def store_appends(chunks):
+    for chunk in chunks:
+        sensor_store.write_table("predictions", chunk, mode="append")
+
+
+def log_appends(chunks):
+    with prediction_log.PredictionLog() as log:
+        for chunk in chunks:
+            log.append(chunk)
+            log.sync()
+
+
+def with_reader(fn):
+    """Run fn while another thread polls a snapshot reader as fast as it can"""
+    stop = threading.Event()
+    polls = []
+
+    def poll():
+        reader = prediction_log.SnapshotReader()
+        while not stop.is_set():
+            reader.poll()
+            polls.append(1)
+
+    thread = threading.Thread(target=poll)
+    thread.start()
+    try:
+        fn()
+    finally:
+        stop.set()
+        thread.join()
+    return len(polls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction appends: a part file per append vs the write-ahead log")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--frame-rows", type=int, nargs="+", default=[100, 2000])
+    args = parser.parse_args()
+
+    df = synthetic_predictions(args.rows)
+    print(f"{'mode':<34} {'rows/s':>10}")
+    for frame_rows in args.frame_rows:
+        chunks = frames(df, frame_rows)
+        for name, fn in [("store part per append", store_appends), ("log append + fsync", log_appends)]:
+            tmp_dir = tempfile.mkdtemp()
+            use_store(tmp_dir)
+            _, elapsed = timed(lambda: fn(chunks))
+            print(f"{f'{name}, {frame_rows} rows':<34} {len(df) / elapsed:>10.0f}")
+            shutil.rmtree(tmp_dir)
+
+    tmp_dir = tempfile.mkdtemp()
+    use_store(tmp_dir)
+    chunks = frames(df, args.frame_rows[0])
+    start = time.perf_counter()
+    polls = with_reader(lambda: log_appends(chunks))
+    elapsed = time.perf_counter() - start
+    print(f"{'log append, reader polling':<34} {len(df) / elapsed:>10.0f}   ({polls} snapshot polls)")
+
+    compacted, elapsed = timed(prediction_log.compact)
+    snapshot = prediction_log.read_snapshot()
+    assert compacted == len(snapshot) == len(df)
+    print(f"\n🧹 Compacted {compacted} rows into the store in {elapsed:.2f}s")
+    shutil.rmtree(tmp_dir)
@@ -0,0 +1,61 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from utils import retention
+from utils.fake_firestore import FakeFirestore
+from utils.firestore_writer import BatchWriter
+
+
+def fill(db, rows, farms, days):
+    """rows readings spread evenly over the last `days` days across farms"""
+    col = db.collection("sensor_data")
+    now = datetime.now(timezone.utc)
+    offsets = np.linspace(days * 86_400, 0, rows)
+    with BatchWriter(db) as writer:
+        for i, offset in enumerate(offsets):
+            writer.set(col.document(f"doc_{i}"), {
+                "farm_id": i % farms + 1,
+                "timestamp": now - timedelta(seconds=float(offset)),
+            })
+
+
+def serial_single_batch(db):
+    """The old clear_old_data: stream everything into one batch (fails past 500)"""
+    batch = db.batch()
+    for doc in db.collection("sensor_data").stream():
+        batch.delete(doc.reference)
+    batch.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of paginated, concurrent Firestore deletes")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--farms", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--keep-days", type=float, default=90)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Simulated commit round trip")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    db = FakeFirestore(commit_latency=latency)
+    fill(db, args.rows, args.farms, args.days)
+    try:
+        serial_single_batch(db)
+        print("🧪 Single batch: succeeded")
+    except Exception as e:
+        print(f"🧪 Single batch (old clear_old_data): failed — {e}")
+
+    print(f"\n{'policy':<26} {'in flight':>9} {'deleted':>9} {'seconds':>8} {'docs/s':>8}")
+    for keep_days in (args.keep_days, None):
+        for in_flight in (1, 8):
+            db = FakeFirestore(commit_latency=latency)
+            fill(db, args.rows, args.farms, args.days)
+            report = retention.purge(db, keep_days=keep_days, farms=list(range(1, args.farms + 1)),
+                                     max_in_flight=in_flight, progress=None)
+            remaining = len(db.collection("sensor_data").list_documents())
+            assert report["deleted"] + remaining == args.rows
+            label = "wipe everything" if keep_days is None else f"keep {keep_days:g} days/farm"
+            print(f"{label:<26} {in_flight:>9} {report['deleted']:>9} "
+                  f"{report['seconds']:>8.2f} {report['docs_per_s']:>8.0f}")
@@ -0,0 +1,75 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import sensor_store
+
+
+def synthetic_predictions(rows, num_farms=5, days=365, seed=0):
+    """Frame in predicted_crops.csv layout spread over num_farms and days"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01").value
+    crops = np.array(["rice", "maize", "banana", "mango", "coffee", "cotton", "papaya", "apple"])
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(np.sort(rng.integers(start, start + days * 86_400 * 10**9, rows))),
+        "farm_id": rng.integers(1, num_farms + 1, rows),
+        "soil_moisture": rng.uniform(10, 60, rows).round(2),
+        "temperature": rng.uniform(15, 40, rows).round(2),
+        "humidity": rng.uniform(30, 100, rows).round(2),
+        "rainfall": rng.uniform(0, 300, rows).round(2),
+        "ph": rng.uniform(4.5, 8.5, rows).round(2),
+        "N": rng.uniform(10, 140, rows).round(2),
+        "P": rng.uniform(5, 145, rows).round(2),
+        "K": rng.uniform(5, 205, rows).round(2),
+        "recommended_crop": rng.choice(crops, rows),
+    })
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CSV and columnar store load time and size")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    sensor_store.STORE_DIR = os.path.join(tmp_dir, "store")
+    csv_file = os.path.join(tmp_dir, "predicted_crops.csv")
+
+    print(f"🧪 Generating {args.rows:,} synthetic predictions...")
+    df = synthetic_predictions(args.rows)
+    df.to_csv(csv_file, index=False, date_format="%Y-%m-%dT%H:%M:%S.%f")
+    sensor_store.write_table("predictions", df)
+
+    # Same work app.py used to do on every rerun
+    def load_csv():
+        frame = pd.read_csv(csv_file)
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+        return frame
+
+    _, csv_time = timed(load_csv)
+    _, store_time = timed(lambda: sensor_store.read_table("predictions"))
+    _, farm_time = timed(lambda: sensor_store.read_table("predictions", farms=[1]))
+
+    csv_size = os.path.getsize(csv_file)
+    store_size = dir_size(sensor_store.table_dir("predictions"))
+
+    print(f"\n{'':<28} {'load s':>8} {'size MB':>9}")
+    print(f"{'CSV + to_datetime':<28} {csv_time:>8.2f} {csv_size / 1e6:>9.1f}")
+    print(f"{'columnar store':<28} {store_time:>8.2f} {store_size / 1e6:>9.1f}")
+    print(f"{'columnar store (1 farm)':<28} {farm_time:>8.2f}")
+
+    shutil.rmtree(tmp_dir)
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from upload_sensor_data import COLLECTION, FLOAT_COLUMNS, upload
+from utils.fake_firestore import FakeFirestore
+
+
+def synthetic_readings(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01")
+    df = pd.DataFrame({
+        "timestamp": (start + pd.to_timedelta(np.arange(rows), unit="s")).strftime("%Y-%m-%dT%H:%M:%S"),
+        "farm_id": rng.integers(1, 6, rows),
+    })
+    for col in FLOAT_COLUMNS:
+        df[col] = rng.uniform(0, 100, rows).round(2)
+    return df
+
+
+def per_row_upload(db, df, sleep):
+    """The original loop: iterrows, one add() per row, fixed sleep"""
+    for _, row in df.iterrows():
+        data = {"timestamp": row["timestamp"], "farm_id": int(row["farm_id"])}
+        data.update({col: float(row[col]) for col in FLOAT_COLUMNS})
+        db.collection(COLLECTION).add(data)
+        time.sleep(sleep)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-row vs batched Firestore upload against the fake")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Simulated commit round trip")
+    parser.add_argument("--rate-limit", type=int, default=None,
+                        help="Writes/s before the fake throttles (ResourceExhausted)")
+    parser.add_argument("--sample", type=int, default=50, help="Rows timed for the per-row baseline")
+    args = parser.parse_args()
+
+    df = synthetic_readings(args.rows)
+    latency = args.latency_ms / 1000
+
+    db = FakeFirestore(commit_latency=latency)
+    start = time.perf_counter()
+    per_row_upload(db, df.head(args.sample), sleep=0.1)
+    per_row_rate = args.sample / (time.perf_counter() - start)
+
+    print(f"\n{'mode':<28} {'docs/s':>10} {'est. time':>11} {'retries':>8}")
+    print(f"{'per-row add + sleep(0.1)':<28} {per_row_rate:>10.0f} {args.rows / per_row_rate:>10.0f}s {'-':>8}")
+
+    for in_flight in (1, 4, 16):
+        db = FakeFirestore(commit_latency=latency, max_writes_per_second=args.rate_limit)
+        start = time.perf_counter()
+        writer = upload(db, df, max_in_flight=in_flight, progress=False)
+        elapsed = time.perf_counter() - start
+        assert len(db.collection(COLLECTION).list_documents()) == args.rows
+
+        upload(db, df, max_in_flight=in_flight, progress=False)  # rerun must not duplicate
+        assert len(db.collection(COLLECTION).list_documents()) == args.rows
+
+        label = f"batched, {in_flight} in flight"
+        print(f"{label:<28} {args.rows / elapsed:>10.0f} {elapsed:>10.1f}s {writer.retries:>8}")
@@ -0,0 +1,79 @@
+import ast
+import json
+import os
+
+from utils.translator import CATALOG_DIR, translate_batch
+
+# -------- PROJECT ROOT PATH SETUP --------
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+
+APP_PATH = os.path.join(BASE_DIR, "src", "app.py")
+INFO_PATH = os.path.join(BASE_DIR, "disease_info", "disease_info.json")
+
+TRANSLATE_CALLS = {"translate_text", "translate_batch"}
+INFO_FIELDS = ["description", "precautions", "treatment"]
+
+
+def _constant_strings(node):
+    """Yield plain string literals from a call argument (f-strings are skipped)."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        yield node.value
+    elif isinstance(node, (ast.List, ast.Tuple)):
+        for elt in node.elts:
+            yield from _constant_strings(elt)
+
+
+def extract_app_strings(path=APP_PATH):
+    """Collect every static string passed to translate_text/translate_batch in app.py."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    strings = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in TRANSLATE_CALLS and node.args):
+            strings.extend(_constant_strings(node.args[0]))
+    return strings
+
+
+def extract_languages(path=APP_PATH):
+    """Read the target language codes from LANG_MAP in app.py."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == "LANG_MAP" for t in node.targets)):
+            codes = ast.literal_eval(node.value).values()
+            return [code for code in codes if code != "en"]
+    raise KeyError("❌ LANG_MAP not found in app.py")
+
+
+def extract_disease_strings(path=INFO_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        disease_info = json.load(f)
+
+    strings = []
+    for entry in disease_info.values():
+        strings.extend(entry[field] for field in INFO_FIELDS if field in entry)
+    return strings
+
+
+def build_catalogs():
+    strings = list(dict.fromkeys(extract_app_strings() + extract_disease_strings()))
+    print(f"🧾 Found {len(strings)} static strings to translate")
+
+    os.makedirs(CATALOG_DIR, exist_ok=True)
+    for lang in extract_languages():
+        translated = translate_batch(strings, lang)
+        # English passthroughs stay out, so the runtime still asks the backend for them
+        catalog = {text: value for text, value in zip(strings, translated) if value != text}
+
+        catalog_path = os.path.join(CATALOG_DIR, f"{lang}.json")
+        with open(catalog_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"✅ Wrote {len(catalog)} entries → {catalog_path}")
+
+
+if __name__ == "__main__":
+    build_catalogs()
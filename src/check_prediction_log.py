@@ -0,0 +1,156 @@
+"""Crash-recovery and exactly-once checks for the prediction log.
+
+Runs against a scratch store; exits with an AssertionError on the first
+failure.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+
+from benchmark_prediction_log import frames, use_store
+from benchmark_store import synthetic_predictions
+from utils import prediction_log, rollups, sensor_store
+
+
+def rollup_rows():
+    return int(rollups.load_rollup()["count"].sum())
+
+
+def scratch(fn):
+    tmp_dir = tempfile.mkdtemp()
+    use_store(tmp_dir)
+    try:
+        fn()
+        print(f"✅ {fn.__name__}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def torn_tail():
+    """A crash mid-frame loses that frame only; the segment is sealed on reopen"""
+    df = synthetic_predictions(300)
+    log = prediction_log.PredictionLog()
+    for chunk in frames(df, 100):
+        log.append(chunk)
+    log.sync()
+    frame = prediction_log.encode_frame(log.schema.empty_table())
+    os.write(log._fd, frame[:len(frame) // 2])
+    os.close(log._fd)  # crash: no seal, no close, the writer lock goes with the process
+    os.close(log._writer_fd)
+    log._fd = None
+
+    with prediction_log.PredictionLog() as reopened:
+        assert reopened.seq == log.seq + 1
+    assert len(prediction_log.read_snapshot()) == len(df)
+    assert prediction_log.compact() == len(df)
+    assert len(sensor_store.read_table("predictions")) == rollup_rows() == len(df)
+
+
+def single_writer():
+    """A second writer fails fast instead of sealing the live writer's segment"""
+    df = synthetic_predictions(100)
+    with prediction_log.PredictionLog() as log:
+        log.append(df)
+        try:
+            prediction_log.PredictionLog()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("second writer opened the log")
+        log.append(df)
+    with prediction_log.PredictionLog():
+        pass  # released on close
+    assert prediction_log.compact() == 2 * len(df)
+
+
+def crash_before_state():
+    """Compaction dying after the rollup update but before the state file"""
+    existing = synthetic_predictions(200, seed=1)
+    sensor_store.write_table("predictions", existing)
+    rollups.rebuild_rollup()
+    df = synthetic_predictions(500)
+    with prediction_log.PredictionLog() as log:
+        log.append(df)
+    save_state = prediction_log._save_state
+
+    def crash(path, state):
+        raise OSError("simulated crash")
+
+    prediction_log._save_state = crash
+    try:
+        prediction_log.compact()
+    except OSError:
+        pass
+    finally:
+        prediction_log._save_state = save_state
+    assert prediction_log.has_segments()
+    prediction_log.compact()
+    assert not prediction_log.has_segments()
+    assert len(sensor_store.read_table("predictions")) == rollup_rows() == len(existing) + len(df)
+
+
+def concurrent_compactors(threads=4):
+    """Several compactors at once fold every segment in exactly once"""
+    df = synthetic_predictions(4000)
+    with prediction_log.PredictionLog(segment_bytes=16 * 1024) as log:
+        for chunk in frames(df, 100):
+            log.append(chunk)
+    workers = [threading.Thread(target=prediction_log.compact) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(sensor_store.read_table("predictions")) == rollup_rows() == len(df)
+
+
+def exactly_once_reads():
+    """A reader polling while the log is appended to and compacted sees each row once"""
+    df = synthetic_predictions(20_000)
+    reader = prediction_log.SnapshotReader()
+    seen = []
+    stop = threading.Event()
+
+    def poll():
+        rows, full = reader.poll()
+        if full:
+            seen.clear()
+        seen.append(rows)
+
+    def read():
+        while not stop.is_set():
+            poll()
+
+    def compact():
+        while not stop.is_set():
+            prediction_log.compact()
+
+    workers = [threading.Thread(target=read), threading.Thread(target=compact)]
+    for worker in workers:
+        worker.start()
+    with prediction_log.PredictionLog(segment_bytes=64 * 1024) as log:
+        for chunk in frames(df, 200):
+            log.append(chunk)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    prediction_log.compact()
+    poll()
+
+    keys = ["timestamp", "farm_id", "N"]
+    got = pd.concat(seen, ignore_index=True).sort_values(keys, ignore_index=True)
+    want = sensor_store.coerce(df).sort_values(keys, ignore_index=True)
+    assert len(got) == len(df), (len(got), len(df))
+    pd.testing.assert_frame_equal(got[keys], want[keys], check_dtype=False)
+    assert rollup_rows() == len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check prediction log recovery and exactly-once reads")
+    parser.parse_args()
+
+    for check in (torn_tail, single_writer, crash_before_state, concurrent_compactors, exactly_once_reads):
+        scratch(check)
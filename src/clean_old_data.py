@@ -0,0 +1,25 @@
+import argparse
+
+from run_all import init_firebase
+from utils import retention
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply a retention policy to Firestore sensor data")
+    parser.add_argument("--collection", default="sensor_data")
+    parser.add_argument("--keep-days", type=float, default=None,
+                        help="Keep this many days per farm (omit to delete everything)")
+    parser.add_argument("--relative", choices=["latest", "now"], default="latest",
+                        help="Count the days back from each farm's newest reading or from now")
+    parser.add_argument("--farms", type=int, nargs="+", default=None,
+                        help="Farm ids (discovered with a full scan when omitted)")
+    parser.add_argument("--in-flight", type=int, default=retention.DEFAULT_IN_FLIGHT,
+                        help="Delete batches committing concurrently")
+    args = parser.parse_args()
+
+    report = retention.purge(init_firebase(), args.collection, args.keep_days, args.relative,
+                             args.farms, max_in_flight=args.in_flight)
+
+    print(f"\n✅ Deleted {report['deleted']} documents in {report['batches']} batches, "
+          f"{report['seconds']:.1f} s ({report['docs_per_s']:.0f} docs/s, {report['retries']} retries)")
+    for farm, count in sorted(report["per_farm"].items()):
+        print(f"   🏡 Farm {farm}: {count}")
@@ -1,39 +1,64 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import argparse
 import time
 
-# ✅ Firebase key
-cred = credentials.Certificate(r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\cloud\firebase-key.json")
-
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-print("🌤️ Cloud Alert System Started — monitoring Firestore for sensor warnings...")
-
-def check_alerts(doc):
-    data = doc.to_dict()
-    alerts = []
-
-    if data.get("soil_moisture_percent", 0) < 25:
-        alerts.append("🚨 Low soil moisture! Immediate irrigation needed.")
-    if data.get("temperature_C", 0) > 38:
-        alerts.append("🔥 High temperature detected! Consider shade or early watering.")
-    if data.get("pH", 7) < 5.5:
-        alerts.append("🧪 Soil too acidic! Apply lime to balance pH.")
-    if data.get("pH", 7) > 8.5:
-        alerts.append("🧪 Soil too alkaline! Consider organic compost.")
-
-    if alerts:
-        print("\n⚠️ ALERT for farm_id:", data.get("farm_id", "Unknown"))
-        for a in alerts:
-            print("   -", a)
-        print("-------------------------")
-
-# 🔄 Continuous monitoring
-while True:
-    docs = db.collection("sensor_data").stream()
-    for doc in docs:
-        check_alerts(doc)
-    time.sleep(10)  # Check every 10 seconds
\ No newline at end of file
+import pandas as pd
+
+from utils.alert_engine import (
+    DEFAULT_COOLDOWN_SECONDS,
+    DEFAULT_STATE_PATH,
+    AlertEngine,
+    AlertState,
+    FirestoreSource,
+    ReplaySource,
+)
+
+
+def init_db():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    # ✅ Firebase key
+    cred = credentials.Certificate(r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\cloud\firebase-key.json")
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(cred)
+
+    return firestore.client()
+
+
+def csv_records(path):
+    """(doc id, data) pairs from a sensor CSV, for replaying alerts locally"""
+    df = pd.read_csv(path)
+    return [(f"{row['farm_id']}_{row['timestamp']}", row) for row in df.to_dict("records")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-time sensor alerts from Firestore document changes")
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_COOLDOWN_SECONDS,
+                        help="Seconds before the same farm/condition alert is repeated")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH,
+                        help="SQLite file holding the cursor and cooldowns")
+    parser.add_argument("--replay", default=None,
+                        help="Evaluate a sensor CSV instead of listening to Firestore")
+    args = parser.parse_args()
+
+    source = ReplaySource(csv_records(args.replay)) if args.replay else FirestoreSource(init_db())
+    engine = AlertEngine(source, AlertState(args.state), cooldown_seconds=args.cooldown)
+
+    print("🌤️ Cloud Alert System Started — listening for Firestore sensor changes...")
+    engine.start()
+
+    def report():
+        print(f"📊 {engine.processed} readings checked, {engine.alerts_sent} alerts, "
+              f"{engine.suppressed} suppressed by cooldown")
+
+    # 🔄 Changes arrive on the listener thread; the main thread just stays alive
+    try:
+        while not args.replay:
+            time.sleep(60)
+            report()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+    report()
@@ -1,10 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import firebase_admin
 from firebase_admin import credentials, firestore
+import hashlib
 import time
 import altair as alt
 from ai_recommendations import recommend_irrigation, recommend_fertilizer, recommend_crop
+from utils.downsample import downsample_frame
+from utils.firestore_sync import FirestoreSnapshot
+from utils.pagination import paginate
 
 # ============================================================
 # 🔥 Firebase Safe Init
@@ -27,21 +32,28 @@ st.title("☁️ Cloud-Connected Crop & Soil Health Dashboard")
 # ============================================================
 # 📥 Load Firestore Data
 # ============================================================
+@st.cache_resource
+def get_snapshot():
+    """Local SQLite mirror of sensor_data, shared by all sessions"""
+    return FirestoreSnapshot(db, "sensor_data")
+
 @st.cache_data(ttl=20)
 def load_sensor_data():
     if db is None:
         raise ConnectionError("Firebase not initialized properly.")
-    docs = db.collection("sensor_data").stream()
-    data = [doc.to_dict() for doc in docs if doc.to_dict()]
-    if not data:
+    # Only documents newer than the last synced timestamp are read from Firestore
+    snapshot = get_snapshot()
+    snapshot.sync()
+    df = snapshot.frame()
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(data)
+    df = df.copy()
     df.columns = [c.strip().lower() for c in df.columns]
     df = df.loc[:, ~df.columns.duplicated()]
 
     if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True, format="ISO8601")
         df["timestamp"] = df["timestamp"].dt.tz_convert(None)
 
     return df.sort_values("timestamp", ascending=False)
@@ -51,12 +63,14 @@ def load_sensor_data():
 # ============================================================
 st.sidebar.header("🌍 Dashboard Controls")
 
-# Farm filter
+with st.spinner("Fetching latest Firestore data..."):
+    df = load_sensor_data()
+
+# Farm filter (from the local snapshot, no extra Firestore reads)
 selected_farm = "All Farms"
 if db:
     try:
-        farms = sorted(list(set([doc.to_dict().get("farm_name", "Unknown")
-                                 for doc in db.collection("sensor_data").stream()])))
+        farms = get_snapshot().distinct("farm_name")
         if farms:
             selected_farm = st.sidebar.selectbox("🏡 Select Farm", ["All Farms"] + farms)
     except Exception:
@@ -64,6 +78,8 @@ if db:
 
 # Manual refresh
 if st.sidebar.button("🔄 Refresh Data"):
+    # Full resync also picks up deleted or edited documents
+    get_snapshot().sync(full=True)
     st.cache_data.clear()
     st.rerun()
 
@@ -79,9 +95,6 @@ st.sidebar.info("Use filters to explore specific farms and metrics in real time.
 # ============================================================
 # 📊 Main Dashboard
 # ============================================================
-with st.spinner("Fetching latest Firestore data..."):
-    df = load_sensor_data()
-
 if df.empty:
     st.warning("⚠️ No sensor data found in Firestore.")
     st.stop()
@@ -95,21 +108,37 @@ if selected_farm != "All Farms" and "farm_name" in df.columns:
 # ============================================================
 st.subheader("📊 Live Sensor Data from Firestore")
 
-df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce").astype(str)
+FARM_COLORS = {1: "#E6F3FF", 2: "#FFF6E6", 3: "#E6FFE6", 4: "#FDE6FF"}
+DEFAULT_ROW_COLOR = "#F9F9F9"
+
+def row_styles(df):
+    """Per-cell CSS: every cell of a row gets its farm's background colour"""
+    # One vectorized farm_id → colour lookup instead of a Python call per row
+    css = "background-color: " + df["farm_id"].map(FARM_COLORS).fillna(DEFAULT_ROW_COLOR)
+    return pd.DataFrame(
+        np.repeat(css.to_numpy()[:, None], df.shape[1], axis=1),
+        index=df.index, columns=df.columns,
+    )
 
-def style_table(df):
+def style_table(df, styles=None):
     if "farm_id" in df.columns:
-        colors = {1: "#E6F3FF", 2: "#FFF6E6", 3: "#E6FFE6", 4: "#FDE6FF"}
-        styled = df.style.apply(
-            lambda row: [
-                f"background-color: {colors.get(row.farm_id, '#F9F9F9')}" for _ in row
-            ],
-            axis=1,
-        )
+        styles = row_styles(df) if styles is None else styles
+        styled = df.style.apply(lambda _: styles, axis=None)
     else:
         styled = df.style.set_properties(**{"background-color": "#FAFAFA"})
     return styled.format(precision=2)
 
+def styles_version(df):
+    """Stable digest of what the row styles depend on: columns, index and farm ids"""
+    digest = hashlib.sha1("\x1f".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df["farm_id"], index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=32)
+def cached_row_styles(version, _page):
+    """Row CSS of a page, reused across auto-refreshes while its farms are unchanged"""
+    return row_styles(_page)
+
 compact = st.toggle("🔎 Compact View (hide less important columns)", value=False)
 
 display_df = df.copy()
@@ -118,7 +147,13 @@ if compact:
             "soil_moisture_percent", "ph", "message"]
     display_df = df[[c for c in keep if c in df.columns]]
 
-st.dataframe(style_table(display_df), use_container_width=True, height=400)
+# Style and send only the visible page
+page = paginate(display_df, key="sensor_data")
+if "timestamp" in page.columns:
+    page = page.assign(timestamp=page["timestamp"].astype(str))
+# Only the CSS is cached; each render builds its own Styler around it
+styles = cached_row_styles(styles_version(page), page) if "farm_id" in page.columns else None
+st.dataframe(style_table(page, styles), use_container_width=True, height=400)
 
 csv = display_df.to_csv(index=False).encode("utf-8")
 st.download_button(
@@ -144,10 +179,16 @@ if all(x in df.columns for x in ["temperature_c", "humidity_percent", "soil_mois
 # ============================================================
 st.subheader("📉 Sensor Data Trends")
 
+# Charts get a bounded number of points whatever the time range:
+# LTTB keeps the shape of the temperature line, min/max buckets keep moisture spikes
+MAX_CHART_POINTS = 1000
+
 if "timestamp" in df.columns:
     if "temperature_c" in df.columns:
+        temp_points = downsample_frame(df[["timestamp", "temperature_c"]], "timestamp", "temperature_c",
+                                       MAX_CHART_POINTS, method="lttb")
         st.altair_chart(
-            alt.Chart(df).mark_line(point=True).encode(
+            alt.Chart(temp_points).mark_line(point=True).encode(
                 x="timestamp:T", y="temperature_c:Q",
                 color=alt.value("#E74C3C")
             ).properties(title="🌡️ Temperature Over Time"),
@@ -155,8 +196,10 @@ if "timestamp" in df.columns:
         )
 
     if "soil_moisture_percent" in df.columns:
+        moisture_points = downsample_frame(df[["timestamp", "soil_moisture_percent"]], "timestamp",
+                                           "soil_moisture_percent", MAX_CHART_POINTS, method="minmax")
         st.altair_chart(
-            alt.Chart(df).mark_area(opacity=0.5).encode(
+            alt.Chart(moisture_points).mark_area(opacity=0.5).encode(
                 x="timestamp:T", y="soil_moisture_percent:Q",
                 color=alt.value("#27AE60")
             ).properties(title="💧 Soil Moisture Over Time"),
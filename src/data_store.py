@@ -0,0 +1,28 @@
+import argparse
+
+from utils import prediction_log, rollups, sensor_store
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import, export, compact and roll up the columnar sensor store")
+    parser.add_argument("action", choices=["import", "export", "compact", "compact-log", "rollup"])
+    parser.add_argument("table", choices=list(sensor_store.TABLES))
+    parser.add_argument("--csv", default=None, help="CSV path (defaults to the table's file in data/)")
+    args = parser.parse_args()
+
+    if args.action == "import":
+        sensor_store.import_csv(args.table, args.csv)
+        if args.table == "predictions":
+            rollups.rebuild_rollup()
+        print(f"✅ Imported {args.csv or sensor_store.csv_path(args.table)} → {sensor_store.table_dir(args.table)}")
+    elif args.action == "export":
+        path = sensor_store.export_csv(args.table, args.csv)
+        print(f"✅ Exported {args.table} → {path}")
+    elif args.action == "rollup":
+        rollups.rebuild_rollup()
+        print(f"📊 Rebuilt daily rollup → {rollups.ROLLUP_PATH}")
+    elif args.action == "compact-log":
+        rows = prediction_log.compact(args.table)
+        print(f"🧹 Moved {rows} rows from {prediction_log.log_dir(args.table)} into {args.table}")
+    else:
+        merged = sensor_store.compact(args.table)
+        print(f"🧹 Compacted {merged} part files in {args.table}")
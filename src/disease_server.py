@@ -0,0 +1,201 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+import predict_disease
+from utils.prediction_cache import DEFAULT_DISK_PATH, PredictionCache
+
+# ---------- CONFIG ----------
+MAX_BATCH_SIZE = int(os.environ.get("DISEASE_MAX_BATCH_SIZE", 16))
+MAX_WAIT_MS = float(os.environ.get("DISEASE_MAX_WAIT_MS", 20))
+STATS_WINDOW = 2048  # number of recent requests kept for latency percentiles
+CACHE_SIZE = int(os.environ.get("DISEASE_CACHE_SIZE", 512))
+CACHE_ON_DISK = os.environ.get("DISEASE_CACHE_ON_DISK", "0") == "1"
+
+
+class DiseaseInferenceServer:
+    """Long-lived worker that groups queued leaf images into micro-batches.
+
+    Callers submit preprocessed images from any thread; the worker waits for
+    up to `max_batch_size` images or `max_wait_ms` after the first one arrives,
+    then runs a single forward pass for the whole batch.
+    """
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 predict_fn=None, cache=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.predict_fn = predict_fn or predict_disease.predict_images
+        self.cache = cache
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._processed = 0
+        self._started_at = time.perf_counter()
+
+        self._worker = threading.Thread(target=self._run, name="disease-inference", daemon=True)
+        self._worker.start()
+
+    # ---------- CLIENT SIDE ----------
+    def submit(self, image):
+        """Queue a PIL image; returns a Future resolving to (label, confidence, info).
+
+        Decoding and resizing run on the caller's thread; the worker only
+        scales the uint8 pixels into its float32 batch buffer.
+        """
+        array = predict_disease.preprocess_image(image)
+        future = Future()
+
+        # Re-uploads and Streamlit reruns of the same photo skip the model
+        if self.cache is not None:
+            try:
+                cached = self.cache.get(array)
+            except Exception as e:  # e.g. sqlite "database is locked": treat as a miss
+                print(f"⚠️ Prediction cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                future.set_result(cached)
+                return future
+
+        self._queue.put((array, future, time.perf_counter()))
+        return future
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout=timeout)
+
+    def stop(self):
+        self._stop.set()
+        self._worker.join()
+
+    # ---------- WORKER ----------
+    def _collect_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            arrays, futures, submitted = zip(*batch)
+            try:
+                version = self.cache.version() if self.cache is not None else None
+                results = self.predict_fn(list(arrays))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            for future, result in zip(futures, results):
+                future.set_result(result)
+            if self.cache is not None:
+                self._cache_results(arrays, results, version)
+
+            with self._stats_lock:
+                self._latencies.extend(done - t for t in submitted)
+                self._batch_sizes.append(len(batch))
+                self._processed += len(batch)
+
+    def _cache_results(self, arrays, results, version):
+        # Callers already have their results; a cache failure must not stop the worker
+        try:
+            for array, result in zip(arrays, results):
+                self.cache.put(array, result, version)
+        except Exception as e:
+            print(f"⚠️ Prediction cache write failed: {e}")
+
+    # ---------- STATS ----------
+    def stats(self):
+        """Throughput and latency figures for tuning batch size vs. wait time."""
+        with self._stats_lock:
+            latencies = np.array(self._latencies) * 1000.0
+            batch_sizes = np.array(self._batch_sizes)
+            processed = self._processed
+        elapsed = time.perf_counter() - self._started_at
+
+        return {
+            "processed": processed,
+            "queue_depth": self._queue.qsize(),
+            "throughput_per_s": processed / elapsed if elapsed > 0 else 0.0,
+            "mean_batch_size": float(batch_sizes.mean()) if batch_sizes.size else 0.0,
+            "p50_latency_ms": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+            "p99_latency_ms": float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+        }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._latencies.clear()
+            self._batch_sizes.clear()
+            self._processed = 0
+            self._started_at = time.perf_counter()
+
+
+# ---------- SHARED IN-PROCESS CLIENT ----------
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_server():
+    """Return the process-wide server, starting it on first use."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            cache = PredictionCache(
+                predict_disease.model_version,
+                max_entries=CACHE_SIZE,
+                disk_path=DEFAULT_DISK_PATH if CACHE_ON_DISK else None
+            )
+            _server = DiseaseInferenceServer(cache=cache)
+    return _server
+
+
+# ---------- LOAD TEST ----------
+def run_load_test(num_requests=256, concurrency=32, batch_sizes=(1, 4, 8, 16, 32)):
+    """Fire concurrent synthetic requests at each batch size and print the stats."""
+    from concurrent.futures import ThreadPoolExecutor
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (224, 224, 3), dtype=np.uint8))
+        for _ in range(concurrency)
+    ]
+
+    print(f"{'batch':>6} {'img/s':>8} {'mean bs':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for batch_size in batch_sizes:
+        server = DiseaseInferenceServer(max_batch_size=batch_size)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda i: server.predict(images[i % concurrency]), range(num_requests)))
+        s = server.stats()
+        server.stop()
+        print(f"{batch_size:>6} {s['throughput_per_s']:>8.1f} {s['mean_batch_size']:>8.1f} "
+              f"{s['p50_latency_ms']:>8.1f} {s['p99_latency_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    print("🚀 Benchmarking disease inference server...")
+    run_load_test()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+import predict_disease
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "datasets", "PlantVillage")
+REPORT_PATH = os.path.join(BASE_DIR, "models", "tflite_export_report.json")
+
+IMG_SIZE = 224
+BATCH_SIZE = 32
+
+
+# ---------- HELD-OUT DATA ----------
+def held_out_data():
+    """Same 20% validation split as train_disease_model.py, without augmentation"""
+    datagen = ImageDataGenerator(rescale=1./255, validation_split=0.2)
+    return datagen.flow_from_directory(
+        DATASET_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=BATCH_SIZE,
+        class_mode="sparse",
+        subset="validation",
+        shuffle=False
+    )
+
+
+def representative_dataset(num_batches=20):
+    data = held_out_data()
+    for i in range(min(num_batches, len(data))):
+        images, _ = data[i]
+        for image in images:
+            yield [image[np.newaxis].astype(np.float32)]
+
+
+# ---------- EXPORT ----------
+def export(keras_model, quantize):
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+
+    if quantize == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    tflite_model = converter.convert()
+    with open(predict_disease.TFLITE_MODEL_PATH, "wb") as f:
+        f.write(tflite_model)
+    return len(tflite_model)
+
+
+# ---------- ACCURACY PARITY ----------
+def evaluate_parity(keras_model, tflite_model):
+    data = held_out_data()
+    labels, keras_top1, tflite_top1 = [], [], []
+
+    for i in range(len(data)):
+        images, y = data[i]
+        labels.append(y.astype(int))
+        keras_top1.append(np.argmax(keras_model.predict(images, verbose=0), axis=1))
+        tflite_top1.append(np.argmax(tflite_model.predict(images), axis=1))
+
+    labels = np.concatenate(labels)
+    keras_top1 = np.concatenate(keras_top1)
+    tflite_top1 = np.concatenate(tflite_top1)
+
+    return {
+        "held_out_images": int(labels.size),
+        "keras_accuracy": float((keras_top1 == labels).mean()),
+        "tflite_accuracy": float((tflite_top1 == labels).mean()),
+        "top1_agreement": float((keras_top1 == tflite_top1).mean()),
+    }
+
+
+# ---------- COLD START / MEMORY ----------
+COLD_START_SNIPPET = """
+import resource, time
+t0 = time.perf_counter()
+import numpy as np
+import predict_disease
+predict_disease.predict_batch(np.zeros((1, 224, 224, 3), dtype=np.float32))
+print(time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure_cold_start(backend):
+    """Time a fresh process from import to first prediction; ru_maxrss is in KB on Linux"""
+    env = dict(os.environ, DISEASE_BACKEND=backend)
+    out = subprocess.run(
+        [sys.executable, "-c", COLD_START_SNIPPET],
+        cwd=os.path.dirname(__file__), env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return {"cold_start_s": float(out[-2]), "peak_rss_mb": int(out[-1]) / 1024}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the disease model to TFLite")
+    parser.add_argument("--quantize", choices=["none", "float16", "int8"], default="none")
+    parser.add_argument("--skip-parity", action="store_true",
+                        help="Skip the held-out accuracy comparison")
+    args = parser.parse_args()
+
+    print("📦 Loading Keras model...")
+    keras_model = predict_disease.load_model("keras")
+
+    size = export(keras_model, args.quantize)
+    print(f"✅ Exported {args.quantize} TFLite model ({size / 1e6:.1f} MB) → "
+          f"{predict_disease.TFLITE_MODEL_PATH}")
+
+    report = {
+        "quantize": args.quantize,
+        "h5_size_mb": os.path.getsize(predict_disease.MODEL_PATH) / 1e6,
+        "tflite_size_mb": size / 1e6,
+    }
+
+    if not args.skip_parity:
+        print("🧪 Checking accuracy parity on held-out set...")
+        tflite_model = predict_disease.TFLiteModel(
+            predict_disease.TFLITE_MODEL_PATH, interpreter_cls=tf.lite.Interpreter
+        )
+        report["parity"] = evaluate_parity(keras_model, tflite_model)
+
+    print("⏱️ Measuring cold start and memory...")
+    report["keras"] = measure_cold_start("keras")
+    report["tflite"] = measure_cold_start("tflite")
+
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"\n📊 Report saved to: {REPORT_PATH}")
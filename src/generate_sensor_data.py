@@ -0,0 +1,47 @@
+import argparse
+import time
+
+from utils import sensor_generator, sensor_timeseries
+
+
+def print_progress(done, total):
+    print(f"🌱 {done:,}/{total:,} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic sensor readings at volume")
+    parser.add_argument("--mode", default="random", choices=["random", "timeseries"],
+                        help="Independent random readings, or per-farm series at a fixed interval")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="random mode")
+    parser.add_argument("--profile", default=None, choices=sorted(sensor_generator.PROFILES),
+                        help="Value ranges (default: simulate_sensors, or realistic for timeseries)")
+    parser.add_argument("--farms", type=int, default=None,
+                        help=f"Defaults to the profile's farm count ({sensor_timeseries.DEFAULT_FARMS} for timeseries)")
+    parser.add_argument("--seed", type=int, default=None, help="Fix for reproducible output")
+    parser.add_argument("--end", default=None, help="random mode: newest timestamp (default: now)")
+    parser.add_argument("--start", default="2025-01-01", help="timeseries mode: first tick")
+    parser.add_argument("--days", type=float, default=30, help="timeseries mode: simulated days")
+    parser.add_argument("--interval-minutes", type=float, default=15, help="timeseries mode: reading interval")
+    parser.add_argument("--output", default="sensor_readings",
+                        help="Store table name, or a path ending in .csv")
+    parser.add_argument("--chunksize", type=int, default=sensor_generator.DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None, help="random mode: processes (default: all cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.mode == "timeseries":
+        args.profile = args.profile or "realistic"
+        rows = sensor_timeseries.write_timeseries(
+            args.output, args.days, farms=args.farms or sensor_timeseries.DEFAULT_FARMS,
+            interval_seconds=args.interval_minutes * 60, start=args.start, seed=args.seed,
+            profile=args.profile, chunksize=args.chunksize, progress=print_progress,
+        )
+    else:
+        args.profile = args.profile or "simulate_sensors"
+        rows = sensor_generator.write_dataset(
+            args.output, args.rows, profile=args.profile, farms=args.farms, seed=args.seed,
+            end=args.end, chunksize=args.chunksize, workers=args.workers, progress=print_progress,
+        )
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {rows:,} '{args.profile}' rows to {args.output} in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/s)")
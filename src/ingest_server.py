@@ -0,0 +1,511 @@
+"""Asyncio ingestion service for live sensor readings.
+
+Readings arrive from many concurrent sources: newline-delimited JSON over
+TCP, JSON POSTs over HTTP, or the in-process device swarm. They are queued
+and grouped into micro-batches of up to `max_batch_size` readings (or
+whatever arrived within `max_wait_ms` of the first), and each batch gets one
+`predict` call. Predicted rows are buffered and written to the sink in one
+append every `flush_rows` rows or `flush_seconds`. Prediction and writes run
+on their own threads, so the event loop keeps accepting readings meanwhile.
+
+With a `log` (utils.prediction_log.PredictionLog), each flush is one frame
+appended and fsynced to the write-ahead log instead of a new set of part
+files. Every `compact_seconds` the active segment is sealed and moved into
+the store table; the server closes and compacts the log when it stops.
+
+The queue is bounded: when it is full, sources wait. For TCP that means the
+server stops reading from the socket and devices see normal backpressure.
+
+Endpoints:
+  TCP   one JSON reading per line
+  HTTP  POST /readings (one reading or a list) → 202, GET /stats → 200
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from predict_crops import predict_frame, sink_exists, write_sink
+from utils import prediction_log, sensor_store
+
+# ---------- CONFIG ----------
+MAX_BATCH_SIZE = 2048
+MAX_WAIT_MS = 50
+FLUSH_ROWS = 50_000
+FLUSH_SECONDS = 5.0
+COMPACT_SECONDS = 60.0
+QUEUE_SIZE = 100_000
+STATS_WINDOW = 100_000  # recent readings kept for latency percentiles
+LINE_LIMIT = 64 * 1024
+CLOSE_GRACE_SECONDS = 2.0  # on stop, how long open connections may keep sending
+
+FIELDS = sensor_store.TABLES["sensor_readings"]["columns"]
+MEASUREMENTS = FIELDS[2:]
+
+
+def parse_timestamp(value):
+    """ISO 8601 string → naive local ISO string, the form the store's coercion expects"""
+    if not isinstance(value, str):
+        raise ValueError("timestamp must be an ISO 8601 string")
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"invalid timestamp: {value!r}") from None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone().replace(tzinfo=None)
+    return ts.isoformat()
+
+
+def parse_reading(obj):
+    """Validate one reading; a missing timestamp is set to the time of receipt"""
+    if not isinstance(obj, dict):
+        raise ValueError("reading must be a JSON object")
+    missing = [f for f in FIELDS[1:] if f not in obj]
+    if missing:
+        raise ValueError(f"missing fields: {missing}")
+    try:
+        reading = {f: float(obj[f]) for f in MEASUREMENTS}
+        reading["farm_id"] = int(obj["farm_id"])
+    except (TypeError, ValueError):
+        raise ValueError("farm_id and measurements must be numbers") from None
+    timestamp = obj.get("timestamp")
+    reading["timestamp"] = parse_timestamp(timestamp) if timestamp else datetime.now().isoformat()
+    return reading
+
+
+class IngestServer:
+
+    def __init__(self, model, sink="predictions", max_batch_size=MAX_BATCH_SIZE,
+                 max_wait_ms=MAX_WAIT_MS, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS,
+                 queue_size=QUEUE_SIZE, on_flush=None, log=None, compact_seconds=COMPACT_SECONDS):
+        self.model = model
+        self.sink = sink
+        self.log = log
+        self.compact_seconds = compact_seconds
+        self._compacted_at = time.monotonic()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.on_flush = on_flush
+
+        self._queue = asyncio.Queue(queue_size)
+        self._buffer = []      # predicted frames waiting for the next flush
+        self._arrivals = []    # matching arrays of receipt times
+        self._buffered = 0
+        self._sync_pending = False  # rows reached the log but are not yet fsynced
+        self._flush_now = asyncio.Event()
+        self._predict_pool = ThreadPoolExecutor(1, thread_name_prefix="ingest-predict")
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="ingest-write")
+        self._servers = []
+        self._connections = set()
+        self._tasks = []
+        self._stopping = False
+
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._flush_sizes = deque(maxlen=STATS_WINDOW)
+        self.received = 0
+        self.rejected = 0
+        self.failed = 0
+        self.written = 0
+        self._started_at = time.perf_counter()
+
+    # ---------- LIFECYCLE ----------
+    async def start(self, host="127.0.0.1", tcp_port=None, http_port=None):
+        if tcp_port is not None:
+            self._servers.append(await asyncio.start_server(self._handle_tcp, host, tcp_port, limit=LINE_LIMIT))
+        if http_port is not None:
+            self._servers.append(await asyncio.start_server(self._handle_http, host, http_port, limit=LINE_LIMIT))
+        self._tasks = [asyncio.create_task(self._batch_loop()), asyncio.create_task(self._flush_loop())]
+        self._started_at = time.perf_counter()
+        return self
+
+    def ports(self):
+        return [server.sockets[0].getsockname()[1] for server in self._servers]
+
+    async def stop(self):
+        """Stop accepting, drain the queue, write everything buffered"""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self._connections:
+            _, lingering = await asyncio.wait(self._connections, timeout=CLOSE_GRACE_SECONDS)
+            for task in lingering:
+                task.cancel()
+        await self._queue.join()
+        batch_task, flush_task = self._tasks
+        batch_task.cancel()
+        # Let a flush in progress finish rather than cancel it mid-write
+        self._stopping = True
+        self._flush_now.set()
+        await asyncio.gather(batch_task, flush_task, return_exceptions=True)
+        await self._flush()
+        if self.log is not None:
+            await asyncio.get_running_loop().run_in_executor(self._write_pool, self._close_log)
+        self._predict_pool.shutdown()
+        self._write_pool.shutdown()
+
+    # ---------- INTAKE ----------
+    def _parse(self, obj):
+        try:
+            return parse_reading(obj)
+        except ValueError:
+            self.rejected += 1
+            raise
+
+    async def _enqueue(self, reading):
+        self.received += 1
+        await self._queue.put((reading, time.perf_counter()))
+
+    async def submit(self, obj):
+        """Queue one reading; raises ValueError if it is malformed"""
+        await self._enqueue(self._parse(obj))
+
+    def _track(self):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        task.add_done_callback(self._connections.discard)
+
+    async def _handle_tcp(self, reader, writer):
+        self._track()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    reading = self._parse(json.loads(line))
+                except json.JSONDecodeError:
+                    self.rejected += 1
+                    continue
+                except ValueError:
+                    continue  # counted in rejected; there is no reply channel per line
+                await self._enqueue(reading)
+        except (ConnectionError, ValueError):  # ValueError: line over LINE_LIMIT
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_http(self, reader, writer):
+        self._track()
+        try:
+            while request_line := await reader.readline():
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return "200 OK", self.stats()
+        if method == "POST" and path == "/readings":
+            # All or nothing: a bad reading rejects the whole request
+            try:
+                payload = json.loads(body)
+                readings = [self._parse(obj) for obj in (payload if isinstance(payload, list) else [payload])]
+            except json.JSONDecodeError as e:
+                self.rejected += 1
+                return "400 Bad Request", {"error": f"invalid JSON: {e}"}
+            except ValueError as e:
+                return "400 Bad Request", {"error": str(e)}
+            for reading in readings:
+                await self._enqueue(reading)
+            return "202 Accepted", {"accepted": len(readings)}
+        return "404 Not Found", {"error": f"no route for {method} {path}"}
+
+    # ---------- MICRO-BATCHING ----------
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            readings, arrivals = zip(*batch)
+            try:
+                result = await loop.run_in_executor(
+                    self._predict_pool, predict_frame, self.model, pd.DataFrame(readings))
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"❌ Prediction failed for {len(batch)} readings: {e}")
+            else:
+                self._buffer.append(result)
+                self._arrivals.append(np.array(arrivals))
+                self._buffered += len(result)
+                self._batch_sizes.append(len(batch))
+                if self._buffered >= self.flush_rows:
+                    self._flush_now.set()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ---------- BUFFERED WRITES ----------
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self._flush()
+
+    async def _flush(self):
+        if self._sync_pending:
+            await self._retry_sync()
+        if not self._buffer:
+            return
+        frames, arrivals = self._buffer, self._arrivals
+        self._buffer, self._arrivals, self._buffered = [], [], 0
+        loop = asyncio.get_running_loop()
+        try:
+            # Typed once here, so a write either stores every row or none of them
+            df = sensor_store.coerce(pd.concat(frames, ignore_index=True))
+        except (ValueError, TypeError) as e:
+            rows = sum(len(frame) for frame in frames)
+            self.failed += rows
+            print(f"❌ Dropped {rows} rows that could not be typed: {e}")
+            return
+
+        def write():
+            if self.log is None:
+                write_sink(self.sink, df, append=sink_exists(self.sink))
+                return
+            self.log.append(df)
+            self.log.sync()
+            if time.monotonic() - self._compacted_at >= self.compact_seconds:
+                self._compact_log()
+
+        try:
+            await loop.run_in_executor(self._write_pool, write)
+        except prediction_log.SyncError as e:
+            # The rows are in the log already: appending them again would store them twice
+            self._sync_pending = True
+            print(f"⚠️ Flush of {len(df)} rows not yet durable, will retry the sync: {e}")
+        except OSError as e:
+            # Disk or store trouble is transient: keep the rows for the next flush
+            self._buffer, self._arrivals = frames + self._buffer, arrivals + self._arrivals
+            self._buffered += len(df)
+            print(f"❌ Flush of {len(df)} rows failed, will retry: {e}")
+            return
+        except Exception as e:
+            # Anything else would fail the same way again
+            self.failed += len(df)
+            print(f"❌ Dropped {len(df)} rows that could not be written: {e}")
+            return
+        done = time.perf_counter()
+        self._latencies.extend(done - np.concatenate(arrivals))
+        self._flush_sizes.append(len(df))
+        self.written += len(df)
+        if self.on_flush:
+            self.on_flush(df)
+
+    async def _retry_sync(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._write_pool, self.log.sync)
+        except OSError as e:
+            print(f"⚠️ Log sync failed, will retry: {e}")
+            return
+        self._sync_pending = False
+
+    def _compact_log(self):
+        try:
+            self.log.rotate()
+            prediction_log.compact(self.log.name, self.log.path)
+        except Exception as e:
+            # The rows are durable in sealed segments; the next compaction retries
+            print(f"⚠️ Log compaction failed, will retry: {e}")
+        self._compacted_at = time.monotonic()
+
+    def _close_log(self):
+        self.log.close()
+        self._compact_log()
+
+    # ---------- STATS ----------
+    def stats(self):
+        """Ingestion rate, batch / flush sizes and receipt-to-storage latency"""
+        latencies = np.array(self._latencies) * 1000.0
+        batch_sizes = np.array(self._batch_sizes)
+        flush_sizes = np.array(self._flush_sizes)
+        elapsed = time.perf_counter() - self._started_at
+
+        def pct(q):
+            return float(np.percentile(latencies, q)) if latencies.size else 0.0
+
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "written": self.written,
+            "queue_depth": self._queue.qsize(),
+            "buffered": self._buffered,
+            "ingest_per_s": self.received / elapsed if elapsed > 0 else 0.0,
+            "mean_batch_size": float(batch_sizes.mean()) if batch_sizes.size else 0.0,
+            "max_batch_size": int(batch_sizes.max()) if batch_sizes.size else 0,
+            "mean_flush_rows": float(flush_sizes.mean()) if flush_sizes.size else 0.0,
+            "p50_latency_ms": pct(50),
+            "p95_latency_ms": pct(95),
+            "p99_latency_ms": pct(99),
+        }
+
+    def reset_stats(self):
+        self._latencies.clear()
+        self._batch_sizes.clear()
+        self._flush_sizes.clear()
+        self.received = self.rejected = self.failed = self.written = 0
+        self._started_at = time.perf_counter()
+
+
+def print_stats(stats):
+    print(f"📊 {stats['received']} received ({stats['ingest_per_s']:.0f}/s), {stats['written']} written, "
+          f"batch {stats['mean_batch_size']:.0f} avg / {stats['max_batch_size']} max, "
+          f"latency p50 {stats['p50_latency_ms']:.0f} ms / p99 {stats['p99_latency_ms']:.0f} ms, "
+          f"{stats['queue_depth']} queued, {stats['rejected']} rejected")
+
+
+# ---------- SOURCES ----------
+async def run_swarm(submit, devices=1000, interval=1.0, duration=None, seed=None):
+    """Simulated devices, one per farm, each reporting once per interval at its own phase.
+
+    Readings come from a SensorTimeSeries, so values are continuous per device.
+    `submit` is an async callable taking one reading dict. Runs until
+    cancelled when duration is None.
+    """
+    from utils.sensor_timeseries import SensorTimeSeries
+
+    loop = asyncio.get_running_loop()
+    sim = SensorTimeSeries(devices, interval_seconds=max(1, round(interval)), seed=seed)
+    phase = np.random.default_rng(seed).uniform(0, interval, devices)
+    start = loop.time()
+
+    async def device(reading, at):
+        await asyncio.sleep(max(0.0, at - loop.time()))
+        reading["timestamp"] = datetime.now().isoformat()
+        await submit(reading)
+
+    ticks = itertools.count() if duration is None else range(max(1, int(duration / interval)))
+    for tick in ticks:
+        frame = sim.step(1).drop(columns="timestamp")
+        tick_start = start + tick * interval
+        await asyncio.gather(*(device(reading, tick_start + phase[i])
+                               for i, reading in enumerate(frame.to_dict("records"))))
+
+
+class TcpDevices:
+    """A client side for the TCP endpoint: devices share a few connections"""
+
+    def __init__(self, host, port, connections=8):
+        self.host, self.port, self.connections = host, port, connections
+        self._writers = []
+        self._next = 0
+
+    async def __aenter__(self):
+        for _ in range(self.connections):
+            _, writer = await asyncio.open_connection(self.host, self.port)
+            self._writers.append(writer)
+        return self
+
+    async def submit(self, reading):
+        writer = self._writers[self._next % len(self._writers)]
+        self._next += 1
+        writer.write(json.dumps(reading).encode() + b"\n")
+        await writer.drain()
+
+    async def __aexit__(self, *exc):
+        for writer in self._writers:
+            writer.close()
+            await writer.wait_closed()
+
+
+# ---------- LOAD TEST ----------
+async def _ingest_over_tcp(model, sink, readings, connections, **server_args):
+    server = await IngestServer(model, sink=sink, **server_args).start(tcp_port=0)
+    start = time.perf_counter()
+    async with TcpDevices("127.0.0.1", server.ports()[0], connections) as devices:
+        for reading in readings:
+            await devices.submit(reading)
+    await server.stop()
+    return server.stats(), time.perf_counter() - start
+
+
+def per_row(model, sink, readings):
+    """The old loop without its sleep: one-row predict and one append per reading"""
+    for reading in readings:
+        write_sink(sink, predict_frame(model, pd.DataFrame([reading])), append=sink_exists(sink))
+
+
+def run_load_test(model_path, rows=200_000, connections=16, sample=200):
+    import os
+    import tempfile
+
+    from utils import sensor_generator
+    from utils.forest_engine import load_forest
+
+    model = load_forest(model_path)
+    df = sensor_generator.generate(rows, profile="realistic", seed=0)
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    readings = df.to_dict("records")
+    tmp = tempfile.mkdtemp()
+
+    start = time.perf_counter()
+    per_row(model, os.path.join(tmp, "per_row.csv"), readings[:sample])
+    per_row_rate = sample / (time.perf_counter() - start)
+
+    print(f"{'mode':<26} {'readings/s':>11} {'mean batch':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'per-row predict + append':<26} {per_row_rate:>11.0f} {1:>11} {1000 / per_row_rate:>8.1f} {'-':>8}")
+    for batch_size in (64, 512, MAX_BATCH_SIZE):
+        sink = os.path.join(tmp, f"batched_{batch_size}.csv")
+        stats, elapsed = asyncio.run(_ingest_over_tcp(model, sink, readings, connections,
+                                                      max_batch_size=batch_size, flush_seconds=1.0))
+        assert stats["written"] == rows
+        print(f"{f'service, batch {batch_size}':<26} {rows / elapsed:>11.0f} {stats['mean_batch_size']:>11.0f} "
+              f"{stats['p50_latency_ms']:>8.0f} {stats['p99_latency_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from predict_crops import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Load test: per-row loop vs micro-batched ingestion over TCP")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--connections", type=int, default=16)
+    args = parser.parse_args()
+
+    print("🚀 Benchmarking live sensor ingestion...")
+    run_load_test(args.model, args.rows, args.connections)
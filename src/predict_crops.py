@@ -1,8 +1,14 @@
+import argparse
+import numpy as np
 import pandas as pd
-import joblib
 import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-print("📦 Loading trained crop recommendation model...")
+from utils import rollups, sensor_store
+from utils.forest_engine import load_forest
+from utils.model_bundle import bundle_path, load_bundle, save_bundle
 
 # -------- PROJECT ROOT PATH SETUP --------
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -10,22 +16,14 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 
-# ----------------------------------------
-
-# Load trained model
-model_path = os.path.join(MODEL_DIR, "diverse_crop_model.pkl")
-model = joblib.load(model_path)
-print(f"✅ Loaded model from: {model_path}")
-
-print("📂 Loading cleaned sensor data...")
-
-# Load cleaned dataset
-data_path = os.path.join(DATA_DIR, "simulated_sensor_data.csv")
+MODEL_PATH = os.path.join(MODEL_DIR, "diverse_crop_model.pkl")
 
-df = pd.read_csv(data_path)
+# Store tables by default; any path ending in .csv is read/written as CSV
+INPUT_SOURCE = "sensor_readings"
+OUTPUT_SINK = "predictions"
+CSV_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
 
-print("\n🧾 Columns found in cleaned dataset:")
-print(list(df.columns))
+# ----------------------------------------
 
 # Rename columns to match training data
 rename_map = {
@@ -36,26 +34,9 @@ rename_map = {
     'pH': 'ph'
 }
 
-
-df = df.rename(columns=rename_map)
-
 # Required columns (same order as training)
 required_columns = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
 
-missing_cols = [col for col in required_columns if col not in df.columns]
-if missing_cols:
-    raise KeyError(f"❌ Missing columns in data: {missing_cols}")
-
-input_data = df[required_columns]
-
-print("\n🤖 Making crop predictions...")
-predictions = model.predict(input_data)
-
-# Add predictions
-df['recommended_crop'] = predictions
-
-# Save output
-output_path = os.path.join(DATA_DIR, "predicted_crops.csv")
 columns_to_save = [
     'timestamp',
     'farm_id',
@@ -70,10 +51,243 @@ columns_to_save = [
     'recommended_crop'
 ]
 
-df[columns_to_save].to_csv(output_path, index=False)
+def predict_frame(model, df):
+    """Rename, validate and predict one frame; returns the columns to save"""
+    df = df.rename(columns=rename_map)
+
+    missing_cols = [col for col in required_columns if col not in df.columns]
+    if missing_cols:
+        raise KeyError(f"❌ Missing columns in data: {missing_cols}")
+
+    df['recommended_crop'] = model.predict(df[required_columns])
+    return df[columns_to_save]
+
+
+# -------- SOURCES / SINKS --------
+# Inputs are typed by sensor_store (datetime64 / int32 / float32). The forest
+# casts features to float32 anyway, so float32 measurements give identical
+# predictions at half the memory.
+def is_csv(target):
+    return target.endswith(".csv")
+
+
+def read_source(source):
+    if is_csv(source):
+        return sensor_store.read_csv_typed(source)
+    return sensor_store.read_table(source)
+
+
+def source_chunks(source, chunksize):
+    if is_csv(source):
+        yield from sensor_store.csv_chunks(source, chunksize)
+    else:
+        yield from sensor_store.iter_chunks(source, chunksize)
+
+
+def write_sink(sink, df, append=False):
+    if is_csv(sink):
+        df.to_csv(sink, mode='a' if append else 'w', header=not append, index=False,
+                  date_format=CSV_TIMESTAMP_FORMAT)
+    else:
+        sensor_store.write_table(sink, df, mode="append" if append else "overwrite")
+        if sink == "predictions":
+            # Keep the dashboard's daily rollup in step with the table
+            if append:
+                rollups.update_rollup(df)
+            else:
+                rollups.replace_rollup(df)
+
+
+def sink_exists(sink):
+    return os.path.exists(sink) if is_csv(sink) else sensor_store.in_store(sink)
+
+
+def sink_chunks(sink, chunksize):
+    columns = ['timestamp', 'farm_id']
+    if is_csv(sink):
+        yield from sensor_store.csv_chunks(sink, chunksize, usecols=columns)
+    else:
+        yield from sensor_store.iter_chunks(sink, chunksize, columns=columns)
+
+
+# -------- RESUME SUPPORT --------
+def row_keys(df):
+    """64-bit hash of (timestamp, farm_id) per row"""
+    keys = pd.DataFrame({
+        'timestamp': df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+        'farm_id': df['farm_id'].to_numpy(dtype=np.int64),
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def resume_offset(source, sink, chunksize):
+    """Input rows already in a CSV output. Only this script appends to it, in
+    input order, so they run up to the input row matching its last key."""
+    last = None
+    for chunk in sink_chunks(sink, chunksize):
+        if len(chunk):
+            last = row_keys(chunk.iloc[-1:])[0]
+    if last is None:
+        return 0
+    offset = 0
+    for chunk in source_chunks(source, chunksize):
+        hits = np.flatnonzero(row_keys(chunk) == last)
+        if hits.size:
+            return offset + int(hits[0]) + 1
+        offset += len(chunk)
+    return 0  # not from this input
+
+
+def predicted_keys(sink, chunk):
+    """Sorted keys the store output already holds for the chunk's farms and time span.
+    Other writers append to store tables too, so each chunk is checked on its own."""
+    done = sensor_store.read_table(sink, columns=['timestamp', 'farm_id'], farms=chunk['farm_id'].unique(),
+                                   start=chunk['timestamp'].min(), end=chunk['timestamp'].max())
+    return np.sort(row_keys(done))
+
+
+def already_predicted(df, done_keys):
+    if done_keys.size == 0:
+        return np.zeros(len(df), dtype=bool)
+    keys = row_keys(df)
+    pos = np.searchsorted(done_keys, keys).clip(max=done_keys.size - 1)
+    return done_keys[pos] == keys
+
+
+# -------- PREDICTION MODES --------
+def predict_all(model, source, sink):
+    """Original mode: load the whole input, predict once, write once"""
+    print("📂 Loading sensor data...")
+    df = read_source(source)
+
+    print("\n🧾 Columns found in cleaned dataset:")
+    print(list(df.columns))
+
+    print("\n🤖 Making crop predictions...")
+    result = predict_frame(model, df)
+    write_sink(sink, result)
+    return result
+
+
+# -------- PARALLEL SCORING --------
+_worker_model = None
+
+
+def _init_worker(forest_path):
+    """Each worker maps the shared .forest bundle once"""
+    global _worker_model
+    _worker_model = load_bundle(forest_path)
+
+
+def _predict_part(df):
+    return predict_frame(_worker_model, df)
+
+
+def shared_bundle(model_path):
+    """Path of an up-to-date .forest bundle for the model, writing a temporary one if needed"""
+    bundle = bundle_path(model_path)
+    if os.path.exists(bundle) and (
+            not os.path.exists(model_path) or os.path.getmtime(bundle) >= os.path.getmtime(model_path)):
+        return bundle
+    tmp_path = os.path.join(tempfile.mkdtemp(), os.path.basename(bundle))
+    return save_bundle(load_forest(model_path), tmp_path)
+
+
+def _split(chunk, workers, partition):
+    if partition == "farm":
+        return [part for _, part in chunk.groupby('farm_id', sort=False)]
+    return [chunk.iloc[idx] for idx in np.array_split(np.arange(len(chunk)), workers) if len(idx)]
+
+
+def score_chunks(model_path, chunks, workers=1, partition="rows"):
+    """Yield predicted frames in input order, fanning each chunk out over a process pool"""
+    if workers <= 1:
+        model = load_forest(model_path)
+        for chunk in chunks:
+            yield predict_frame(model, chunk)
+        return
+
+    forest_path = shared_bundle(model_path)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(forest_path,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append([pool.submit(_predict_part, part) for part in _split(chunk, workers, partition)])
+            # Keep at most two chunks in flight so memory stays bounded
+            if len(pending) > 2:
+                yield pd.concat([f.result() for f in pending.popleft()]).sort_index()
+        while pending:
+            yield pd.concat([f.result() for f in pending.popleft()]).sort_index()
+
+
+def predict_streaming(model_path, source, sink, chunksize, resume=False,
+                      workers=1, partition="rows"):
+    """Predict fixed-size chunks and append them; memory is bounded by chunksize"""
+    append = resume and sink_exists(sink)
+    # Memory stays bounded by chunksize: a CSV output resumes from an input
+    # position, a store output is checked chunk by chunk
+    offset = resume_offset(source, sink, chunksize) if append and is_csv(sink) else 0
+    check_store = append and not is_csv(sink)
+    if offset:
+        print(f"⏩ Resuming — the first {offset} rows were already predicted")
+    skipped = 0
+
+    def pending_chunks():
+        nonlocal skipped
+        position = 0
+        for chunk in source_chunks(source, chunksize):
+            start, position = position, position + len(chunk)
+            if start < offset:
+                skipped += min(offset, position) - start
+                chunk = chunk.iloc[offset - start:]
+            if check_store and len(chunk):
+                done = already_predicted(chunk, predicted_keys(sink, chunk))
+                skipped += int(done.sum())
+                chunk = chunk[~done]
+            if len(chunk):
+                yield chunk
+
+    written = 0
+    for result in score_chunks(model_path, pending_chunks(), workers, partition):
+        write_sink(sink, result, append)
+        append = True
+        written += len(result)
+        print(f"🌾 Predicted {written} rows...")
+
+    print(f"\n✅ Streamed {written} new predictions ({skipped} skipped as already predicted)")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict recommended crops for sensor readings")
+    parser.add_argument("--input", default=INPUT_SOURCE,
+                        help="Store table name or .csv path")
+    parser.add_argument("--output", default=OUTPUT_SINK,
+                        help="Store table name or .csv path")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the input in chunks of this many rows")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --chunksize, skip (timestamp, farm_id) rows already in the output")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Score on this many processes (implies streaming)")
+    parser.add_argument("--partition", choices=["rows", "farm"], default="rows",
+                        help="Split each chunk across workers by row range or by farm_id")
+    args = parser.parse_args()
+
+    if args.workers > 1 and not args.chunksize:
+        args.chunksize = 100_000
 
+    if args.chunksize:
+        print(f"📦 Streaming with {args.workers} worker(s), {args.chunksize} rows per chunk...")
+        predict_streaming(args.model, args.input, args.output, args.chunksize,
+                          args.resume, args.workers, args.partition)
+    else:
+        print("📦 Loading trained crop recommendation model...")
+        model = load_forest(args.model)
+        print(f"✅ Loaded model from: {args.model}")
 
-print(f"\n✅ Predictions saved to: {output_path}")
+        result = predict_all(model, args.input, args.output)
+        print(f"\n✅ Predictions saved to: {args.output}")
 
-print("\n🌾 Sample predictions:")
-print(df[['timestamp', 'farm_id', 'recommended_crop']].head())
+        print("\n🌾 Sample predictions:")
+        print(result[['timestamp', 'farm_id', 'recommended_crop']].head())
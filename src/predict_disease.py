@@ -1,29 +1,124 @@
-import tensorflow as tf
 import numpy as np
 import json
+import threading
 from PIL import Image
 import os
 
+from utils.image_preprocess import load_image, preprocess_batch
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 MODEL_PATH = os.path.join(BASE_DIR, "models", "plant_disease_model.h5")
+TFLITE_MODEL_PATH = os.path.join(BASE_DIR, "models", "plant_disease_model.tflite")
 INFO_PATH = os.path.join(BASE_DIR, "disease_info", "disease_info.json")
 CLASS_PATH = os.path.join(BASE_DIR, "models", "class_indices.json")
 
+# "keras" loads the .h5 with full TensorFlow; "tflite" uses the exported
+# model from export_disease_model.py and never imports tensorflow
+BACKEND = os.environ.get("DISEASE_BACKEND", "keras")
+
+
+# ---------- TFLITE BACKEND ----------
+class TFLiteModel:
+    """Minimal predict() wrapper around a TFLite interpreter"""
+
+    def __init__(self, path, interpreter_cls=None):
+        if interpreter_cls is not None:
+            Interpreter = interpreter_cls
+        else:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                from ai_edge_litert.interpreter import Interpreter
+
+        self.interpreter = Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input["shape"][0])
+        self.lock = threading.Lock()  # interpreters are not thread-safe
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self.lock:
+            if batch.shape[0] != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self.input = self.interpreter.get_input_details()[0]
+                self.output = self.interpreter.get_output_details()[0]
+                self.batch_size = batch.shape[0]
+
+            # int8 models take quantized input and return quantized scores
+            if self.input["dtype"] != np.float32:
+                scale, zero_point = self.input["quantization"]
+                batch = np.round(batch / scale + zero_point).astype(self.input["dtype"])
+
+            self.interpreter.set_tensor(self.input["index"], batch)
+            self.interpreter.invoke()
+            preds = self.interpreter.get_tensor(self.output["index"])
+
+            if self.output["dtype"] != np.float32:
+                scale, zero_point = self.output["quantization"]
+                preds = (preds.astype(np.float32) - zero_point) * scale
+        return preds
+
+
 # ---------- LOAD MODEL ----------
-model = tf.keras.models.load_model(MODEL_PATH)
+def load_model(backend=BACKEND):
+    if backend == "tflite":
+        return TFLiteModel(TFLITE_MODEL_PATH)
+    if backend == "keras":
+        import tensorflow as tf
+        return tf.keras.models.load_model(MODEL_PATH)
+    raise ValueError(f"❌ Unknown DISEASE_BACKEND: {backend}")
+
+
+def model_version(backend=BACKEND):
+    """Fingerprint of the active model file and class indices (changes on retrain/export)"""
+    path = TFLITE_MODEL_PATH if backend == "tflite" else MODEL_PATH
+    parts = [backend]
+    for p in (path, CLASS_PATH):
+        try:
+            st = os.stat(p)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except FileNotFoundError:
+            parts.append("missing")
+    return "|".join(parts)
 
-# ---------- LOAD DISEASE INFO ----------
-with open(INFO_PATH, "r") as f:
-    disease_info = json.load(f)
 
 # ---------- LOAD CLASS INDICES ----------
-with open(CLASS_PATH, "r") as f:
-    class_indices = json.load(f)
+def load_class_indices():
+    with open(CLASS_PATH, "r") as f:
+        return json.load(f)
+
+
+class_indices = load_class_indices()
 
 # Invert dict → index : class_name
 IDX_TO_CLASS = {v: k for k, v in class_indices.items()}
 
+model = None
+loaded_version = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Load the configured backend on first use, and again after a retrain or re-export"""
+    global model, loaded_version, class_indices, IDX_TO_CLASS
+    with _model_lock:
+        # Fingerprint taken before loading: a file replaced mid-load is reloaded next call
+        version = model_version()
+        if model is None or version != loaded_version:
+            model = load_model()
+            class_indices = load_class_indices()
+            IDX_TO_CLASS = {v: k for k, v in class_indices.items()}
+            loaded_version = version
+    return model
+
+# ---------- LOAD DISEASE INFO ----------
+with open(INFO_PATH, "r") as f:
+    disease_info = json.load(f)
+
 
 # ---------- CLEAN LABEL ----------
 def clean_disease_name(label: str):
@@ -40,16 +135,17 @@ def clean_disease_name(label: str):
     return label.title()
 
 
-# ---------- PREDICTION ----------
-def predict_disease(image: Image.Image):
-    image = image.convert("RGB")
-    image = image.resize((224, 224))
-    image = np.array(image) / 255.0
-    image = np.expand_dims(image, axis=0)
+# ---------- PREPROCESSING ----------
+def preprocess_image(image: Image.Image):
+    """Decode and resize to a (224, 224, 3) uint8 array; scaling happens in the batch buffer"""
+    return load_image(image)
 
-    preds = model.predict(image, verbose=0)
-    idx = int(np.argmax(preds))
-    confidence = float(np.max(preds))
+
+# ---------- DECODING ----------
+def decode_prediction(probs):
+    """Map one row of class probabilities to (label, confidence, info)"""
+    idx = int(np.argmax(probs))
+    confidence = float(np.max(probs))
 
     original_label = IDX_TO_CLASS[idx]
     cleaned_label = clean_disease_name(original_label)
@@ -61,3 +157,19 @@ def predict_disease(image: Image.Image):
     })
 
     return cleaned_label, confidence, info
+
+
+# ---------- PREDICTION ----------
+def predict_batch(batch):
+    """Run one forward pass over a (n, 224, 224, 3) float32 batch"""
+    return get_model().predict(batch, verbose=0)
+
+
+def predict_images(images):
+    """Predict a list of PIL images / paths / uint8 arrays with one forward pass"""
+    preds = predict_batch(preprocess_batch(images))
+    return [decode_prediction(p) for p in preds]
+
+
+def predict_disease(image: Image.Image):
+    return predict_images([image])[0]
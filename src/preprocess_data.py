@@ -1,14 +1,12 @@
-import pandas as pd
-import numpy as np
 from sklearn.preprocessing import StandardScaler
 import os
 
-# Path to the original CSV file
-INPUT_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "simulated_sensor_data.csv")
+from utils import sensor_store
+
 OUTPUT_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cleaned_sensor_data.csv")
 
 print("📂 Loading dataset...")
-df = pd.read_csv(INPUT_CSV)
+df = sensor_store.read_table("sensor_readings")
 
 # 1️⃣ Show first 5 rows
 print("\n🧾 First 5 rows of the dataset:")
@@ -1,10 +1,12 @@
 import os
 import subprocess
 import time
-import random
 import firebase_admin
+import numpy as np
 from firebase_admin import credentials, firestore
 
+from utils import retention, sensor_generator
+
 # ---------------- Firebase ----------------
 def init_firebase():
     if not firebase_admin._apps:
@@ -14,54 +16,44 @@ def init_firebase():
         firebase_admin.initialize_app(cred)
     return firestore.client()
 
-def clear_old_data(db):
-    docs = db.collection("sensor_data").stream()
-    batch = db.batch()
-    count = 0
-    for doc in docs:
-        batch.delete(doc.reference)
-        count += 1
-    batch.commit()
-    print(f"🧹 Cleared {count} old sensor records.\n")
+def clear_old_data(db, keep_days=None):
+    """Delete sensor records (all of them, or those older than keep_days per farm)"""
+    report = retention.purge(db, "sensor_data", keep_days=keep_days)
+    print(f"🧹 Cleared {report['deleted']} old sensor records "
+          f"({report['docs_per_s']:.0f} docs/s).\n")
+
+# Firestore field names for the generator's columns
+UPLOAD_FIELDS = {
+    "temperature_C": "temperature_c",
+    "humidity_percent": "humidity_percent",
+    "soil_moisture_percent": "soil_moisture_percent",
+    "N": "n",
+    "P": "p",
+    "K": "k",
+    "pH": "ph",
+    "rainfall_mm": "rainfall_mm",
+}
+
+def sensor_messages(df):
+    """Status message per reading; the first matching condition wins"""
+    return np.select(
+        [df["soil_moisture_percent"] < 30, df["pH"] < 5.5, df["temperature_C"] > 38],
+        ["Low soil moisture — irrigation needed", "Soil too acidic — add lime",
+         "High temperature — crop stress risk"],
+        default="All conditions normal",
+    )
 
-def upload_random_sensor_data():
+def upload_random_sensor_data(count=10):
     db = init_firebase()
     clear_old_data(db)
-    farms = [1, 2, 3, 4, 5]
     print("🚀 Uploading fresh sensor data to Firestore...\n")
-    for i in range(10):
-        farm_id = random.choice(farms)
-        temperature_c = round(random.uniform(20, 42), 2)
-        humidity_percent = round(random.uniform(40, 95), 2)
-        soil_moisture_percent = round(random.uniform(10, 90), 2)
-        n = round(random.uniform(20, 200), 2)
-        p = round(random.uniform(10, 150), 2)
-        k = round(random.uniform(10, 180), 2)
-        ph = round(random.uniform(4.5, 8.5), 2)
-        rainfall_mm = round(random.uniform(40, 300), 2)
-
-        if soil_moisture_percent < 30:
-            message = "Low soil moisture — irrigation needed"
-        elif ph < 5.5:
-            message = "Soil too acidic — add lime"
-        elif temperature_c > 38:
-            message = "High temperature — crop stress risk"
-        else:
-            message = "All conditions normal"
-
-        data = {
-            "farm_id": farm_id,
-            "temperature_c": temperature_c,
-            "humidity_percent": humidity_percent,
-            "soil_moisture_percent": soil_moisture_percent,
-            "n": n,
-            "p": p,
-            "k": k,
-            "ph": ph,
-            "rainfall_mm": rainfall_mm,
-            "message": message,
-            "timestamp": firestore.SERVER_TIMESTAMP,
-        }
+    df = sensor_generator.generate(count, profile="run_all")
+    docs = df[["farm_id", *UPLOAD_FIELDS]].rename(columns=UPLOAD_FIELDS)
+    docs["farm_id"] = docs["farm_id"].astype(int)
+    docs["message"] = sensor_messages(df)
+    for i, data in enumerate(docs.to_dict("records")):
+        data["timestamp"] = firestore.SERVER_TIMESTAMP
+        farm_id, message = data["farm_id"], data["message"]
 
         doc_id = f"farm_{farm_id}_{i}"
         db.collection("sensor_data").document(doc_id).set(data)
@@ -1,53 +1,87 @@
-import pandas as pd
-import random
-import time
-from datetime import datetime
-import joblib
+import argparse
+import asyncio
 import os
 
-print("🚜 Starting live sensor simulation... (Press Ctrl+C to stop)")
+from ingest_server import (
+    COMPACT_SECONDS,
+    FLUSH_ROWS,
+    FLUSH_SECONDS,
+    MAX_BATCH_SIZE,
+    MAX_WAIT_MS,
+    IngestServer,
+    print_stats,
+    run_swarm,
+)
+from predict_crops import is_csv
+from utils.forest_engine import load_forest
+from utils.prediction_log import PredictionLog
 
 # -------- PROJECT ROOT --------
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 MODEL_PATH = os.path.join(BASE_DIR, "models", "diverse_crop_model.pkl")
-DATA_PATH = os.path.join(BASE_DIR, "data", "predicted_crops.csv")
-
-# Load trained model
-model = joblib.load(MODEL_PATH)
-
-while True:
-    row = {
-        'timestamp': datetime.now().isoformat(),
-        'farm_id': random.choice([1, 2, 3, 4, 5]),
-        'N': round(random.uniform(0, 140), 2),
-        'P': round(random.uniform(5, 120), 2),
-        'K': round(random.uniform(5, 200), 2),
-        'pH': round(random.uniform(4, 9), 2),
-        'temperature_C': round(random.uniform(15, 45), 2),
-        'humidity_percent': round(random.uniform(30, 95), 2),
-        'soil_moisture_percent': round(random.uniform(10, 90), 2),
-        'rainfall_mm': round(random.uniform(20, 300), 2)
-    }
-
-    df = pd.DataFrame([row])
-
-    df = df.rename(columns={
-        'temperature_C': 'temperature',
-        'humidity_percent': 'humidity',
-        'rainfall_mm': 'rainfall',
-        'pH': 'ph'
-    })
-
-    features = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-    df['recommended_crop'] = model.predict(df[features])
-
-    df[['timestamp', 'farm_id', 'recommended_crop']].to_csv(
-        DATA_PATH,
-        mode='a',
-        header=not os.path.exists(DATA_PATH),
-        index=False
-    )
-
-    print(f"🌱 New data added — Farm {row['farm_id']}: {df['recommended_crop'].iloc[0]}")
-    time.sleep(10)
+
+
+def report_flush(df):
+    top = df["recommended_crop"].value_counts().head(3)
+    print(f"🌱 Wrote {len(df)} predictions — top crops: "
+          + ", ".join(f"{crop} ({n})" for crop, n in top.items()))
+
+
+async def main(args):
+    model = load_forest(args.model)
+    log = PredictionLog(args.sink) if args.log and not is_csv(args.sink) else None
+    server = IngestServer(model, sink=args.sink, max_batch_size=args.batch_size,
+                          max_wait_ms=args.max_wait_ms, flush_rows=args.flush_rows,
+                          flush_seconds=args.flush_seconds, on_flush=report_flush,
+                          log=log, compact_seconds=args.compact_seconds)
+    await server.start(args.host, args.tcp_port, args.http_port)
+    ports = iter(server.ports())
+    if args.tcp_port is not None:
+        print(f"📡 TCP readings (one JSON object per line) on {args.host}:{next(ports)}")
+    if args.http_port is not None:
+        print(f"🌐 HTTP POST /readings and GET /stats on {args.host}:{next(ports)}")
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.stats_every)
+            print_stats(server.stats())
+
+    reporter = asyncio.create_task(report())
+    try:
+        if args.devices:
+            print(f"🚜 Simulating {args.devices} devices, one reading every {args.interval:g}s each")
+            await run_swarm(server.submit, args.devices, args.interval, args.duration)
+        else:
+            await asyncio.Event().wait()  # endpoints only: run until interrupted
+    finally:
+        reporter.cancel()
+        await server.stop()
+        print_stats(server.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live sensor ingestion: micro-batched crop predictions")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--sink", default="predictions", help="Store table name or .csv path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=None)
+    parser.add_argument("--http-port", type=int, default=None)
+    parser.add_argument("--devices", type=int, default=5, help="Simulated devices (0 for endpoints only)")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between readings per device")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run the swarm (default: forever)")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS)
+    parser.add_argument("--flush-seconds", type=float, default=FLUSH_SECONDS)
+    parser.add_argument("--log", action=argparse.BooleanOptionalAction, default=True,
+                        help="Append store sinks through the write-ahead log")
+    parser.add_argument("--compact-seconds", type=float, default=COMPACT_SECONDS)
+    parser.add_argument("--stats-every", type=float, default=30.0)
+    args = parser.parse_args()
+
+    print("🚜 Starting live sensor ingestion... (Press Ctrl+C to stop)")
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -5,6 +5,8 @@ from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
 
+from utils.model_bundle import bundle_path, file_sha256, save_bundle
+
 # File paths
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "Crop_recommendation.csv")
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "crop_recommendation_model.pkl")
@@ -38,6 +40,10 @@ os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
 joblib.dump(model, MODEL_PATH)
 print(f"💾 Model saved to: {MODEL_PATH}")
 
+# Memory-mappable bundle for fast loading in predict_crops / stream_live_sensors
+BUNDLE_PATH = save_bundle(model, bundle_path(MODEL_PATH), training_data_hash=file_sha256(DATA_PATH))
+print(f"💾 Forest bundle saved to: {BUNDLE_PATH}")
+
 # Optional detailed report
 print("\n📊 Classification Report:")
 print(classification_report(y_test, y_pred))
\ No newline at end of file
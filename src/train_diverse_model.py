@@ -5,6 +5,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import os
 
+from utils.model_bundle import bundle_path, file_sha256, save_bundle
+
 print("🌾 Training AI Model on Diverse Crop Dataset...")
 
 # Load dataset
@@ -45,3 +47,7 @@ print(classification_report(y_test, y_pred))
 # Save model
 joblib.dump(model, MODEL_PATH)
 print(f"\n✅ Model saved at: {MODEL_PATH}")
+
+# Memory-mappable bundle for fast loading in predict_crops / stream_live_sensors
+BUNDLE_PATH = save_bundle(model, bundle_path(MODEL_PATH), training_data_hash=file_sha256(DATA_PATH))
+print(f"✅ Forest bundle saved at: {BUNDLE_PATH}")
@@ -1,41 +1,74 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-import pandas as pd
+import argparse
+import hashlib
 import time
 
-print("🌾 Uploading real sensor data to Firestore...")
+import pandas as pd
+
+from utils.firestore_writer import DEFAULT_IN_FLIGHT, MAX_BATCH_SIZE, BatchWriter
 
 # ✅ Firebase key absolute path
-cred = credentials.Certificate(r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\cloud\firebase-key.json")
-
-# Initialize Firebase app (only if not already initialized)
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-# ✅ Load your cleaned sensor data
-csv_path = r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\data\cleaned_sensor_data.csv"
-df = pd.read_csv(csv_path)
-
-print(f"✅ Loaded {len(df)} sensor records from {csv_path}")
-
-# Upload each record to Firestore
-for i, row in df.iterrows():
-    data = {
-        "timestamp": row["timestamp"],
-        "farm_id": int(row["farm_id"]),
-        "N": float(row["N"]),
-        "P": float(row["P"]),
-        "K": float(row["K"]),
-        "pH": float(row["pH"]),
-        "temperature_C": float(row["temperature_C"]),
-        "humidity_percent": float(row["humidity_percent"]),
-        "soil_moisture_percent": float(row["soil_moisture_percent"]),
-        "rainfall_mm": float(row["rainfall_mm"]),
-    }
-    db.collection("sensor_data").add(data)
-    print(f"📤 Uploaded record {i+1}/{len(df)}")
-    time.sleep(0.1)  # small delay to avoid rate limits
-
-print("✅ All sensor data uploaded successfully to Firestore!")
\ No newline at end of file
+FIREBASE_KEY_PATH = r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\cloud\firebase-key.json"
+
+# ✅ Your cleaned sensor data
+CSV_PATH = r"C:\Users\Rithi\OneDrive\Documents\Final_year_project\data\cleaned_sensor_data.csv"
+
+COLLECTION = "sensor_data"
+FLOAT_COLUMNS = ["N", "P", "K", "pH", "temperature_C", "humidity_percent",
+                 "soil_moisture_percent", "rainfall_mm"]
+
+
+def init_db():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    # Initialize Firebase app (only if not already initialized)
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(FIREBASE_KEY_PATH))
+    return firestore.client()
+
+
+def prepare_records(df):
+    """Document ids and payloads, cast column-wise instead of per row"""
+    df = df[["timestamp", "farm_id"] + FLOAT_COLUMNS].astype(
+        {"timestamp": str, "farm_id": "int64", **{c: "float64" for c in FLOAT_COLUMNS}}
+    )
+    # Deterministic ids: re-uploading the same reading overwrites instead of duplicating.
+    # Hashed, because sequential ids put every concurrent batch on one Firestore key range.
+    doc_ids = [hashlib.sha1(f"{farm}|{ts}".encode()).hexdigest()
+               for farm, ts in zip(df["farm_id"].tolist(), df["timestamp"].tolist())]
+    return doc_ids, df.to_dict("records")
+
+
+def upload(db, df, batch_size=MAX_BATCH_SIZE, max_in_flight=DEFAULT_IN_FLIGHT, progress=True):
+    """Bulk upload sensor rows; returns the writer (written / batches / retries)"""
+    doc_ids, records = prepare_records(df)
+    collection = db.collection(COLLECTION)
+    with BatchWriter(db, batch_size=batch_size, max_in_flight=max_in_flight) as writer:
+        for i, (doc_id, data) in enumerate(zip(doc_ids, records), 1):
+            writer.set(collection.document(doc_id), data)
+            if progress and i % 10_000 == 0:
+                print(f"📤 Queued {i}/{len(records)} records ({writer.written} committed)")
+    return writer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload sensor readings to Firestore in batches")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--in-flight", type=int, default=DEFAULT_IN_FLIGHT,
+                        help="Batches committing concurrently")
+    args = parser.parse_args()
+
+    print("🌾 Uploading real sensor data to Firestore...")
+    db = init_db()
+
+    df = pd.read_csv(args.csv)
+    print(f"✅ Loaded {len(df)} sensor records from {args.csv}")
+
+    start = time.perf_counter()
+    writer = upload(db, df, args.batch_size, args.in_flight)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Uploaded {writer.written} records in {writer.batches} batches "
+          f"({writer.written / elapsed:.0f} docs/s, {writer.retries} throttled retries)")
+    print("✅ All sensor data uploaded successfully to Firestore!")
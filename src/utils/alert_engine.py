@@ -0,0 +1,290 @@
+"""Event-driven sensor alerts.
+
+A source pushes document changes (ADDED / MODIFIED / REMOVED) to the
+engine, which evaluates only those documents. An alert for a (farm,
+condition) pair is suppressed while an earlier one is within the cooldown
+window. The cursor (largest timestamp processed, plus the ids processed at
+exactly that timestamp) and the cooldowns are kept in SQLite, so a restart
+resumes from the cursor instead of rescanning history.
+
+Sources implement `subscribe(cursor, on_changes)` and return an object with
+`unsubscribe()`. `FirestoreSource` uses on_snapshot on the real client, the
+emulator or utils.fake_firestore. A listener holds (and on reconnect
+replays) every document its query matches, so the source re-anchors it at
+the latest timestamp every `resubscribe_changes` changes. `ReplaySource`
+feeds local records.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from utils.firestore_sync import decode_cursor, encode_cursor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_STATE_PATH = os.path.join(BASE_DIR, "cache", "alert_state.sqlite")
+
+CURSOR_FIELD = "timestamp"
+DEFAULT_COOLDOWN_SECONDS = 30 * 60
+RESUBSCRIBE_CHANGES = 10_000
+
+# (condition, test, message) — thresholds from the original polling script
+ALERT_RULES = [
+    ("low_moisture", lambda d: d.get("soil_moisture_percent", 0) < 25,
+     "🚨 Low soil moisture! Immediate irrigation needed."),
+    ("high_temperature", lambda d: d.get("temperature_C", 0) > 38,
+     "🔥 High temperature detected! Consider shade or early watering."),
+    ("acidic_soil", lambda d: d.get("pH", 7) < 5.5,
+     "🧪 Soil too acidic! Apply lime to balance pH."),
+    ("alkaline_soil", lambda d: d.get("pH", 7) > 8.5,
+     "🧪 Soil too alkaline! Consider organic compost."),
+]
+
+
+def evaluate(data):
+    """[(condition, message)] raised by one sensor document"""
+    return [(condition, message) for condition, test, message in ALERT_RULES if test(data)]
+
+
+def event_time(data):
+    """Document timestamp as epoch seconds (now if missing or unparseable)"""
+    value = data.get(CURSOR_FIELD)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return datetime.now(timezone.utc).timestamp()
+
+
+def after_cursor(value, cursor):
+    """True when a timestamp sorts after the cursor in Firestore order"""
+    try:
+        return value > cursor
+    except TypeError:
+        # Mixed timestamp types: Firestore orders strings after timestamps
+        return isinstance(value, str)
+
+
+def print_alert(farm_id, messages):
+    print("\n⚠️ ALERT for farm_id:", farm_id)
+    for message in messages:
+        print("   -", message)
+    print("-------------------------")
+
+
+# ---------- DURABLE STATE ----------
+class AlertState:
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cooldowns ("
+                "farm_id TEXT NOT NULL, condition TEXT NOT NULL, last_alert REAL NOT NULL, "
+                "PRIMARY KEY (farm_id, condition))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def load(self):
+        """(cursor value, ids processed at the cursor, {(farm, condition): last alert})"""
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            cooldowns = {(farm, cond): last for farm, cond, last
+                         in conn.execute("SELECT farm_id, condition, last_alert FROM cooldowns")}
+        finally:
+            conn.close()
+        cursor = decode_cursor(meta.get("cursor"))
+        return cursor, set(json.loads(meta.get("cursor_ids", "[]"))), cooldowns
+
+    def save(self, cursor, cursor_ids, alerted):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                    ("cursor", encode_cursor(cursor) if cursor is not None else None),
+                    ("cursor_ids", json.dumps(sorted(cursor_ids))),
+                ])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cooldowns (farm_id, condition, last_alert) VALUES (?, ?, ?)",
+                    [(farm, cond, last) for (farm, cond), last in alerted.items()],
+                )
+        finally:
+            conn.close()
+
+
+# ---------- ENGINE ----------
+class AlertEngine:
+
+    def __init__(self, source, state=None, cooldown_seconds=DEFAULT_COOLDOWN_SECONDS, notify=print_alert):
+        self.source = source
+        self.state = state or AlertState()
+        self.cooldown_seconds = cooldown_seconds
+        self.notify = notify
+        self.cursor, self.cursor_ids, self.cooldowns = self.state.load()
+        self._lock = threading.Lock()
+        self._subscription = None
+        self.processed = 0
+        self.alerts_sent = 0
+        self.suppressed = 0
+
+    def start(self):
+        self._subscription = self.source.subscribe(self.cursor, self.on_changes)
+        return self
+
+    def stop(self):
+        if self._subscription is not None:
+            self._subscription.unsubscribe()
+            self._subscription = None
+
+    def on_changes(self, changes):
+        """Handle [(change type name, doc id, data)] from a source"""
+        with self._lock:
+            alerted = {}
+            for kind, doc_id, data in changes:
+                if kind == "REMOVED" or not data:
+                    continue
+                cursor_value = data.get(CURSOR_FIELD)
+                if kind == "ADDED" and cursor_value == self.cursor and doc_id in self.cursor_ids:
+                    continue  # processed before a restart
+                self._evaluate(doc_id, data, alerted)
+                self._advance(cursor_value, doc_id)
+            self.state.save(self.cursor, self.cursor_ids, alerted)
+
+    def _advance(self, value, doc_id):
+        if value is None:
+            return
+        if value == self.cursor:
+            self.cursor_ids.add(doc_id)
+        elif self.cursor is None or after_cursor(value, self.cursor):
+            self.cursor, self.cursor_ids = value, {doc_id}
+
+    def _evaluate(self, doc_id, data, alerted):
+        self.processed += 1
+        farm_id = data.get("farm_id", "Unknown")
+        at = event_time(data)
+        messages = []
+        for condition, message in evaluate(data):
+            key = (str(farm_id), condition)
+            last = self.cooldowns.get(key)
+            if last is not None and at - last < self.cooldown_seconds:
+                self.suppressed += 1
+                continue
+            self.cooldowns[key] = alerted[key] = at
+            messages.append(message)
+        if messages:
+            self.alerts_sent += len(messages)
+            self.notify(farm_id, messages)
+
+
+# ---------- SOURCES ----------
+class FirestoreSource:
+    """Document changes from a Firestore on_snapshot listener, starting at the cursor"""
+
+    def __init__(self, db, collection="sensor_data", resubscribe_changes=RESUBSCRIBE_CHANGES):
+        self.db = db
+        self.collection = collection
+        self.resubscribe_changes = resubscribe_changes
+
+    def listen(self, cursor, callback):
+        query = self.db.collection(self.collection).order_by(CURSOR_FIELD)
+        if cursor is not None:
+            query = query.start_at({CURSOR_FIELD: cursor})
+        return query.on_snapshot(callback)
+
+    def subscribe(self, cursor, on_changes):
+        return _Listener(self, cursor, on_changes)
+
+
+class _Listener:
+    """on_snapshot listener that is replaced by one starting at the latest
+    timestamp delivered, every `resubscribe_changes` changes.
+
+    The new listener's first snapshot repeats the documents at that
+    timestamp as ADDED; the engine skips those it has processed. The old
+    listener is closed first, and anything it still delivers is dropped.
+    """
+
+    def __init__(self, source, cursor, on_changes):
+        self.source = source
+        self.cursor = cursor
+        self.on_changes = on_changes
+        self.changes = 0
+        self.resubscribes = 0
+        self._lock = threading.RLock()  # the fake client calls back on the subscribing thread
+        self._moving = False
+        self._stopped = False
+        self._generation = 0
+        self._watch = source.listen(cursor, self._callback(0))
+
+    def _callback(self, generation):
+        def callback(docs, changes, read_time):
+            batch = [(c.type.name, c.document.id, c.document.to_dict()) for c in changes]
+            with self._lock:
+                if generation != self._generation or self._stopped:
+                    return
+                self.on_changes(batch)
+                for kind, _, data in batch:
+                    value = data.get(CURSOR_FIELD) if kind != "REMOVED" and data else None
+                    if value is not None and (self.cursor is None or after_cursor(value, self.cursor)):
+                        self.cursor = value
+                self.changes += len(batch)
+                if self.changes < self.source.resubscribe_changes or self._moving:
+                    return
+                self._moving = True
+            # Not from the callback itself: a listener cannot close itself on its own thread
+            threading.Thread(target=self._resubscribe, daemon=True).start()
+        return callback
+
+    def _resubscribe(self):
+        with self._lock:
+            if self._stopped:
+                return
+            self._watch.unsubscribe()
+            self._generation += 1
+            self.changes = 0
+            self.resubscribes += 1
+            self._watch = self.source.listen(self.cursor, self._callback(self._generation))
+            self._moving = False
+
+    def unsubscribe(self):
+        with self._lock:
+            self._stopped = True
+            self._watch.unsubscribe()
+
+
+class _Done:
+    def unsubscribe(self):
+        pass
+
+
+class ReplaySource:
+    """Replays (doc id, data) records as ADDED changes, skipping those before the cursor"""
+
+    def __init__(self, records, batch_size=500):
+        self.records = list(records)
+        self.batch_size = batch_size
+
+    def subscribe(self, cursor, on_changes):
+        pending = []
+        for doc_id, data in self.records:
+            value = data.get(CURSOR_FIELD)
+            if cursor is not None and type(value) is type(cursor) and value < cursor:
+                continue
+            pending.append(("ADDED", doc_id, data))
+            if len(pending) == self.batch_size:
+                on_changes(pending)
+                pending = []
+        if pending:
+            on_changes(pending)
+        return _Done()
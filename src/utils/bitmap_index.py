@@ -0,0 +1,87 @@
+"""Inverted bitmap index over low-cardinality columns (farm_id, recommended_crop).
+
+Each distinct value maps to a packed bitmap (np.packbits, one bit per row)
+of the rows holding it. A multiselect filter becomes an OR over the selected
+values' bitmaps per column and an AND across columns, touching n/8 bytes per
+bitmap instead of comparing every row's value. Columns whose whole domain is
+selected are skipped.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _extend_packed(packed, length, new_bits):
+    """Append bits to a packed bitmap currently holding `length` bits"""
+    used = length % 8
+    if used:
+        head = np.unpackbits(packed[-1:], count=used).astype(bool)
+        new_bits = np.concatenate([head, new_bits])
+        packed = packed[:-1]
+    return np.concatenate([packed, np.packbits(new_bits)])
+
+
+def _codes(series):
+    """(codes, values) with codes indexing values; categorical columns reuse theirs"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, values = pd.factorize(series, sort=True)
+    return codes, values
+
+
+class BitmapIndex:
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.bitmaps = {col: {} for col in self.columns}  # column → value → packed bits
+        self.length = 0
+
+    @classmethod
+    def build(cls, df, columns):
+        index = cls(columns)
+        index.extend(df)
+        return index
+
+    def extend(self, df):
+        """Index rows appended after the ones already indexed"""
+        new_length = self.length + len(df)
+        for col in self.columns:
+            codes, values = _codes(df[col])
+            present = np.bincount(codes[codes >= 0], minlength=len(values)) > 0
+            bitmaps = self.bitmaps[col]
+            extended = set()
+            for code, value in enumerate(values):
+                if not present[code]:
+                    continue
+                old = bitmaps.get(value)
+                if old is None:
+                    old = np.zeros((self.length + 7) // 8, dtype=np.uint8)
+                bitmaps[value] = _extend_packed(old, self.length, codes == code)
+                extended.add(value)
+            # Values absent from the new rows get zero bits
+            zeros = np.zeros(len(df), dtype=bool)
+            for value in bitmaps.keys() - extended:
+                bitmaps[value] = _extend_packed(bitmaps[value], self.length, zeros)
+        self.length = new_length
+        return self
+
+    def values(self, col):
+        return sorted(self.bitmaps[col])
+
+    def _union(self, col, selected):
+        bitmaps = self.bitmaps[col]
+        packed = [bitmaps[v] for v in set(selected) if v in bitmaps]
+        if not packed:
+            return np.zeros((self.length + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(packed) if len(packed) > 1 else packed[0]
+
+    def select(self, selections):
+        """Boolean row mask for {column: selected values} (AND across columns)"""
+        result = None
+        for col, selected in selections.items():
+            if set(self.bitmaps[col]) <= set(selected):
+                continue  # whole domain selected: no constraint
+            bits = self._union(col, selected)
+            result = bits if result is None else result & bits
+        if result is None:
+            return np.ones(self.length, dtype=bool)
+        return np.unpackbits(result, count=self.length).view(bool)
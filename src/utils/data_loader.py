@@ -0,0 +1,146 @@
+"""Cached, incremental loading of a sensor_store table for the dashboard.
+
+The parsed DataFrame is kept between Streamlit reruns. A rerun on unchanged
+data returns it as-is. When the data has only grown (new part files in the
+store, frames appended to the table's write-ahead log, or bytes appended to
+the legacy CSV), just the new rows are read and concatenated. Any other
+change (compaction, overwrite, truncation) triggers a full reload.
+
+Columns named in index_columns are held as categoricals and covered by a
+BitmapIndex, kept in step with the frame, for fast multiselect filtering.
+
+Returned frames are shared between sessions and must not be modified in place.
+"""
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+
+from utils import prediction_log, sensor_store
+from utils.bitmap_index import BitmapIndex
+
+HEAD_BYTES = 4096  # prefix hashed to detect a rewritten CSV
+
+
+class IncrementalTableLoader:
+
+    def __init__(self, name, index_columns=()):
+        self.name = name
+        self.index_columns = list(index_columns)
+        self.columns = sensor_store.TABLES[name]["columns"]
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.df = None
+        self.index = None
+        self.mode = None
+        self.reader = prediction_log.SnapshotReader(self.name)  # store mode: parts + log
+        self.signature = None    # csv mode: (size, mtime_ns)
+        self.offset = 0          # csv mode: bytes parsed (always at a line boundary)
+        self.head_digest = None
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    def load(self):
+        return self.load_indexed()[0]
+
+    def load_indexed(self):
+        """(frame, bitmap index) taken together, so they always describe the same rows"""
+        with self._lock:
+            stored = sensor_store.in_store(self.name) or prediction_log.has_segments(self.name)
+            mode = "store" if stored else "csv"
+            if mode != self.mode:
+                self._reset()
+                self.mode = mode
+            if mode == "store":
+                self._load_store()
+            else:
+                self._load_csv()
+            return self.df, self.index
+
+    # ---------- STORE ----------
+    def _load_store(self):
+        rows, full = self.reader.poll()
+        if full or self.df is None:
+            self._replace(rows)
+        else:
+            self._append(rows)
+
+    # ---------- LEGACY CSV ----------
+    def _head_digest(self, f, length):
+        f.seek(0)
+        return hashlib.blake2b(f.read(min(length, HEAD_BYTES))).hexdigest()
+
+    def _load_csv(self):
+        path = sensor_store.csv_path(self.name)
+        st = os.stat(path)
+        signature = (st.st_size, st.st_mtime_ns)
+        if signature == self.signature and self.df is not None:
+            return
+
+        with open(path, "rb") as f:
+            grown = (
+                self.df is not None and st.st_size >= self.offset
+                and self._head_digest(f, self.offset) == self.head_digest
+            )
+            if grown:
+                f.seek(self.offset)
+                tail = f.read()
+                end = tail.rfind(b"\n") + 1  # ignore a partially written last line
+                if end:
+                    rows = pd.read_csv(io.BytesIO(tail[:end]), header=None, names=self.columns)
+                    self._append(sensor_store.coerce(rows))
+                    self.offset += end
+            else:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                frame = pd.read_csv(io.BytesIO(data[:end]), usecols=lambda c: c in self.columns)
+                self._replace(sensor_store.coerce(frame).sort_values(
+                    "timestamp", kind="stable", ignore_index=True))
+                self.offset = end
+            self.head_digest = self._head_digest(f, self.offset)
+        self.signature = signature
+
+    # ---------- HELPERS ----------
+    def _categorize(self, df, like=None):
+        """Index columns as categoricals (extending `like`'s categories when given)"""
+        for col in self.index_columns:
+            if like is None:
+                df[col] = df[col].astype("category")
+            else:
+                known = like[col].cat.categories
+                values = known.union(pd.Index(df[col].unique()), sort=False)
+                df[col] = pd.Categorical(df[col], categories=values)
+        return df
+
+    def _replace(self, df):
+        self.df = self._categorize(df)
+        if self.index_columns:
+            self.index = BitmapIndex.build(self.df, self.index_columns)
+        self.full_loads += 1
+
+    def _append(self, new_rows):
+        if new_rows.empty:
+            return
+        new_rows = self._categorize(new_rows, like=self.df)
+        old = self.df
+        if self.index_columns:
+            # Concat keeps categoricals only when both sides share categories
+            old = old.assign(**{
+                col: old[col].cat.set_categories(new_rows[col].cat.categories)
+                for col in self.index_columns
+            })
+        df = pd.concat([old, new_rows], ignore_index=True)
+        # Appends are normally newer than everything loaded; re-sort only if not
+        if df["timestamp"].is_monotonic_increasing:
+            if self.index_columns:
+                self.index.extend(new_rows)
+        else:
+            df = df.sort_values("timestamp", kind="stable", ignore_index=True)
+            if self.index_columns:
+                self.index = BitmapIndex.build(df, self.index_columns)
+        self.df = df
+        self.incremental_loads += 1
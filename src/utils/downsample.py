@@ -0,0 +1,80 @@
+"""Bounded-size time series for dashboard charts.
+
+Charts get at most `max_points` points per series whatever the time range:
+LTTB (largest-triangle-three-buckets) keeps the visual shape of a line, and
+min/max buckets keep every spike for area/alert style plots. Both return
+row positions, so the caller keeps all of its columns for the chosen rows.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 1000
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").view(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, max_points):
+    """Indices of the points LTTB keeps; x must be sorted ascending"""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=np.float64)
+
+    # Inner points 1..n-2 split into max_points-2 buckets; first and last always kept
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        cx, cy = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_buckets(y, max_points):
+    """Indices of the min and max of equal-count buckets, plus both end points"""
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = np.arange(n) * ((max_points - 2) // 2) // n
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+
+
+def _keep(x, y, max_points, method):
+    if method == "lttb":
+        return lttb(x, y, max_points)
+    if method == "minmax":
+        return minmax_buckets(y, max_points)
+    raise ValueError(f"❌ Unknown downsampling method: {method}")
+
+
+def downsample_frame(df, x, y, max_points=DEFAULT_MAX_POINTS, method="lttb", by=None):
+    """Rows of df to plot y against x, at most max_points per `by` series"""
+    df = df.dropna(subset=[x, y]).sort_values(x, kind="stable")
+    if by is not None:
+        parts = [downsample_frame(part, x, y, max_points, method)
+                 for _, part in df.groupby(by, sort=False, observed=True)]
+        return pd.concat(parts) if parts else df
+
+    return df.iloc[_keep(df[x].to_numpy(), df[y].to_numpy(), max_points, method)]
+
+
+def downsample_series(series, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """Series indexed by x (e.g. daily counts) reduced to at most max_points"""
+    series = series.dropna().sort_index()
+    x = series.index if pd.api.types.is_numeric_dtype(series.index) else pd.to_datetime(series.index)
+    return series.iloc[_keep(x.to_numpy(), series.to_numpy(), max_points, method)]
@@ -0,0 +1,452 @@
+"""In-memory stand-in for the parts of the Firestore client this project uses.
+
+`FakeFirestore()` can be passed wherever code expects `firestore.client()`:
+collections, documents, batches, queries (where / order_by / limit / cursors
+/ count), on_snapshot listeners and SERVER_TIMESTAMP behave like Firestore, including its
+cross-type ordering and the 500-writes-per-batch limit. `reads` and `writes`
+count billed operations, so tests and benchmarks can check how much a sync
+or upload would cost against the real service.
+"""
+import copy
+import heapq
+import random
+import string
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+
+MAX_BATCH_WRITES = 500
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+def _type_rank(value):
+    """Firestore orders values of different types by type first"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def order_key(value):
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (list, tuple)):
+        return (_type_rank(value), tuple(order_key(v) for v in value))
+    if isinstance(value, dict):
+        return (_type_rank(value), tuple(sorted((k, order_key(v)) for k, v in value.items())))
+    return (_type_rank(value), value)
+
+
+def _new_id():
+    return "".join(random.choices(string.ascii_letters + string.digits, k=20))
+
+
+class _Desc:
+    """Wraps an order key so sorted() puts it in descending order"""
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+# ---------- DOCUMENTS ----------
+class DocumentSnapshot:
+
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return copy.deepcopy(self._data[field])
+
+
+class DocumentReference:
+
+    def __init__(self, client, collection, doc_id):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def get(self):
+        with self._client._lock:
+            self._client.reads += 1
+            data, update_time = self._client._docs(self._collection).get(self.id, (None, None))
+            return DocumentSnapshot(self, data, update_time)
+
+    def set(self, data, merge=False):
+        self._client._commit([("set", self, data, merge)])
+
+    def update(self, data):
+        self._client._commit([("update", self, data, False)])
+
+    def delete(self):
+        self._client._commit([("delete", self, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+class WriteBatch:
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._ops.append(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference, None, False))
+
+    def __len__(self):
+        return len(self._ops)
+
+    def commit(self):
+        ops, self._ops = self._ops, []
+        return self._client._commit(ops)
+
+
+# ---------- QUERIES ----------
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _matches(data, field, op, value):
+    if field not in data:
+        return False
+    actual = data[field]
+    if op == "in":
+        return any(order_key(actual) == order_key(v) for v in value)
+    if op == "not-in":
+        return all(order_key(actual) != order_key(v) for v in value)
+    if op == "array-contains":
+        return isinstance(actual, list) and any(order_key(a) == order_key(value) for a in actual)
+    # Range/equality filters only match values of the same type
+    if _type_rank(actual) != _type_rank(value):
+        return op == "!="
+    return _OPERATORS[op](order_key(actual), order_key(value))
+
+
+class Query:
+
+    def __init__(self, client, collection, filters=(), orders=(), limit=None,
+                 start=None, end=None, projection=None):
+        self._client = client
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._start = start  # (values, inclusive)
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     start=self._start, end=self._end, projection=self._projection)
+        state.update(changes)
+        return Query(self._client, self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def _cursor(self, values):
+        """Cursor values as (order field values..., doc id or None)"""
+        if isinstance(values, DocumentSnapshot):
+            return tuple(values._data.get(f) if f != "__name__" else values.id
+                         for f, _ in self._orders), values.id
+        if isinstance(values, dict):
+            return tuple(values[f] for f, _ in self._orders if f in values), None
+        return tuple(values), None
+
+    def start_at(self, values):
+        return self._copy(start=(self._cursor(values), True))
+
+    def start_after(self, values):
+        return self._copy(start=(self._cursor(values), False))
+
+    def end_at(self, values):
+        return self._copy(end=(self._cursor(values), True))
+
+    def end_before(self, values):
+        return self._copy(end=(self._cursor(values), False))
+
+    def _sort_key(self, doc_id, data):
+        key = []
+        for field, direction in self._orders:
+            value = doc_id if field == "__name__" else data[field]
+            key.append(order_key(value) if direction == ASCENDING else _Desc(order_key(value)))
+        # Ties are broken by document id, in the direction of the last ordering
+        last_desc = self._orders and self._orders[-1][1] == DESCENDING
+        key.append(_Desc(doc_id) if last_desc else doc_id)
+        return key
+
+    def _compare_cursor(self, doc_id, data, cursor):
+        """-1 / 0 / 1: document position relative to a cursor"""
+        values, cursor_id = cursor
+        for (field, direction), value in zip(self._orders, values):
+            actual = order_key(doc_id if field == "__name__" else data[field])
+            expected = order_key(value)
+            if actual != expected:
+                smaller = actual < expected
+                if direction == DESCENDING:
+                    smaller = not smaller
+                return -1 if smaller else 1
+        if cursor_id is not None and len(values) == len(self._orders):
+            if doc_id != cursor_id:
+                smaller = doc_id < cursor_id
+                if self._orders and self._orders[-1][1] == DESCENDING:
+                    smaller = not smaller
+                return -1 if smaller else 1
+        return 0
+
+    def _results(self):
+        with self._client._lock:
+            docs = self._client._docs(self._collection)
+            rows = []
+            for doc_id, (data, update_time) in docs.items():
+                if any(f != "__name__" and f not in data for f, _ in self._orders):
+                    continue  # order_by excludes documents without the field
+                if not all(_matches(data, f, op, v) for f, op, v in self._filters):
+                    continue
+                if self._start is not None:
+                    pos = self._compare_cursor(doc_id, data, self._start[0])
+                    if pos < 0 or (pos == 0 and not self._start[1]):
+                        continue
+                if self._end is not None:
+                    pos = self._compare_cursor(doc_id, data, self._end[0])
+                    if pos > 0 or (pos == 0 and not self._end[1]):
+                        continue
+                rows.append((doc_id, data, update_time))
+            key = lambda row: self._sort_key(row[0], row[1])  # noqa: E731
+            if self._limit is not None:
+                rows = heapq.nsmallest(self._limit, rows, key=key)
+            else:
+                rows.sort(key=key)
+            return [(doc_id, copy.deepcopy(data), update_time) for doc_id, data, update_time in rows]
+
+    def stream(self):
+        rows = self._results()
+        with self._client._lock:
+            self._client.reads += max(len(rows), 1)  # an empty query still costs one read
+        for doc_id, data, update_time in rows:
+            if self._projection is not None:
+                data = {k: v for k, v in data.items() if k in self._projection}
+            ref = DocumentReference(self._client, self._collection, doc_id)
+            yield DocumentSnapshot(ref, data, update_time)
+
+    def get(self):
+        return list(self.stream())
+
+    def count(self, alias="count"):
+        return _CountQuery(self, alias)
+
+    def on_snapshot(self, callback):
+        """Listen for changes: callback(docs, changes, read_time), first with every match"""
+        watch = Watch(self, callback)
+        with self._client._lock:
+            self._client._watches.append(watch)
+        watch.refresh()
+        return watch
+
+
+class Watch:
+    """A registered on_snapshot listener; changes are delivered after each commit"""
+
+    def __init__(self, query, callback):
+        self._query = query
+        self._callback = callback
+        self._seen = {}  # doc id → data last delivered
+        self._delivered = False
+        self.active = True
+
+    def refresh(self):
+        if not self.active:
+            return
+        rows = self._query._results()
+        docs, changes = [], []
+        current = {}
+        for index, (doc_id, data, update_time) in enumerate(rows):
+            ref = DocumentReference(self._query._client, self._query._collection, doc_id)
+            snapshot = DocumentSnapshot(ref, data, update_time)
+            docs.append(snapshot)
+            current[doc_id] = data
+            if doc_id not in self._seen:
+                changes.append(DocumentChange(ChangeType.ADDED, snapshot, -1, index))
+            elif self._seen[doc_id] != data:
+                changes.append(DocumentChange(ChangeType.MODIFIED, snapshot, index, index))
+        for doc_id, data in self._seen.items():
+            if doc_id not in current:
+                ref = DocumentReference(self._query._client, self._query._collection, doc_id)
+                changes.append(DocumentChange(ChangeType.REMOVED, DocumentSnapshot(ref, data), -1, -1))
+
+        self._seen = current
+        if changes or not self._delivered:  # the first snapshot is always delivered
+            self._delivered = True
+            with self._query._client._lock:
+                self._query._client.reads += len([c for c in changes if c.type != ChangeType.REMOVED])
+            self._callback(docs, changes, datetime.now(timezone.utc))
+
+    def unsubscribe(self):
+        self.active = False
+        with self._query._client._lock:
+            if self in self._query._client._watches:
+                self._query._client._watches.remove(self)
+
+
+class _CountQuery:
+
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias
+
+    def get(self):
+        n = len(self._query._results())
+        with self._query._client._lock:
+            self._query._client.reads += max(1, -(-n // 1000))  # one read per 1000 entries
+        return [[SimpleNamespace(alias=self._alias, value=n)]]
+
+
+class CollectionReference(Query):
+
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, self.id, document_id or _new_id())
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.set(document_data)
+        return ref.get().update_time, ref
+
+    def list_documents(self):
+        with self._client._lock:
+            ids = list(self._client._docs(self.id))
+        return [DocumentReference(self._client, self.id, doc_id) for doc_id in ids]
+
+
+# ---------- CLIENT ----------
+class FakeFirestore:
+    """commit_latency simulates the round trip of each commit (seconds);
+    max_writes_per_second makes commits over that rate fail with
+    ResourceExhausted, like Firestore throttling a hot collection."""
+
+    def __init__(self, commit_latency=0.0, max_writes_per_second=None):
+        self._collections = {}
+        self._lock = threading.RLock()
+        self._watches = []
+        self.commit_latency = commit_latency
+        self.max_writes_per_second = max_writes_per_second
+        self._recent_writes = deque()  # (time, count) within the last second
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.throttled = 0
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def _docs(self, collection):
+        return self._collections.setdefault(collection, {})
+
+    def _resolve(self, data, now):
+        return {k: (now if v is SERVER_TIMESTAMP else copy.deepcopy(v)) for k, v in data.items()}
+
+    def _throttle(self, count):
+        if self.max_writes_per_second is None:
+            return
+        now = time.monotonic()
+        while self._recent_writes and now - self._recent_writes[0][0] > 1.0:
+            self._recent_writes.popleft()
+        if sum(n for _, n in self._recent_writes) + count > self.max_writes_per_second:
+            self.throttled += 1
+            raise exceptions.ResourceExhausted("Write rate limit exceeded")
+        self._recent_writes.append((now, count))
+
+    def _commit(self, ops):
+        if len(ops) > MAX_BATCH_WRITES:
+            raise exceptions.InvalidArgument(
+                f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        if self.commit_latency:
+            time.sleep(self.commit_latency)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self._throttle(len(ops))
+            # Validate first so a failing batch applies nothing (atomic commit)
+            for kind, ref, _, _ in ops:
+                if kind == "update" and ref.id not in self._docs(ref._collection):
+                    raise exceptions.NotFound(f"No document to update: {ref.path}")
+            for kind, ref, data, merge in ops:
+                docs = self._docs(ref._collection)
+                if kind == "delete":
+                    docs.pop(ref.id, None)
+                    continue
+                data = self._resolve(data, now)
+                if kind == "update" or merge:
+                    current = dict(docs.get(ref.id, ({}, None))[0])
+                    current.update(data)
+                    data = current
+                docs[ref.id] = (data, now)
+            self.writes += len(ops)
+            self.commits += 1
+            watches = list(self._watches)
+        for watch in watches:
+            watch.refresh()
+        return [SimpleNamespace(update_time=now) for _ in ops]
@@ -0,0 +1,238 @@
+"""Local snapshot of a Firestore collection, kept up to date incrementally.
+
+Documents are mirrored into SQLite (one JSON row per document id) together
+with cursors: the largest `timestamp` value seen. Each `sync()` only asks
+Firestore for documents ordered by timestamp from that cursor onwards, in
+pages, so a refresh costs reads proportional to what is new rather than to
+the whole history. Documents at exactly the cursor value are re-read and
+upserted by id, so writes sharing a timestamp are never skipped.
+
+Timestamps are stored both as Firestore timestamps and as ISO strings, and
+Firestore orders every timestamp before every string, so a single cursor
+would skip new documents of the other form. There is one cursor per stored
+form; a range filter only matches values of its own type.
+
+Incremental queries cannot see deletions or documents without a timestamp.
+A cheap count aggregation detects when the collection and the snapshot
+disagree, and only then is a full resync done. A periodic full resync every
+`full_sync_seconds` can be turned on as well.
+
+Works against the real client, the Firestore emulator, or
+utils.fake_firestore.FakeFirestore.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from google.cloud.firestore_v1 import Query
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "cache")
+
+CURSOR_FIELD = "timestamp"
+PAGE_SIZE = 1000
+FULL_SYNC_SECONDS = None  # opt-in periodic full resync; the count check catches drift
+
+# Lowest value of each stored timestamp form: the starting point of its cursor
+CURSOR_FORMS = {"datetime": datetime(1, 1, 1, tzinfo=timezone.utc), "string": ""}
+
+
+def snapshot_path(collection):
+    return os.path.join(SNAPSHOT_DIR, f"firestore_{collection}.sqlite")
+
+
+# ---------- VALUE ENCODING ----------
+def _encode_value(value):
+    """JSON encoding for Firestore values (datetimes become ISO strings)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported Firestore value: {type(value).__name__}")
+
+
+def encode_cursor(value):
+    # Keep the type: Firestore orders timestamps and strings differently
+    if isinstance(value, datetime):
+        return json.dumps({"datetime": value.isoformat()})
+    return json.dumps({"value": value})
+
+
+def decode_cursor(raw):
+    if raw is None:
+        return None
+    cursor = json.loads(raw)
+    if "datetime" in cursor:
+        return datetime.fromisoformat(cursor["datetime"])
+    return cursor["value"]
+
+
+class FirestoreSnapshot:
+
+    def __init__(self, db, collection="sensor_data", path=None, page_size=PAGE_SIZE,
+                 full_sync_seconds=FULL_SYNC_SECONDS, verify_count=True):
+        self.db = db
+        self.collection = collection
+        self.path = path or snapshot_path(collection)
+        self.page_size = page_size
+        self.full_sync_seconds = full_sync_seconds
+        self.verify_count = verify_count
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_version = None
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    # ---------- META ----------
+    def _meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def version(self):
+        """Changes whenever a sync modified the snapshot (use as a cache key)"""
+        conn = self._connect()
+        try:
+            return int(self._meta(conn, "version") or 0)
+        finally:
+            conn.close()
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        finally:
+            conn.close()
+
+    # ---------- SYNC ----------
+    def _pages(self, query):
+        """Stream a query in pages of page_size, resuming after the last document"""
+        last = None
+        while True:
+            page_query = query.limit(self.page_size)
+            if last is not None:
+                page_query = page_query.start_after(last)
+            page = list(page_query.stream())
+            yield from page
+            if len(page) < self.page_size:
+                return
+            last = page[-1]
+
+    def _store(self, conn, docs):
+        """Upsert documents; returns (fetched, changed, last document)"""
+        before = conn.total_changes
+        fetched, last = 0, None
+        for doc in docs:
+            conn.execute(
+                "INSERT INTO docs (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data WHERE data != excluded.data",
+                (doc.id, json.dumps(doc.to_dict(), default=_encode_value)),
+            )
+            fetched, last = fetched + 1, doc
+        return fetched, conn.total_changes - before, last
+
+    def _form_query(self, form, cursor=None):
+        """Documents whose timestamp has the given stored form, from cursor onwards"""
+        lowest = CURSOR_FORMS[form] if cursor is None else cursor
+        return self.db.collection(self.collection).where(CURSOR_FIELD, ">=", lowest)
+
+    def _latest_cursor(self, form):
+        query = self._form_query(form).order_by(CURSOR_FIELD, direction=Query.DESCENDING).limit(1)
+        latest = list(query.stream())
+        return latest[0].get(CURSOR_FIELD) if latest else None
+
+    def _remote_count(self):
+        result = self.db.collection(self.collection).count().get()
+        return int(result[0][0].value)
+
+    def sync(self, full=False):
+        """Bring the snapshot up to date; returns a small report dict"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursors = {form: decode_cursor(self._meta(conn, f"cursor:{form}")) for form in CURSOR_FORMS}
+                last_full = self._meta(conn, "last_full_sync")
+                # A snapshot from before per-form cursors still has the single "cursor"
+                full = full or last_full is None or self._meta(conn, "cursor") is not None
+                if self.full_sync_seconds is not None and not full:
+                    full = time.time() - float(last_full) > self.full_sync_seconds
+
+                started = time.perf_counter()
+                if full:
+                    report = self._full_sync(conn)
+                else:
+                    report = self._incremental_sync(conn, cursors)
+                    if self.verify_count and self._remote_count() != report["total"]:
+                        report = self._full_sync(conn)  # deletions or untimestamped docs
+                report["seconds"] = time.perf_counter() - started
+                return report
+            finally:
+                conn.close()
+
+    def _incremental_sync(self, conn, cursors):
+        fetched = changed = 0
+        with conn:
+            for form, cursor in cursors.items():
+                query = self._form_query(form, cursor).order_by(CURSOR_FIELD)
+                form_fetched, form_changed, last = self._store(conn, self._pages(query))
+                fetched, changed = fetched + form_fetched, changed + form_changed
+                if form_changed:
+                    # Ordered by timestamp, so the last document carries the new cursor
+                    self._set_meta(conn, f"cursor:{form}", encode_cursor(last.get(CURSOR_FIELD)))
+            if changed:
+                self._bump_version(conn)
+            total = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        return {"mode": "incremental", "fetched": fetched, "changed": changed, "total": total}
+
+    def _full_sync(self, conn):
+        docs = self._pages(self.db.collection(self.collection).order_by("__name__"))
+        with conn:
+            conn.execute("DELETE FROM docs")
+            fetched, _, _ = self._store(conn, docs)
+            for form in CURSOR_FORMS:
+                cursor = self._latest_cursor(form)
+                self._set_meta(conn, f"cursor:{form}", encode_cursor(cursor) if cursor is not None else None)
+            conn.execute("DELETE FROM meta WHERE key = 'cursor'")
+            self._set_meta(conn, "last_full_sync", str(time.time()))
+            self._bump_version(conn)
+        return {"mode": "full", "fetched": fetched, "changed": fetched, "total": fetched}
+
+    def _bump_version(self, conn):
+        self._set_meta(conn, "version", str(int(self._meta(conn, "version") or 0) + 1))
+
+    # ---------- READ ----------
+    def frame(self):
+        """All mirrored documents as a DataFrame (cached until the next change)"""
+        version = self.version
+        if self._frame is None or version != self._frame_version:
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT data FROM docs").fetchall()
+            finally:
+                conn.close()
+            self._frame = pd.DataFrame([json.loads(data) for (data,) in rows])
+            self._frame_version = version
+        return self._frame
+
+    def distinct(self, field):
+        """Sorted distinct values of a top-level field across the snapshot"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT DISTINCT json_extract(data, ?) FROM docs WHERE json_extract(data, ?) IS NOT NULL",
+                (f"$.{field}", f"$.{field}"),
+            ).fetchall()
+        finally:
+            conn.close()
+        return sorted(value for (value,) in rows)
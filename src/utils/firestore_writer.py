@@ -0,0 +1,122 @@
+"""Batched, concurrent Firestore writes.
+
+`BatchWriter` groups set/delete operations into batches of at most 500 (the
+Firestore per-commit limit) and commits up to `max_in_flight` batches at a
+time on a thread pool. The next batch waits for a free slot, so memory stays
+bounded. A commit that fails with a throttling or transient error is retried
+with exponential backoff and jitter. Any other error is raised by
+`flush()` / `close()`.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.api_core import exceptions
+
+MAX_BATCH_SIZE = 500
+DEFAULT_IN_FLIGHT = 8
+MAX_RETRIES = 8
+BASE_DELAY = 0.1
+MAX_DELAY = 10.0
+
+RETRYABLE = (
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.Aborted,
+)
+
+
+class BatchWriter:
+
+    def __init__(self, db, batch_size=MAX_BATCH_SIZE, max_in_flight=DEFAULT_IN_FLIGHT,
+                 max_retries=MAX_RETRIES, base_delay=BASE_DELAY):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"❌ batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        self.db = db
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._pool = ThreadPoolExecutor(max_in_flight)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pending = []
+        self._futures = []
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+
+    # ---------- QUEUEING ----------
+    def set(self, reference, data):
+        self._add(("set", reference, data))
+
+    def delete(self, reference):
+        self._add(("delete", reference, None))
+
+    def _add(self, op):
+        self._pending.append(op)
+        if len(self._pending) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        ops, self._pending = self._pending, []
+        if not ops:
+            return
+        self._slots.acquire()  # blocks while max_in_flight batches are committing
+        future = self._pool.submit(self._commit, ops)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        self._raise_failures(done_only=True)
+
+    # ---------- COMMIT ----------
+    def _commit(self, ops):
+        for attempt in range(self.max_retries + 1):
+            batch = self.db.batch()
+            for kind, reference, data in ops:
+                if kind == "set":
+                    batch.set(reference, data)
+                else:
+                    batch.delete(reference)
+            try:
+                batch.commit()
+                break
+            except RETRYABLE:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                delay = min(MAX_DELAY, self.base_delay * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+        with self._lock:
+            self.written += len(ops)
+            self.batches += 1
+
+    def _raise_failures(self, done_only=False):
+        remaining = []
+        for future in self._futures:
+            if done_only and not future.done():
+                remaining.append(future)
+                continue
+            future.result()  # re-raises a failed commit
+        self._futures = remaining
+
+    def flush(self):
+        """Commit everything queued so far and wait for it"""
+        self._submit()
+        self._raise_failures()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True)
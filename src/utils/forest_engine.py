@@ -0,0 +1,123 @@
+"""Vectorized inference for fitted sklearn RandomForestClassifier models.
+
+The forest is flattened into contiguous NumPy arrays (node features,
+thresholds, children, leaf class probabilities). All trees are walked at
+once for a chunk of rows, then leaf probabilities are accumulated tree by
+tree in the same order and dtype sklearn uses, so `predict` matches
+`model.predict` bit for bit.
+"""
+import os
+
+import joblib
+import numpy as np
+
+# "flat" (default) uses FlatForest; "sklearn" keeps the unpickled estimator
+ENGINE = os.environ.get("CROP_ENGINE", "flat")
+
+TRAVERSE_CHUNK = 1024  # rows walked together; keeps the (rows x trees) node matrix in cache
+ACCUMULATE_CHUNK = 16384  # rows whose leaf probabilities are summed per tree in one pass
+
+
+class FlatForest:
+
+    def __init__(self, feature, threshold, children, leaf_proba, roots, max_depth,
+                 classes, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        # (n_nodes, 2) of [right, left] so that `x <= threshold` indexes the child directly
+        self.children = children
+        self._children_flat = children.ravel()
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        features, thresholds, children, probas, roots = [], [], [], [], []
+        offset = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves so extra traversal steps are no-ops
+            left = np.where(is_leaf, np.arange(n), tree.children_left) + offset
+            right = np.where(is_leaf, np.arange(n), tree.children_right) + offset
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold)
+            children.append(np.column_stack([right, left]).astype(np.intp))
+            probas.append(value / normalizer)
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            leaf_proba=np.concatenate(probas),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max(est.tree_.max_depth for est in model.estimators_),
+            classes=np.asarray(model.classes_),
+            feature_names=getattr(model, "feature_names_in_", None),
+        )
+
+    def _as_matrix(self, X):
+        if hasattr(X, "columns") and self.feature_names_in_ is not None:
+            X = X[list(self.feature_names_in_)]
+        # sklearn trees compare float32 inputs against float64 thresholds;
+        # widening once up front keeps the comparisons exact and single-dtype
+        return np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+
+    def _leaves(self, X):
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = flat_x[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self._children_flat[(nodes << 1) | go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        X = self._as_matrix(X)
+        proba = np.zeros((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], ACCUMULATE_CHUNK):
+            block = X[start:start + ACCUMULATE_CHUNK]
+            leaves = np.concatenate([
+                self._leaves(block[i:i + TRAVERSE_CHUNK])
+                for i in range(0, block.shape[0], TRAVERSE_CHUNK)
+            ])
+            out = proba[start:start + ACCUMULATE_CHUNK]
+            for t in range(self.n_trees):
+                out += self.leaf_proba[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def load_forest(path, engine=ENGINE):
+    """Load a crop RandomForestClassifier, as a FlatForest unless engine == "sklearn".
+
+    A .forest bundle next to the pickle (see model_bundle.py) is memory-mapped
+    instead of unpickling, as long as it is not older than the pickle.
+    """
+    if engine == "flat":
+        from utils.model_bundle import bundle_path, load_bundle
+
+        bundle = bundle_path(path)
+        if os.path.exists(bundle) and (
+                not os.path.exists(path) or os.path.getmtime(bundle) >= os.path.getmtime(path)):
+            return load_bundle(bundle)
+        return FlatForest.from_sklearn(joblib.load(path))
+    return joblib.load(path)
@@ -0,0 +1,74 @@
+"""Allocation-light image preprocessing for the plant disease model.
+
+Images are decoded (with JPEG draft mode for large camera photos), resized to
+224x224 and written straight into a reusable float32 batch buffer, scaled to
+[0, 1] in place.
+
+Tolerance vs. the original ``np.array(image.resize((224, 224))) / 255.0``:
+without draft mode the inputs match to within float32 rounding (< 1e-7);
+with draft mode, JPEGs larger than 448 px are decoded at 1/2-1/8 scale first,
+so individual pixels may differ by a few grey levels (mean abs diff ~1e-2).
+Top-1 predictions should be checked with export_disease_model.py's parity
+report before relying on draft mode for a new model.
+"""
+import threading
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = (224, 224)
+SCALE = np.float32(1.0 / 255.0)
+
+
+# ---------- DECODE + RESIZE ----------
+def load_image(source, size=IMG_SIZE, draft=True):
+    """Return a (h, w, 3) uint8 array from a PIL image, path or file object."""
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+
+    if draft and image.format == "JPEG":
+        # Let libjpeg decode at reduced scale; no-op once the image is loaded
+        image.draft("RGB", size)
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.BICUBIC)
+    return np.asarray(image, dtype=np.uint8)
+
+
+# ---------- BATCH BUFFER ----------
+class BatchBuffer:
+    """Preallocated float32 (capacity, h, w, 3) buffer, grown only when needed."""
+
+    def __init__(self, capacity=16, size=IMG_SIZE):
+        self.size = size
+        self.data = np.empty((capacity, size[1], size[0], 3), dtype=np.float32)
+
+    def fill(self, images, draft=True):
+        """Write images (PIL/paths/uint8 arrays) into the buffer; returns a view of the filled rows.
+
+        The view is overwritten by the next fill() on the same buffer.
+        """
+        n = len(images)
+        if n > self.data.shape[0]:
+            self.data = np.empty((n,) + self.data.shape[1:], dtype=np.float32)
+
+        for i, image in enumerate(images):
+            pixels = image if isinstance(image, np.ndarray) else load_image(image, self.size, draft)
+            np.multiply(pixels, SCALE, out=self.data[i], casting="unsafe")
+        return self.data[:n]
+
+
+_local = threading.local()
+
+
+def preprocess_batch(images, draft=True):
+    """Preprocess a list of images into this thread's reusable float32 buffer."""
+    if not hasattr(_local, "buffer"):
+        _local.buffer = BatchBuffer()
+    return _local.buffer.fill(images, draft)
+
+
+def preprocess_image(image, draft=True):
+    """Single-image convenience wrapper; returns a (1, h, w, 3) view."""
+    return preprocess_batch([image], draft)
@@ -0,0 +1,111 @@
+"""Memory-mappable single-file format for the crop recommendation forests.
+
+Layout::
+
+    b"CROPFRST" | uint64 header length | JSON header | padding | raw arrays
+
+The JSON header holds the feature order, class labels, a hash of the
+training CSV and an offset/dtype/shape entry per array. Arrays are stored
+uncompressed and 64-byte aligned, so `load_bundle` maps them straight from
+the page cache without unpickling — worker processes share one copy.
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from utils.forest_engine import FlatForest
+
+MAGIC = b"CROPFRST"
+FORMAT_VERSION = 1
+ALIGN = 64
+BUNDLE_EXTENSION = ".forest"
+
+ARRAY_FIELDS = ["feature", "threshold", "children", "leaf_proba", "roots"]
+
+
+def bundle_path(pickle_path):
+    """models/x.pkl → models/x.forest"""
+    return os.path.splitext(pickle_path)[0] + BUNDLE_EXTENSION
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ---------- SAVE ----------
+def save_bundle(model, path, training_data_hash=None):
+    """Write a fitted RandomForestClassifier (or FlatForest) as a .forest bundle."""
+    flat = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+    arrays = {name: np.ascontiguousarray(getattr(flat, name)) for name in ARRAY_FIELDS}
+
+    manifest, offset = {}, 0
+    for name, arr in arrays.items():
+        offset = _aligned(offset)
+        manifest[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        offset += arr.nbytes
+
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "feature_names": None if flat.feature_names_in_ is None else list(flat.feature_names_in_),
+        "classes": flat.classes_.tolist(),
+        "max_depth": int(flat.max_depth),
+        "training_data_sha256": training_data_hash,
+        "arrays": manifest,
+    }).encode("utf-8")
+
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + manifest[name]["offset"])
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+# ---------- LOAD ----------
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"❌ Not a crop forest bundle: {path}")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"❌ Unsupported bundle version {header['format_version']} in {path}")
+    header["data_start"] = _aligned(len(MAGIC) + 8 + header_len)
+    return header
+
+
+def load_bundle(path):
+    """Map a .forest bundle into a FlatForest without copying the tree arrays."""
+    header = read_header(path)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = header["data_start"] + spec["offset"]
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    feature_names = header["feature_names"]
+    return FlatForest(
+        max_depth=header["max_depth"],
+        classes=np.array(header["classes"], dtype=object),
+        feature_names=None if feature_names is None else np.array(feature_names, dtype=object),
+        **arrays,
+    )
@@ -0,0 +1,41 @@
+"""Paged table views for the Streamlit dashboards.
+
+Only the rows of the visible page are handed to st.dataframe, so a rerun
+serializes one page to the browser instead of the whole history.
+"""
+import math
+
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 100
+
+
+def page_count(n_rows, page_size):
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def page_bounds(n_rows, page, page_size):
+    """[start, stop) row positions of a 1-based page, clamped to the table"""
+    page = min(max(1, page), page_count(n_rows, page_size))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows)
+
+
+def paginate(df, key, page_label="Page", size_label="Rows per page"):
+    """Page selector widgets; returns the visible slice of df"""
+    col_page, col_size, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox(
+        size_label, PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+        key=f"{key}_page_size",
+    )
+    pages = page_count(len(df), page_size)
+
+    # Keep the remembered page valid when filters shrink the table
+    page_key = f"{key}_page"
+    st.session_state[page_key] = min(st.session_state.get(page_key, 1), pages)
+    page = col_page.number_input(page_label, min_value=1, max_value=pages, step=1, key=page_key)
+
+    start, stop = page_bounds(len(df), int(page), page_size)
+    col_info.caption(f"{start + 1 if stop else 0}–{stop} / {len(df)}")
+    return df.iloc[start:stop]
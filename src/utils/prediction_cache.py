@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_DISK_PATH = os.path.join(BASE_DIR, "cache", "disease_predictions.sqlite")
+
+
+def image_key(pixels):
+    """Content hash of the decoded, resized uint8 pixels fed to the model"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(pixels.shape).encode())
+    digest.update(pixels.tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """LRU of (label, confidence, info) keyed by image hash, with optional SQLite tier.
+
+    `version_fn` returns the current model version; whenever it changes the
+    in-memory entries are dropped and disk entries from older versions are
+    ignored, so retraining the model invalidates the cache automatically.
+    """
+
+    def __init__(self, version_fn, max_entries=512, disk_path=None):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS predictions ("
+                    "key TEXT NOT NULL, version TEXT NOT NULL, result TEXT NOT NULL, "
+                    "PRIMARY KEY (key, version))"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.disk_path, timeout=10)
+
+    def _current_version(self):
+        version = self.version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        return version
+
+    def version(self):
+        """Current model version (drops the in-memory entries when it changed)"""
+        with self._lock:
+            return self._current_version()
+
+    def get(self, pixels):
+        key = image_key(pixels)
+        with self._lock:
+            version = self._current_version()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.disk_path:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT result FROM predictions WHERE key = ? AND version = ?",
+                    (key, version),
+                ).fetchone()
+            finally:
+                conn.close()
+            if row:
+                result = tuple(json.loads(row[0]))
+                self._remember(key, result)
+                with self._lock:
+                    self.hits += 1
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, pixels, result, version=None):
+        """Store a result; with `version` (taken before predicting) a result
+        from a model that has since been replaced is not stored"""
+        key = image_key(pixels)
+        with self._lock:
+            if version is not None and version != self._current_version():
+                return
+        self._remember(key, result)
+
+        if self.disk_path:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO predictions (key, version, result) VALUES (?, ?, ?)",
+                        (key, self._version, json.dumps(list(result))),
+                    )
+            finally:
+                conn.close()
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._current_version()
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
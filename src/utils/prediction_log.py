@@ -0,0 +1,497 @@
+"""Segmented write-ahead log for crop predictions.
+
+Live writers append to the log instead of creating a Parquet part file per
+flush. The log lives in data/store/<table>_log/ as numbered segment files:
+
+  0000000007.log      sealed: complete, waiting for compaction
+  0000000008.active   the segment the writer is appending to
+
+Each append is one frame with a fixed schema (the store's typed predictions
+columns), written with a single write call:
+
+  b"PLOG" | uint32 payload length | uint32 CRC-32 | Arrow IPC stream
+
+Frames are made durable in groups. The writer fsyncs once `sync_bytes` or
+`sync_seconds` have built up, not on every append. Segments rotate by size
+or age. There is one writer per log at a time; it holds writer.lock while it is
+open. When a writer opens the log, it truncates a torn frame left at the
+end of an .active segment by a crash and seals that segment.
+
+`compact` moves sealed segments into the columnar store. Each segment's rows
+become parts named `part-wal-<segment>.parquet`, so a retry rewrites the same
+files instead of duplicating them. compaction.json records the last segment
+done, the rollup file records the last segment it folded in, and the segment
+is deleted afterwards. Compaction holds the rollup's cross-process lock.
+
+Readers take no locks and only ever see whole frames. `read_snapshot`
+opens the segments first and then lists the store, skipping parts of
+segments it already holds. A segment that disappears before it is opened has
+already been compacted, so its parts are listed instead. Each row therefore
+appears exactly once, whatever compaction is doing at the time.
+"""
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+
+from utils import sensor_store
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"PLOG"
+HEADER = struct.Struct("<4sII")
+SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_SECONDS = 3600.0
+SYNC_BYTES = 1024 * 1024
+SYNC_SECONDS = 0.05
+ACTIVE, SEALED = ".active", ".log"
+STATE_FILE = "compaction.json"
+WRITER_LOCK = "writer.lock"
+
+_SEGMENT_RE = re.compile(r"^(\d{10})(\.active|\.log)$")
+_PART_RE = re.compile(r"part-wal-(\d{10})\.parquet$")
+
+
+def log_dir(name="predictions"):
+    return os.path.join(sensor_store.STORE_DIR, f"{name}_log")
+
+
+def segment_tag(seq):
+    return f"wal-{seq:010d}"
+
+
+def part_segment(path):
+    """Segment number a store part was compacted from (None for other parts)"""
+    match = _PART_RE.search(path)
+    return int(match.group(1)) if match else None
+
+
+def list_segments(path):
+    """{seq: file path} of the segments currently in a log directory"""
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return {}
+    segments = {}
+    for file_name in names:
+        match = _SEGMENT_RE.match(file_name)
+        if match:
+            segments[int(match.group(1))] = os.path.join(path, file_name)
+    return dict(sorted(segments.items()))
+
+
+def has_segments(name="predictions"):
+    """True when the log holds data (a writer's freshly opened segment is empty)"""
+    for seg_path in list_segments(log_dir(name)).values():
+        try:
+            if os.path.getsize(seg_path):
+                return True
+        except FileNotFoundError:
+            continue  # sealed or compacted meanwhile
+    return False
+
+
+# ---------- FRAMES ----------
+def encode_frame(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    payload = sink.getvalue().to_pybytes()
+    return HEADER.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_frames(data, offset=0):
+    """(tables, end offset) for the complete, valid frames in data from offset on"""
+    tables = []
+    while offset + HEADER.size <= len(data):
+        magic, length, crc = HEADER.unpack_from(data, offset)
+        end = offset + HEADER.size + length
+        if magic != MAGIC or end > len(data):
+            break
+        payload = data[offset + HEADER.size:end]
+        if zlib.crc32(payload) != crc:
+            break
+        tables.append(pa.ipc.open_stream(payload).read_all())
+        offset = end
+    return tables, offset
+
+
+def read_segment(f, offset=0):
+    """Frames appended to an open segment file since offset → (tables, new offset)"""
+    f.seek(offset)
+    tables, consumed = decode_frames(f.read())
+    return tables, offset + consumed
+
+
+def to_frame(name, tables):
+    if not tables:
+        return sensor_store.arrow_schema(name).empty_table().to_pandas()
+    return pa.concat_tables(tables).to_pandas()
+
+
+def _replace(src, dst, attempts=50):
+    """os.replace, retried while a reader briefly has the file open (Windows)"""
+    for attempt in range(attempts):
+        try:
+            return os.replace(src, dst)
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.01)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ---------- WRITER ----------
+def _try_lock(fd):
+    """Exclusive lock on fd without waiting → False if another holder has it"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class SyncError(OSError):
+    """The data reached the log, but making it durable (or rotating) failed; retry sync, not the append"""
+
+
+class PredictionLog:
+    """Single-writer append log. Thread-safe.
+
+    The writer holds an OS lock on writer.lock until it is closed (or its
+    process exits), so a second writer fails instead of sealing the first
+    one's active segment as if it had crashed.
+    """
+
+    def __init__(self, name="predictions", path=None, segment_bytes=SEGMENT_BYTES,
+                 segment_seconds=SEGMENT_SECONDS, sync_bytes=SYNC_BYTES, sync_seconds=SYNC_SECONDS):
+        self.name = name
+        self.path = path or log_dir(name)
+        self.schema = sensor_store.arrow_schema(name)
+        self.columns = sensor_store.TABLES[name]["columns"]
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.sync_bytes = sync_bytes
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._fd = None
+        self.appended = 0
+        self.syncs = 0
+        self.rotations = 0
+        os.makedirs(self.path, exist_ok=True)
+        self._writer_fd = os.open(os.path.join(self.path, WRITER_LOCK), os.O_CREAT | os.O_RDWR)
+        if not _try_lock(self._writer_fd):
+            os.close(self._writer_fd)
+            raise RuntimeError(f"❌ {self.path} already has a writer")
+        try:
+            self._open()
+        except BaseException:
+            os.close(self._writer_fd)  # closing the descriptor releases the lock
+            raise
+
+    def _open(self):
+        """Migrate a legacy CSV, recover segments left active by a crash, start a new one"""
+        # Like the first write_table append: a table still only in the legacy CSV is migrated
+        # first, or readers would switch to the store and lose the CSV rows
+        sensor_store.migrate_csv(self.name)
+        self._recover()
+        self._open_segment(self._last_seq() + 1)
+
+    def _last_seq(self):
+        """Highest segment number ever used; numbers are never reused, since
+        compacted parts are named after them"""
+        compacted = [part_segment(p) for p in sensor_store.list_parts(self.name)]
+        return max([*list_segments(self.path), _load_state(self.path)["compacted_through"],
+                    *(seq for seq in compacted if seq is not None)], default=0)
+
+    def _recover(self):
+        """Cut a torn tail off segments a crashed writer left active, then seal them"""
+        for seq, seg_path in list_segments(self.path).items():
+            if not seg_path.endswith(ACTIVE):
+                continue
+            with open(seg_path, "r+b") as f:
+                _, valid = decode_frames(f.read())
+                f.truncate(valid)
+                os.fsync(f.fileno())
+            _replace(seg_path, seg_path[:-len(ACTIVE)] + SEALED)
+        _fsync_dir(self.path)
+
+    def _open_segment(self, seq):
+        self.seq = seq
+        self._seg_path = os.path.join(self.path, f"{seq:010d}{ACTIVE}")
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        self._fd = os.open(self._seg_path, flags)
+        _fsync_dir(self.path)
+        self._size = 0
+        self._opened_at = time.monotonic()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal(self):
+        self._sync()
+        os.close(self._fd)
+        self._fd = None
+        try:
+            _replace(self._seg_path, self._seg_path[:-len(ACTIVE)] + SEALED)
+        except OSError:
+            # Still active: keep appending to it, the next rotation seals it
+            self._fd = os.open(self._seg_path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+            raise
+        _fsync_dir(self.path)
+
+    def _rotate(self):
+        try:
+            self._seal()
+        finally:
+            if self._fd is None:  # sealed, even if its directory entry is not yet durable
+                self.rotations += 1
+                self._open_segment(self.seq + 1)
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._fd)
+            self.syncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, df):
+        """Append a predictions frame; every schema column must be present"""
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise KeyError(f"❌ Missing columns for {self.name} log: {missing}")
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(sensor_store.coerce(df[self.columns]), schema=self.schema,
+                                     preserve_index=False)
+        frame = encode_frame(table)
+        with self._lock:
+            if self._fd is None:
+                raise ValueError("❌ Log is closed")
+            self._write(frame)
+            self._size += len(frame)
+            self._unsynced += len(frame)
+            self.appended += len(df)
+            # From here on the frame is in the log: a failure must not make the
+            # caller append it again
+            try:
+                now = time.monotonic()
+                if self._unsynced >= self.sync_bytes or now - self._last_sync >= self.sync_seconds:
+                    self._sync()
+                if self._size >= self.segment_bytes or now - self._opened_at >= self.segment_seconds:
+                    self._rotate()
+            except OSError as e:
+                raise SyncError(f"frame appended, but sync or rotation failed: {e}") from e
+
+    def _write(self, frame):
+        """Write a whole frame or, on error, nothing (a partial frame would hide later ones)"""
+        view = memoryview(frame)
+        try:
+            while view:
+                view = view[os.write(self._fd, view):]
+        except OSError:
+            os.ftruncate(self._fd, self._size)
+            raise
+
+    def sync(self):
+        """Make everything appended so far durable"""
+        with self._lock:
+            if self._fd is not None:
+                try:
+                    self._sync()
+                except OSError as e:
+                    raise SyncError(f"sync failed: {e}") from e
+
+    def rotate(self):
+        """Seal the active segment (if it has data) so it can be compacted"""
+        with self._lock:
+            if self._fd is not None and self._size:
+                self._rotate()
+
+    def close(self):
+        with self._lock:
+            if self._fd is None:
+                return
+            if self._size:
+                self._seal()
+            else:
+                os.close(self._fd)
+                self._fd = None
+                os.remove(self._seg_path)
+            os.close(self._writer_fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ---------- READERS ----------
+def open_segments(path):
+    """Open every segment for reading → {seq: file}. An active segment that is
+    sealed between listing and opening is picked up under its new name."""
+    files = {}
+    for _ in range(10):
+        for seq, seg_path in list_segments(path).items():
+            if seq in files:
+                continue
+            try:
+                files[seq] = open(seg_path, "rb")
+            except FileNotFoundError:
+                pass  # sealed (renamed) or compacted (parts already in the store)
+        renamed = [seq for seq, seg_path in list_segments(path).items() if seq not in files]
+        if not renamed:
+            break
+    return files
+
+
+class SnapshotReader:
+    """Incremental reads of a table and its log: each poll returns the rows added since the last.
+
+    Rows of a segment the reader has held (read from the log) are never read
+    again from that segment's compacted parts. If a segment the reader only
+    saw while active is sealed and compacted between two polls, its unread
+    tail exists only in the parts, so that poll starts over with a full read.
+    """
+
+    def __init__(self, name="predictions", path=None):
+        self.name = name
+        self.path = path or log_dir(name)
+        self._reset()
+
+    def _reset(self):
+        self.parts = {}       # store part path → (size, mtime_ns)
+        self.offsets = {}     # open segment → bytes consumed
+        self.held = set()     # segments whose rows came from the log
+        self.complete = set()  # held segments read while sealed (nothing more to come)
+        self.polled = False
+
+    def poll(self):
+        """(new rows, full): when full is True the rows replace everything returned before"""
+        files = open_segments(self.path)
+        try:
+            # Listed after the segments were opened: parts of a held segment are skipped
+            parts = sensor_store.list_parts(self.name)
+            lost_tail = any(seq not in files and seq not in self.complete for seq in self.offsets)
+            rewritten = any(parts.get(p) != sig for p, sig in self.parts.items())
+            full = lost_tail or rewritten or not self.polled
+            if full:
+                self._reset()
+            self.polled = True
+
+            tables, offsets = [], {}
+            for seq, f in files.items():
+                frames, offsets[seq] = read_segment(f, self.offsets.get(seq, 0))
+                tables += frames
+                self.held.add(seq)
+                if f.name.endswith(SEALED):
+                    self.complete.add(seq)
+            self.offsets = offsets
+        finally:
+            for f in files.values():
+                f.close()
+
+        new_paths = [p for p in parts if p not in self.parts and part_segment(p) not in self.held]
+        self.parts = parts
+        rows = pd.concat([sensor_store.read_parts(self.name, new_paths), to_frame(self.name, tables)],
+                         ignore_index=True)
+        if full:
+            rows = rows.sort_values("timestamp", kind="stable", ignore_index=True)
+        return rows, full
+
+
+def read_pending(name="predictions", after=0, path=None):
+    """Rows of the segments numbered above `after` that are still in the log"""
+    files = open_segments(path or log_dir(name))
+    try:
+        tables = [table for seq, f in files.items() if seq > after for table in read_segment(f)[0]]
+    finally:
+        for f in files.values():
+            f.close()
+    return to_frame(name, tables)
+
+
+def read_snapshot(name="predictions", path=None):
+    """The table plus its uncompacted log, every row exactly once, sorted by time"""
+    return SnapshotReader(name, path).poll()[0]
+
+
+# ---------- COMPACTION ----------
+def _load_state(path):
+    try:
+        with open(os.path.join(path, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"compacted_through": 0}
+
+
+def _save_state(path, state):
+    tmp_path = os.path.join(path, STATE_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, os.path.join(path, STATE_FILE))
+
+
+def compacted_through(name="predictions", path=None):
+    """Last segment whose rows have been moved into the store table"""
+    return _load_state(path or log_dir(name))["compacted_through"]
+
+
+def compact(name="predictions", path=None):
+    """Move sealed segments into the store table; returns rows compacted.
+
+    Runs under the rollup lock, so concurrent compactors (and rollup
+    rebuilds) take turns. Safe to re-run after a crash: a segment's parts
+    are rewritten under the same names until the state file records it as
+    done, and the rollup records which segment it last folded in, so no
+    segment reaches it twice.
+    """
+    from utils import rollups
+
+    path = path or log_dir(name)
+    compacted = 0
+    with rollups.locked():
+        state = _load_state(path)
+        for seq, seg_path in list_segments(path).items():
+            if not seg_path.endswith(SEALED):
+                continue
+            with open(seg_path, "rb") as f:
+                tables, _ = read_segment(f)
+            df = to_frame(name, tables)
+            # At or below compacted_through the parts were written in full before a
+            # crash (and may since have been merged by sensor_store.compact)
+            if seq > state["compacted_through"]:
+                sensor_store.write_tagged(name, df, segment_tag(seq))
+                if name == "predictions":
+                    rollups.update_rollup(df, seq)
+                state["compacted_through"] = seq
+                _save_state(path, state)
+            try:
+                os.remove(seg_path)
+            except PermissionError:
+                continue  # open in a reader on Windows; the next compaction retries
+            compacted += len(df)
+    return compacted
@@ -0,0 +1,159 @@
+"""Retention and cleanup for Firestore sensor collections.
+
+Documents are found page by page with a query cursor (`start_after`) and
+only the fields needed to continue the cursor are fetched. Deletes go
+through BatchWriter: chunks of up to 500 are committed concurrently while
+the next page is read. Nothing accumulates beyond one page plus the batches
+in flight.
+
+Policies:
+  keep_days=None                 delete every document (the old wipe)
+  keep_days=N, relative="latest" per farm, keep N days before that farm's
+                                 newest reading (idle farms keep their last N days)
+  keep_days=N, relative="now"    per farm, keep the last N days of wall-clock time
+
+Per-farm queries filter on farm_id and timestamp, which needs a composite
+(farm_id, timestamp) index in Firestore. Timestamps written as ISO strings
+and as Firestore timestamps are compared separately, because Firestore only
+compares values of the same type.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from google.cloud.firestore_v1 import Query
+
+from utils.firestore_writer import DEFAULT_IN_FLIGHT, BatchWriter
+
+CURSOR_FIELD = "timestamp"
+FARM_FIELD = "farm_id"
+PAGE_SIZE = 1000
+
+
+def to_datetime(value):
+    """Firestore timestamp or ISO string → aware datetime (None if neither)"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return None
+
+
+def print_progress(report):
+    print(f"🧹 Deleted {report['deleted']} documents, {report['queued'] - report['deleted']} pending "
+          f"({report['docs_per_s']:.0f} docs/s)")
+
+
+class _Run:
+    """Counters shared by every query of one cleanup"""
+
+    def __init__(self, writer, progress, progress_every):
+        self.writer = writer
+        self.start = time.perf_counter()
+        self.queued = 0
+        self.per_farm = {}
+        self.progress = progress
+        self.progress_every = progress_every
+        self._last_report = 0
+
+    def report(self):
+        seconds = time.perf_counter() - self.start
+        deleted = self.writer.written
+        return {
+            "queued": self.queued,
+            "deleted": deleted,
+            "per_farm": dict(self.per_farm),
+            "batches": self.writer.batches,
+            "retries": self.writer.retries,
+            "seconds": seconds,
+            "docs_per_s": deleted / seconds if seconds else 0.0,
+        }
+
+    def tick(self):
+        if self.progress and self.queued - self._last_report >= self.progress_every:
+            self._last_report = self.queued
+            self.progress(self.report())
+
+
+def _delete_pages(query, cursor_fields, writer, run, farm=None, page_size=PAGE_SIZE):
+    """Delete every document a query matches, one cursor page at a time"""
+    query = query.select(cursor_fields)
+    last = None
+    while True:
+        page_query = query.limit(page_size)
+        if last is not None:
+            page_query = page_query.start_after(last)
+        page = list(page_query.stream())
+        for doc in page:
+            writer.delete(doc.reference)
+        run.queued += len(page)
+        if farm is not None:
+            run.per_farm[farm] = run.per_farm.get(farm, 0) + len(page)
+        run.tick()
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def _discover_farms(collection, page_size):
+    """Distinct farm ids via a keys-and-farm_id scan (reads every document once)"""
+    farms, last = set(), None
+    query = collection.order_by("__name__").select([FARM_FIELD])
+    while True:
+        page_query = query.limit(page_size)
+        if last is not None:
+            page_query = page_query.start_after(last)
+        page = list(page_query.stream())
+        farms.update(doc.to_dict().get(FARM_FIELD) for doc in page)
+        if len(page) < page_size:
+            return sorted(f for f in farms if f is not None)
+        last = page[-1]
+
+
+def _newest(collection, farm):
+    query = (collection.where(FARM_FIELD, "==", farm)
+             .order_by(CURSOR_FIELD, direction=Query.DESCENDING).limit(1).select([CURSOR_FIELD]))
+    docs = list(query.stream())
+    return to_datetime(docs[0].get(CURSOR_FIELD)) if docs else None
+
+
+def _cutoffs(cutoff):
+    """(lower, upper) bounds selecting readings older than cutoff, for each stored form.
+
+    Timestamps compare directly. Strings come as "YYYY-MM-DD HH:MM:SS" (CSV
+    uploads) or "YYYY-MM-DDTHH:MM:SS", and " " sorts before "T", so the
+    space-form bound covers every earlier day in both forms plus space-form
+    times on the cutoff day; the last range adds "T"-form times on that day.
+    """
+    naive = cutoff.astimezone(timezone.utc).replace(tzinfo=None)
+    day = naive.date().isoformat()
+    return [(None, cutoff), (None, naive.isoformat(sep=" ")), (day + "T", naive.isoformat())]
+
+
+def purge(db, collection="sensor_data", keep_days=None, relative="latest", farms=None,
+          page_size=PAGE_SIZE, max_in_flight=DEFAULT_IN_FLIGHT, progress=print_progress,
+          progress_every=5000):
+    """Apply a retention policy to a collection; returns a report dict"""
+    if relative not in ("latest", "now"):
+        raise ValueError(f"❌ relative must be 'latest' or 'now', not {relative!r}")
+
+    col = db.collection(collection)
+    with BatchWriter(db, max_in_flight=max_in_flight) as writer:
+        run = _Run(writer, progress, progress_every)
+        if keep_days is None:
+            _delete_pages(col.order_by("__name__"), [], writer, run, page_size=page_size)
+        else:
+            now = datetime.now(timezone.utc)
+            for farm in farms if farms is not None else _discover_farms(col, page_size):
+                anchor = _newest(col, farm) if relative == "latest" else now
+                if anchor is None:
+                    continue
+                for lower, upper in _cutoffs(anchor - timedelta(days=keep_days)):
+                    query = col.where(FARM_FIELD, "==", farm).where(CURSOR_FIELD, "<", upper)
+                    if lower is not None:
+                        query = query.where(CURSOR_FIELD, ">=", lower)
+                    query = query.order_by(CURSOR_FIELD)
+                    _delete_pages(query, [CURSOR_FIELD], writer, run, farm, page_size)
+    return run.report()
@@ -0,0 +1,208 @@
+"""Daily rollups of crop predictions for the dashboard charts.
+
+One small table keyed by (farm_id, recommended_crop, date) holding a row
+count plus the sum/min/max of every measurement. Writers fold new
+predictions in with `update_rollup`; the dashboard answers any farm/crop
+filter by summing rollup rows, so chart cost no longer grows with history.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import prediction_log, sensor_store
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ROLLUP_DIR = os.path.join(sensor_store.STORE_DIR, "rollups")
+ROLLUP_PATH = os.path.join(ROLLUP_DIR, "predictions_daily.parquet")
+LOCK_PATH = ROLLUP_PATH + ".lock"
+
+KEYS = ["farm_id", "recommended_crop", "date"]
+METRICS = ["soil_moisture", "temperature", "humidity", "rainfall", "ph", "N", "P", "K"]
+LOG_SEQ_KEY = b"log_seq"  # file metadata: last predictions log segment folded in
+
+_held = threading.local()
+
+
+# ---------- LOCKING ----------
+def _lock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            return msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        except OSError:
+            pass  # LK_LOCK gives up after ~10 s; keep waiting
+
+
+@contextmanager
+def locked():
+    """Cross-process lock around read-modify-write of the rollup.
+
+    An OS file lock, so it is released when the holder exits or crashes and
+    is never taken over while the holder is alive. The lock file stays.
+    Re-entrant within a thread: log compaction holds it while it writes
+    parts and folds them in.
+    """
+    if getattr(_held, "depth", 0):
+        _held.depth += 1
+        try:
+            yield
+        finally:
+            _held.depth -= 1
+        return
+    os.makedirs(ROLLUP_DIR, exist_ok=True)
+    fd = os.open(LOCK_PATH, os.O_CREAT | os.O_RDWR)
+    try:
+        _lock(fd)
+        _held.depth = 1
+        yield
+    finally:
+        _held.depth = 0
+        os.close(fd)  # closing the descriptor releases the lock
+
+
+# ---------- AGGREGATION ----------
+def aggregate(df):
+    """Roll raw prediction rows up to one row per (farm_id, recommended_crop, date)"""
+    # float64 so sums over years of float32 readings do not drift
+    df = df.assign(date=df["timestamp"].dt.normalize()).astype({m: "float64" for m in METRICS})
+    grouped = df.groupby(KEYS, observed=True)
+    out = grouped.size().rename("count").to_frame()
+    metrics = grouped[METRICS].agg(["sum", "min", "max"])
+    metrics.columns = [f"{metric}_{stat}" for metric, stat in metrics.columns]
+    return out.join(metrics).reset_index()
+
+
+def merge(a, b):
+    """Combine two rollups (counts/sums add, min/max fold)"""
+    both = pd.concat([a, b], ignore_index=True)
+    how = {"count": "sum"}
+    for metric in METRICS:
+        how.update({f"{metric}_sum": "sum", f"{metric}_min": "min", f"{metric}_max": "max"})
+    return both.groupby(KEYS, as_index=False).agg(how)
+
+
+# ---------- PERSISTENCE ----------
+def log_seq(path=None):
+    """Last predictions log segment the rollup file includes (0 if none)"""
+    try:
+        metadata = pq.read_schema(path or ROLLUP_PATH).metadata or {}
+    except FileNotFoundError:
+        return 0
+    return int(metadata.get(LOG_SEQ_KEY, 0))
+
+
+def _write(rollup, seq):
+    """Replace the rollup file; seq is stored with it in the same atomic rename"""
+    table = pa.Table.from_pandas(rollup, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), LOG_SEQ_KEY: str(seq).encode()})
+    tmp_path = ROLLUP_PATH + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, ROLLUP_PATH)
+
+
+def _compacted_seq():
+    """Last log segment whose rows are in the predictions table"""
+    parts = [prediction_log.part_segment(p) for p in sensor_store.list_parts("predictions")]
+    return max([prediction_log.compacted_through("predictions"), *(s for s in parts if s is not None)])
+
+
+def rebuild_rollup(chunksize=1_000_000):
+    """Recompute the rollup from the whole predictions table"""
+    with locked():
+        seq = _compacted_seq()
+        rollup = None
+        for chunk in sensor_store.iter_chunks("predictions", chunksize):
+            part = aggregate(chunk)
+            rollup = part if rollup is None else merge(rollup, part)
+        if rollup is not None:
+            _write(rollup, seq)
+    return rollup
+
+
+def replace_rollup(df):
+    """Rollup for a predictions table that was just overwritten with df"""
+    with locked():
+        _write(aggregate(df), log_seq())
+
+
+def update_rollup(new_rows, seq=None):
+    """Fold rows that were just appended to the predictions table into the rollup.
+
+    Rows compacted from log segment `seq` are folded in once: the segment
+    number is recorded in the rollup file, so a retried compaction skips it.
+    """
+    with locked():
+        if not os.path.exists(ROLLUP_PATH):
+            # First rollup: new_rows are already in the table, so build from scratch
+            rebuild_rollup()
+            return
+        current = log_seq()
+        if seq is not None and seq <= current:
+            return
+        _write(merge(pd.read_parquet(ROLLUP_PATH), aggregate(new_rows)), max(current, seq or 0))
+
+
+_cache = {"mtime": None, "rollup": None, "log_seq": 0}
+
+
+def load_rollup():
+    """Current rollup, cached in-process until the file changes (built if missing)"""
+    if not os.path.exists(ROLLUP_PATH):
+        if not sensor_store.has_data("predictions"):
+            return None
+        rebuild_rollup()
+    mtime = os.path.getmtime(ROLLUP_PATH)
+    if mtime != _cache["mtime"]:
+        _cache["rollup"] = pd.read_parquet(ROLLUP_PATH)
+        _cache["log_seq"] = log_seq()
+        _cache["mtime"] = mtime
+    return _cache["rollup"]
+
+
+def load_live_rollup():
+    """The rollup plus predictions still waiting in the log for compaction (never None)"""
+    for _ in range(10):
+        rollup = load_rollup()
+        mtime, seq = (_cache["mtime"], _cache["log_seq"]) if rollup is not None else (None, 0)
+        pending = prediction_log.read_pending("predictions", after=seq)
+        # A compaction in between moved pending rows into a newer rollup: load again
+        current = os.path.getmtime(ROLLUP_PATH) if os.path.exists(ROLLUP_PATH) else None
+        if current == mtime:
+            break
+    if rollup is None:
+        return aggregate(pending)  # empty (typed columns) when nothing is stored yet
+    if pending.empty:
+        return rollup
+    return merge(rollup, aggregate(pending))
+
+
+# ---------- QUERIES ----------
+def select(rollup, farms=None, crops=None):
+    mask = pd.Series(True, index=rollup.index)
+    if farms is not None:
+        mask &= rollup["farm_id"].isin(farms)
+    if crops is not None:
+        mask &= rollup["recommended_crop"].isin(crops)
+    return rollup[mask]
+
+
+def crop_distribution(rollup):
+    """Same shape as value_counts() on the raw recommended_crop column"""
+    return rollup.groupby("recommended_crop")["count"].sum().sort_values(ascending=False)
+
+
+def daily_counts(rollup):
+    counts = rollup.groupby("date")["count"].sum()
+    counts.index = counts.index.date
+    return counts
@@ -0,0 +1,179 @@
+"""Vectorized synthetic sensor readings.
+
+Whole columns are drawn at once from a seeded NumPy `Generator`, so a
+million rows cost a handful of array operations instead of a million dicts.
+The value ranges of the original scripts are kept as named profiles:
+
+  simulate_sensors  3 farms, readings at random seconds over the last 30 days
+  realistic         5 farms, Kaggle-aligned ranges, whole-day offsets (0-30 days)
+  run_all           5 farms, the live-upload ranges, every reading stamped "now"
+
+Large runs are split into tasks of at most `chunksize` rows of one farm.
+Every task gets its own child seed (`SeedSequence.spawn`), so the output
+depends only on seed, rows, farms and chunksize, not on the worker count.
+Tasks run on a process pool and are written in order, either appended to a
+CSV or as Parquet parts of a store table (swapped in once complete).
+"""
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from utils import sensor_store
+
+COLUMNS = sensor_store.TABLES["sensor_readings"]["columns"]
+MEASUREMENTS = COLUMNS[2:]
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# window_days / spacing_seconds: timestamps are end - k * spacing for k drawn
+# uniformly from 0..window (inclusive), like the randint calls they replace
+PROFILES = {
+    "simulate_sensors": {
+        "farms": 3,
+        "window_days": 30,
+        "spacing_seconds": 1,
+        "ranges": {
+            "N": (10, 140), "P": (5, 145), "K": (5, 205), "pH": (4.5, 8.5),
+            "temperature_C": (15, 40), "humidity_percent": (30, 100),
+            "soil_moisture_percent": (10, 60), "rainfall_mm": (0, 300),
+        },
+    },
+    "realistic": {
+        "farms": 5,
+        "window_days": 30,
+        "spacing_seconds": 86400,
+        "ranges": {
+            "N": (0, 140), "P": (5, 120), "K": (5, 200), "pH": (4, 9),
+            "temperature_C": (15, 45), "humidity_percent": (30, 95),
+            "soil_moisture_percent": (10, 90), "rainfall_mm": (20, 300),
+        },
+    },
+    "run_all": {
+        "farms": 5,
+        "window_days": 0,
+        "spacing_seconds": 1,
+        "ranges": {
+            "N": (20, 200), "P": (10, 150), "K": (10, 180), "pH": (4.5, 8.5),
+            "temperature_C": (20, 42), "humidity_percent": (40, 95),
+            "soil_moisture_percent": (10, 90), "rainfall_mm": (40, 300),
+        },
+    },
+}
+
+
+def get_profile(name):
+    if name not in PROFILES:
+        raise KeyError(f"❌ Unknown profile {name!r}; choose from {sorted(PROFILES)}")
+    return PROFILES[name]
+
+
+def resolve_end(end=None):
+    """The newest timestamp of a run, in whole seconds (default: now)"""
+    return np.datetime64(pd.Timestamp(end) if end is not None else pd.Timestamp.now(), "s")
+
+
+# ---------- GENERATION ----------
+def generate_columns(rng, rows, profile, farm_ids, end):
+    """One frame of readings; farm_ids is a scalar or an array of length rows"""
+    spacing = profile["spacing_seconds"]
+    steps = int(profile["window_days"] * 86400 // spacing)
+    offsets = rng.integers(0, steps, rows, endpoint=True) * spacing
+    data = {
+        "timestamp": end - offsets.astype("timedelta64[s]"),
+        "farm_id": np.broadcast_to(np.asarray(farm_ids, dtype=np.int32), (rows,)),
+    }
+    for col in MEASUREMENTS:
+        low, high = profile["ranges"][col]
+        data[col] = rng.uniform(low, high, rows).round(2)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def generate(rows, profile="simulate_sensors", farms=None, seed=None, end=None):
+    """Readings from farms 1..farms in random order, as one in-memory frame"""
+    profile = get_profile(profile) if isinstance(profile, str) else profile
+    farms = farms or profile["farms"]
+    rng = np.random.default_rng(seed)
+    farm_ids = rng.integers(1, farms, rows, endpoint=True)
+    return generate_columns(rng, rows, profile, farm_ids, resolve_end(end))
+
+
+def plan_tasks(rows, farms, chunksize=DEFAULT_CHUNKSIZE, seed=None):
+    """(farm, rows, child seed) per task: farm counts are multinomial, split into chunks"""
+    root = np.random.SeedSequence(seed)
+    per_farm = np.random.default_rng(root.spawn(1)[0]).multinomial(rows, [1 / farms] * farms)
+    sizes = []
+    for farm, count in enumerate(per_farm, 1):
+        full, rest = divmod(int(count), chunksize)
+        sizes += [(farm, chunksize)] * full + ([(farm, rest)] if rest else [])
+    seeds = root.spawn(len(sizes) + 1)[1:]
+    return [(farm, n, child) for (farm, n), child in zip(sizes, seeds)]
+
+
+# ---------- OUTPUT ----------
+def to_csv_bytes(df):
+    """Headerless CSV formatted by Arrow in C++ (timestamps as "YYYY-MM-DD HH:MM:SS")"""
+    buf = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf,
+                    pacsv.WriteOptions(include_header=False, quoting_style="none"))
+    return buf.getvalue()
+
+
+def _run_task(task, profile, end, target, staging):
+    farm, rows, seed = task
+    df = generate_columns(np.random.default_rng(seed), rows, profile, farm, end)
+    if staging is None:
+        return rows, to_csv_bytes(df)
+    sensor_store.write_staged(target, staging, df)
+    return rows, None
+
+
+def _results(tasks, workers, *args):
+    """Task results in plan order, keeping at most 2 * workers tasks in flight"""
+    if workers <= 1:
+        for task in tasks:
+            yield _run_task(task, *args)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_run_task, task, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_dataset(target, rows, profile="simulate_sensors", farms=None, seed=None, end=None,
+                  chunksize=DEFAULT_CHUNKSIZE, workers=None, progress=None):
+    """Generate rows into a CSV path or a store table; returns the number of rows written"""
+    profile = get_profile(profile) if isinstance(profile, str) else profile
+    farms = farms or profile["farms"]
+    tasks = plan_tasks(rows, farms, chunksize, seed)
+    # A run that fits in one chunk is not worth starting a pool for
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) if rows > chunksize else 1
+    end = resolve_end(end)
+
+    written = 0
+    if target.endswith(".csv"):
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write((",".join(COLUMNS) + "\n").encode())
+            for n, data in _results(tasks, workers, profile, end, target, None):
+                f.write(data)
+                written += n
+                if progress:
+                    progress(written, rows)
+        os.replace(tmp_path, target)
+    else:
+        staging = sensor_store.begin_staged(target)
+        for n, _ in _results(tasks, workers, profile, end, target, staging):
+            written += n
+            if progress:
+                progress(written, rows)
+        sensor_store.commit_staged(target, staging)
+    return written
@@ -0,0 +1,429 @@
+"""Columnar storage for sensor readings and crop predictions.
+
+Each table lives under data/store/<table>/ as Parquet files partitioned by
+farm and month (farm=<id>/month=<YYYY-MM>/part-*.parquet) with typed columns:
+datetime64 timestamps, int32 farm_id and float32 measurements. Appends add
+new part files; nothing is rewritten in place.
+
+Overwrites build a complete new directory beside the table and switch to it
+by replacing a one-line pointer file, data/store/<table>.current, with a
+single rename. Readers resolve the pointer once per read and so see either
+the old table or the new one, never a missing directory. A retired version
+is deleted by a later swap once it has been retired for RETIRED_SECONDS, so
+reads already under way finish on it. Appends hold the table's lock file
+shared and the swap holds it exclusively, so no append lands in a version
+being retired. A replacement built while parts were appended is refused
+(compaction carries those parts over instead).
+
+The original CSVs in data/ remain the import/export format, and are read
+directly (with the same typing) when a table has not been written yet.
+"""
+import glob
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+MEASUREMENT_DTYPE = np.float32
+
+TABLES = {
+    "sensor_readings": {
+        "csv": "simulated_sensor_data.csv",
+        "columns": ["timestamp", "farm_id", "N", "P", "K", "pH", "temperature_C",
+                    "humidity_percent", "soil_moisture_percent", "rainfall_mm"],
+    },
+    "predictions": {
+        "csv": "predicted_crops.csv",
+        "columns": ["timestamp", "farm_id", "soil_moisture", "temperature", "humidity",
+                    "rainfall", "ph", "N", "P", "K", "recommended_crop"],
+    },
+}
+
+# Month-level date partitions: day-level ones produce thousands of tiny files
+# whose open overhead outweighs the pruning benefit at our volumes
+PARTITIONING = ds.partitioning(
+    pa.schema([("farm", pa.int32()), ("month", pa.string())]), flavor="hive"
+)
+MONTH_FORMAT = "%Y-%m"
+RETIRED_SECONDS = 600.0  # how long a replaced version stays readable
+
+_staged_from = {}  # staging dir → (table dir, parts) of the version it replaces
+
+
+def arrow_schema(name):
+    fields = []
+    for col in TABLES[name]["columns"]:
+        if col == "timestamp":
+            fields.append((col, pa.timestamp("ns")))
+        elif col == "farm_id":
+            fields.append((col, pa.int32()))
+        elif col == "recommended_crop":
+            fields.append((col, pa.string()))
+        else:
+            fields.append((col, pa.float32()))
+    return pa.schema(fields)
+
+
+def _pointer_path(name):
+    return os.path.join(STORE_DIR, f"{name}.current")
+
+
+def table_dir(name):
+    """Directory holding the table's current version"""
+    try:
+        with open(_pointer_path(name)) as f:
+            return os.path.join(STORE_DIR, f.read().strip())
+    except FileNotFoundError:
+        return os.path.join(STORE_DIR, name)  # never overwritten since the pointer was added
+
+
+def csv_path(name):
+    return os.path.join(DATA_DIR, TABLES[name]["csv"])
+
+
+def in_store(name):
+    return bool(glob.glob(os.path.join(table_dir(name), "*", "*", "*.parquet")))
+
+
+def has_data(name):
+    return in_store(name) or os.path.exists(csv_path(name))
+
+
+# ---------- TYPING ----------
+def coerce(df):
+    """Cast to the store's column types (datetime64 / int32 / float32 / string)"""
+    df = df.copy()
+    for col in df.columns:
+        if col == "timestamp":
+            df[col] = pd.to_datetime(df[col], format="ISO8601")
+        elif col == "farm_id":
+            df[col] = df[col].astype(np.int32)
+        elif col == "recommended_crop":
+            df[col] = df[col].astype(str)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(MEASUREMENT_DTYPE)
+    return df
+
+
+def csv_dtypes():
+    """read_csv dtypes for every store column, so numbers are parsed straight into
+    int32 / float32 (timestamps are left to coerce)"""
+    dtypes = {}
+    for table in TABLES.values():
+        for col in table["columns"]:
+            if col == "farm_id":
+                dtypes[col] = np.int32
+            elif col == "recommended_crop":
+                dtypes[col] = str
+            elif col != "timestamp":
+                dtypes[col] = MEASUREMENT_DTYPE
+    return dtypes
+
+
+def read_csv_typed(path, **kwargs):
+    return coerce(pd.read_csv(path, dtype=csv_dtypes(), **kwargs))
+
+
+def csv_chunks(path, chunksize, **kwargs):
+    """Stream a CSV in typed chunks of at most chunksize rows"""
+    for chunk in pd.read_csv(path, dtype=csv_dtypes(), chunksize=chunksize, **kwargs):
+        yield coerce(chunk)
+
+
+# ---------- WRITE ----------
+def _write_partitions(root, df, tag=None):
+    """One part file per farm/month; a tag gives deterministic names (rewrites replace)"""
+    if df.empty:
+        return
+    # Group on month-truncated datetimes; only the group keys are formatted
+    months = df["timestamp"].to_numpy(dtype="datetime64[M]")
+    for (farm, month), part in df.groupby([df["farm_id"], months], sort=False):
+        month = pd.Timestamp(month).strftime(MONTH_FORMAT)
+        part_dir = os.path.join(root, f"farm={farm}", f"month={month}")
+        os.makedirs(part_dir, exist_ok=True)
+        part_path = os.path.join(part_dir, f"part-{tag or uuid.uuid4().hex}.parquet")
+        # Write-then-rename so readers never see a half-written part
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        pq.write_table(table, part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+
+
+def _prepare(name, df):
+    return coerce(df[[c for c in TABLES[name]["columns"] if c in df.columns]])
+
+
+@contextmanager
+def _table_lock(name, shared=False):
+    """Cross-process lock on a table: appends hold it shared, a swap exclusively"""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    fd = os.open(os.path.join(STORE_DIR, f"{name}.lock"), os.O_CREAT | os.O_RDWR)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            while True:  # no shared locks on Windows
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10 s; keep waiting
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
+
+
+def _link(src, dst):
+    """Put an existing part into another version (a hard link; parts are never modified in place)"""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst + ".tmp")
+    except FileExistsError:
+        os.remove(dst + ".tmp")
+        os.link(src, dst + ".tmp")
+    except OSError:
+        shutil.copyfile(src, dst + ".tmp")  # no hard links on this filesystem
+    os.replace(dst + ".tmp", dst)
+
+
+def _drop_retired(name, keep):
+    """Delete versions retired more than RETIRED_SECONDS ago"""
+    current = table_dir(name)
+    for path in glob.glob(os.path.join(STORE_DIR, f"{name}.v-*")) + [os.path.join(STORE_DIR, name)]:
+        if path == current or path == keep:
+            continue
+        try:
+            retired_for = time.time() - os.path.getmtime(path)
+        except FileNotFoundError:
+            continue
+        if retired_for >= RETIRED_SECONDS:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _swap_in(name, staging, carry=False):
+    """Atomically replace a table with a fully written staging directory.
+
+    Parts appended to the live table since staging began are copied over
+    when carry is set; otherwise the swap is refused.
+    """
+    base_dir, base_parts = _staged_from.pop(staging, (None, None))
+    with _table_lock(name):
+        retired = table_dir(name)
+        if base_dir is not None:
+            changed = [p for p, sig in list_parts(name).items() if base_parts.get(p) != sig]
+            if base_dir != retired or (changed and not carry):
+                shutil.rmtree(staging, ignore_errors=True)
+                raise RuntimeError(f"❌ {name} changed while its replacement was being written; nothing was swapped")
+            for p in changed:
+                _link(p, os.path.join(staging, os.path.relpath(p, retired)))
+        os.makedirs(staging, exist_ok=True)
+        version = f"{name}.v-{uuid.uuid4().hex[:8]}"
+        os.replace(staging, os.path.join(STORE_DIR, version))
+        tmp_path = _pointer_path(name) + f".{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, _pointer_path(name))  # the switch: one rename
+        if os.path.isdir(retired):
+            os.utime(retired)  # retirement time, for _drop_retired
+        _drop_retired(name, keep=retired)
+
+
+def write_table(name, df, mode="overwrite"):
+    """Write a frame to a table; mode is "overwrite" or "append"."""
+    df = _prepare(name, df)
+    if mode == "append":
+        migrate_csv(name)
+        with _table_lock(name, shared=True):
+            _write_partitions(table_dir(name), df)
+        return
+
+    # Build the new table beside the old one, then swap directories
+    staging = begin_staged(name)
+    _write_partitions(staging, df)
+    _swap_in(name, staging)
+
+
+def write_tagged(name, df, tag):
+    """Append df as part files named after tag. Writing the same rows under the
+    same tag again replaces those files, so a retried append is not duplicated."""
+    df = _prepare(name, df)
+    with _table_lock(name, shared=True):
+        _write_partitions(table_dir(name), df, tag)
+
+
+def begin_staged(name, kind="staging"):
+    """Staging directory for building a replacement table in pieces"""
+    staging = os.path.join(STORE_DIR, f"{name}.{kind}-{uuid.uuid4().hex[:8]}")
+    _staged_from[staging] = (table_dir(name), list_parts(name))
+    return staging
+
+
+def write_staged(name, staging, df):
+    """Add a frame to a staging directory (safe to call from several processes)"""
+    _write_partitions(staging, _prepare(name, df))
+
+
+def commit_staged(name, staging):
+    """Swap a fully written staging directory in as the table"""
+    _swap_in(name, staging)
+
+
+# ---------- READ ----------
+def dataset(name):
+    schema = pa.unify_schemas([arrow_schema(name), PARTITIONING.schema])
+    return ds.dataset(table_dir(name), format="parquet", partitioning=PARTITIONING, schema=schema)
+
+
+def _filter(farms=None, start=None, end=None):
+    """Partition filter (farm/month directories) plus an exact timestamp bound"""
+    expr = None
+
+    def both(cond):
+        return cond if expr is None else expr & cond
+
+    if farms is not None:
+        expr = both(ds.field("farm").isin([int(f) for f in farms]))
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = both(ds.field("month") >= start.strftime(MONTH_FORMAT))
+        expr = both(ds.field("timestamp") >= start)
+    if end is not None:
+        end = pd.Timestamp(end)
+        expr = both(ds.field("month") <= end.strftime(MONTH_FORMAT))
+        expr = both(ds.field("timestamp") <= end)
+    return expr
+
+
+def read_table(name, columns=None, farms=None, start=None, end=None):
+    """Load a table as a typed DataFrame (falls back to the legacy CSV)."""
+    columns = columns or TABLES[name]["columns"]
+    if in_store(name):
+        table = dataset(name).to_table(columns=columns, filter=_filter(farms, start, end))
+        df = table.to_pandas()
+    else:
+        df = read_csv_typed(csv_path(name), usecols=lambda c: c in columns)
+        if farms is not None:
+            df = df[df["farm_id"].isin(farms)]
+
+    if "timestamp" in df.columns:
+        return df.sort_values("timestamp", kind="stable", ignore_index=True)
+    return df.reset_index(drop=True)
+
+
+def list_parts(name):
+    """Part files currently in a table, mapped to (size, mtime_ns)"""
+    parts = {}
+    for path in glob.glob(os.path.join(table_dir(name), "*", "*", "part-*.parquet")):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:  # removed by a concurrent compaction
+            continue
+        parts[path] = (st.st_size, st.st_mtime_ns)
+    return parts
+
+
+def read_parts(name, paths, columns=None):
+    """Read specific part files of a table (used for incremental loads)"""
+    columns = columns or TABLES[name]["columns"]
+    if not paths:
+        return arrow_schema(name).empty_table().select(columns).to_pandas()
+    return ds.dataset(list(paths), format="parquet", schema=arrow_schema(name)) \
+        .to_table(columns=columns).to_pandas()
+
+
+def iter_chunks(name, chunksize, columns=None):
+    """Stream a table in typed chunks of at most chunksize rows."""
+    columns = columns or TABLES[name]["columns"]
+    if in_store(name):
+        for batch in dataset(name).to_batches(columns=columns, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        yield from csv_chunks(csv_path(name), chunksize, usecols=lambda c: c in columns)
+
+
+# ---------- MAINTENANCE ----------
+def compact(name):
+    """Merge the part files of each farm/month partition into one file.
+
+    Builds a new version (unmerged parts are hard-linked) and swaps it in, so
+    readers never see a partition half merged. Parts of log segments that
+    are still in the log keep their part-wal-<segment> names, which log
+    readers and compaction retries rely on.
+    """
+    from utils import prediction_log
+
+    staging = begin_staged(name, "compact")
+    live, parts = _staged_from[staging]
+    # Listed after the parts: a segment compacted meanwhile still counts as in the log
+    in_log = set(prediction_log.list_segments(prediction_log.log_dir(name)))
+    by_dir = {}
+    for p in sorted(parts):
+        by_dir.setdefault(os.path.dirname(p), []).append(p)
+    merged = 0
+    for part_dir, paths in by_dir.items():
+        out_dir = os.path.join(staging, os.path.relpath(part_dir, live))
+        mergeable = [p for p in paths if prediction_log.part_segment(p) not in in_log]
+        if len(mergeable) < 2:
+            mergeable = []
+        for p in paths:
+            if p not in mergeable:
+                _link(p, os.path.join(out_dir, os.path.basename(p)))
+        if mergeable:
+            os.makedirs(out_dir, exist_ok=True)
+            table = pa.concat_tables([pq.read_table(p) for p in mergeable])
+            pq.write_table(table, os.path.join(out_dir, f"part-{uuid.uuid4().hex}.parquet"))
+            merged += len(mergeable)
+    if not merged:
+        _staged_from.pop(staging)
+        shutil.rmtree(staging, ignore_errors=True)
+        return 0
+    _swap_in(name, staging, carry=True)
+    return merged
+
+
+def import_csv(name, path=None, chunksize=1_000_000):
+    """Replace a table with the contents of a CSV file."""
+    path = path or csv_path(name)
+    staging = begin_staged(name, "import")
+    for chunk in csv_chunks(path, chunksize):
+        _write_partitions(staging, _prepare(name, chunk))
+    _swap_in(name, staging)
+
+
+def migrate_csv(name):
+    """Import a table that still only exists as a legacy CSV (before its first append)"""
+    if in_store(name) or not os.path.exists(csv_path(name)):
+        return
+    try:
+        import_csv(name)
+    except RuntimeError:
+        if not in_store(name):
+            raise  # otherwise another writer migrated it first
+
+
+def export_csv(name, path=None):
+    """Write a table out in the original CSV layout."""
+    path = path or csv_path(name)
+    df = read_table(name)
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    df.to_csv(path, index=False)
+    return path
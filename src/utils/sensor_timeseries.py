@@ -0,0 +1,185 @@
+"""Per-farm sensor time series at a regular interval.
+
+Unlike utils.sensor_generator, which draws independent readings at random
+times, the simulator keeps state for every farm and advances all of them one
+tick at a time as NumPy vectors:
+
+  temperature  farm mean + diurnal cycle peaking at 14:00 + AR(1) weather noise,
+               a few degrees cooler while it rains
+  rainfall     on/off rain events (exponential dry spells and event lengths),
+               each with its own intensity; reported as mm within the interval
+  moisture     jumps with rainfall, then decays towards the wilting floor,
+               faster when it is hot
+  humidity     falls as the day warms, rises while it rains
+  N, P, K, pH  slow mean-reverting drift around each farm's baseline; rain
+               leaches a little nitrogen
+
+Values are clipped to the ranges of a generator profile. Rows come out in
+event-time order: one row per farm for each tick, with farms in id order.
+The same seed, farms, interval and start always give the same series,
+whatever the chunk size.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils import sensor_store
+from utils.sensor_generator import COLUMNS, DEFAULT_CHUNKSIZE, get_profile, to_csv_bytes
+
+DEFAULT_FARMS = 1000
+DEFAULT_INTERVAL_SECONDS = 15 * 60
+
+HOUR = 3600.0
+MEAN_DRY_HOURS = 60.0
+MEAN_RAIN_HOURS = 4.0
+MEAN_RAIN_MM_PER_HOUR = 3.0
+WEATHER_HOURS = 6.0       # correlation time of the temperature noise
+SOIL_HOURS = 7 * 24.0     # correlation time of the nutrient / pH drift
+MOISTURE_PER_MM = 0.8     # % volumetric moisture gained per mm of rain
+
+
+class SensorTimeSeries:
+
+    def __init__(self, farms=DEFAULT_FARMS, interval_seconds=DEFAULT_INTERVAL_SECONDS,
+                 start="2025-01-01", seed=None, profile="realistic"):
+        self.profile = get_profile(profile) if isinstance(profile, str) else profile
+        self.ranges = self.profile["ranges"]
+        self.farm_ids = np.arange(1, farms + 1, dtype=np.int32)
+        self.interval = int(interval_seconds)
+        self.time = np.datetime64(pd.Timestamp(start), "s")  # timestamp of the next tick
+        self.rng = np.random.default_rng(seed)
+        self.dt = self.interval / HOUR
+        self._init_farms(farms)
+
+    def _uniform_within(self, col, low_frac, high_frac, n):
+        low, high = self.ranges[col]
+        return self.rng.uniform(low + (high - low) * low_frac, low + (high - low) * high_frac, n)
+
+    def _init_farms(self, n):
+        rng = self.rng
+        # Fixed per-farm climate and soil
+        self.temp_mean = self._uniform_within("temperature_C", 0.25, 0.5, n)
+        self.temp_amplitude = rng.uniform(3.0, 8.0, n)
+        self.humidity_base = self._uniform_within("humidity_percent", 0.4, 0.7, n)
+        self.moisture_floor = self._uniform_within("soil_moisture_percent", 0.0, 0.1, n)
+        self.drying_hours = rng.uniform(72.0, 168.0, n)
+        self.soil_base = {col: self._uniform_within(col, 0.2, 0.8, n) for col in ("N", "P", "K", "pH")}
+
+        # Evolving state
+        self.weather = np.zeros(n)
+        self.raining = np.zeros(n, dtype=bool)
+        self.rain_rate = np.zeros(n)
+        self.moisture = self._uniform_within("soil_moisture_percent", 0.3, 0.6, n)
+        self.soil_drift = {col: np.zeros(n) for col in self.soil_base}
+
+    # ---------- SIMULATION ----------
+    def _clip(self, col, values):
+        low, high = self.ranges[col]
+        return np.clip(values, low, high)
+
+    def step(self, ticks=1):
+        """Advance every farm by `ticks` intervals; returns ticks * farms rows"""
+        n, dt, rng = len(self.farm_ids), self.dt, self.rng
+        times = self.time + np.arange(ticks) * np.timedelta64(self.interval, "s")
+        self.time = times[-1] + np.timedelta64(self.interval, "s")
+
+        weather_phi = np.exp(-dt / WEATHER_HOURS)
+        soil_phi = np.exp(-dt / SOIL_HOURS)
+        weather_sd = 1.5 * np.sqrt(1 - weather_phi ** 2)
+        soil_sd = {col: 0.02 * (self.ranges[col][1] - self.ranges[col][0]) * np.sqrt(1 - soil_phi ** 2)
+                   for col in self.soil_base}
+        p_start = 1 - np.exp(-dt / MEAN_DRY_HOURS)
+        p_stop = 1 - np.exp(-dt / MEAN_RAIN_HOURS)
+
+        hours = (times - times.astype("datetime64[D]")).astype(np.int64) / HOUR
+        diurnal = np.cos(2 * np.pi * (hours - 14.0) / 24.0)
+
+        temperature = np.empty((ticks, n))
+        humidity = np.empty((ticks, n))
+        rainfall = np.empty((ticks, n))
+        moisture = np.empty((ticks, n))
+        soil = {col: np.empty((ticks, n)) for col in self.soil_base}
+        # Vectorized across farms; ticks loop because each depends on the last.
+        # Draws are per tick, so the series does not depend on the block size.
+        for t in range(ticks):
+            self.weather = weather_phi * self.weather + rng.normal(0.0, weather_sd, n)
+
+            rain_draw = rng.random(n)
+            starts = ~self.raining & (rain_draw < p_start)
+            stops = self.raining & (rain_draw < p_stop)
+            self.rain_rate = np.where(starts, rng.exponential(MEAN_RAIN_MM_PER_HOUR, n), self.rain_rate)
+            self.raining = (self.raining | starts) & ~stops
+            rain = np.where(self.raining, self.rain_rate * rng.uniform(0.5, 1.5, n) * dt, 0.0)
+
+            temp = (self.temp_mean + self.temp_amplitude * diurnal[t] + self.weather
+                    - 3.0 * self.raining)
+            heat = 1.0 + 0.05 * np.maximum(temp - 20.0, 0.0)
+            decay = np.exp(-dt * heat / self.drying_hours)
+            self.moisture = self.moisture_floor + (self.moisture - self.moisture_floor) * decay
+            self.moisture = self._clip("soil_moisture_percent", self.moisture + MOISTURE_PER_MM * rain)
+
+            for col, drift in self.soil_drift.items():
+                drift = soil_phi * drift + rng.normal(0.0, soil_sd[col], n)
+                if col == "N":
+                    drift -= 0.05 * rain
+                self.soil_drift[col] = drift
+                soil[col][t] = self.soil_base[col] + drift
+
+            temperature[t], rainfall[t], moisture[t] = temp, rain, self.moisture
+            humidity[t] = (self.humidity_base - 2.0 * (temp - self.temp_mean)
+                           + 25.0 * self.raining + rng.normal(0.0, 2.0, n))
+
+        data = {
+            "timestamp": np.repeat(times, n),
+            "farm_id": np.tile(self.farm_ids, ticks),
+            **{col: self._clip(col, soil[col]) for col in ("N", "P", "K", "pH")},
+            "temperature_C": self._clip("temperature_C", temperature),
+            "humidity_percent": self._clip("humidity_percent", humidity),
+            "soil_moisture_percent": moisture,
+            "rainfall_mm": rainfall,
+        }
+        for col in COLUMNS[2:]:
+            data[col] = data[col].ravel().round(2)
+        return pd.DataFrame(data, columns=COLUMNS)
+
+    def stream(self, ticks, chunksize=DEFAULT_CHUNKSIZE):
+        """Yield frames of about chunksize rows (whole ticks) until `ticks` have elapsed"""
+        per_chunk = max(1, chunksize // len(self.farm_ids))
+        while ticks > 0:
+            block = min(per_chunk, ticks)
+            yield self.step(block)
+            ticks -= block
+
+
+def ticks_for(days, interval_seconds=DEFAULT_INTERVAL_SECONDS):
+    return int(days * 86400 // interval_seconds)
+
+
+def write_timeseries(target, days, farms=DEFAULT_FARMS, interval_seconds=DEFAULT_INTERVAL_SECONDS,
+                     start="2025-01-01", seed=None, profile="realistic",
+                     chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Simulate `days` of readings into a CSV path or a store table; returns rows written"""
+    sim = SensorTimeSeries(farms, interval_seconds, start, seed, profile)
+    ticks = ticks_for(days, interval_seconds)
+    total = ticks * farms
+    written = 0
+    if target.endswith(".csv"):
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write((",".join(COLUMNS) + "\n").encode())
+            for df in sim.stream(ticks, chunksize):
+                f.write(to_csv_bytes(df))
+                written += len(df)
+                if progress:
+                    progress(written, total)
+        os.replace(tmp_path, target)
+    else:
+        staging = sensor_store.begin_staged(target)
+        for df in sim.stream(ticks, chunksize):
+            sensor_store.write_staged(target, staging, df)
+            written += len(df)
+            if progress:
+                progress(written, total)
+        sensor_store.commit_staged(target, staging)
+    return written
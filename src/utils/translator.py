@@ -1,6 +1,206 @@
-from deep_translator import GoogleTranslator
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "translations.sqlite")
+CATALOG_DIR = os.path.join(BASE_DIR, "translations")
+
+MEMORY_CACHE_SIZE = 4096
+MAX_BATCH_CHARS = 4500  # Google Translate rejects requests above 5000 chars
+
+
+# ---------- BACKENDS ----------
+class GoogleBackend:
+    """Online backend using deep-translator's GoogleTranslator."""
+
+    def translate_batch(self, texts, lang):
+        from deep_translator import GoogleTranslator
+
+        translator = GoogleTranslator(source="en", target=lang)
+        results = []
+        for chunk in _chunk_by_chars(texts, MAX_BATCH_CHARS):
+            # One request per chunk: strings are joined by newlines and split back
+            joined = translator.translate("\n".join(chunk))
+            parts = joined.split("\n") if joined else []
+            if len(parts) != len(chunk):
+                # Translator merged or split lines — fall back to one call per string
+                parts = [translator.translate(t) for t in chunk]
+            results.extend(parts)
+        return results
+
+
+class OfflineBackend:
+    """Offline backend for tests and air-gapped runs.
+
+    Looks strings up in a {lang: {text: translation}} mapping and returns None
+    when no entry exists. `calls` counts backend hits.
+    """
+
+    def __init__(self, translations=None):
+        self.translations = translations or {}
+        self.calls = 0
+
+    def translate_batch(self, texts, lang):
+        self.calls += 1
+        table = self.translations.get(lang, {})
+        return [table.get(t) for t in texts]
+
+
+def _chunk_by_chars(texts, limit):
+    chunk, size = [], 0
+    for text in texts:
+        if chunk and size + len(text) + 1 > limit:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + 1
+    if chunk:
+        yield chunk
+
+
+_backend = OfflineBackend() if os.environ.get("TRANSLATOR_BACKEND") == "offline" else GoogleBackend()
+
+
+def set_backend(backend):
+    """Swap the translation backend (anything with translate_batch(texts, lang))."""
+    global _backend
+    _backend = backend
+    clear_memory_cache()
+
+
+# ---------- PRECOMPILED CATALOGS ----------
+# Built by build_translations.py — one {text: translation} file per language
+_catalogs = {}
+
+
+def load_catalog(lang):
+    """Load translations/<lang>.json once per process; missing catalogs are empty."""
+    if lang not in _catalogs:
+        catalog_path = os.path.join(CATALOG_DIR, f"{lang}.json")
+        try:
+            with open(catalog_path, "r", encoding="utf-8") as f:
+                _catalogs[lang] = json.load(f)
+        except FileNotFoundError:
+            _catalogs[lang] = {}
+    return _catalogs[lang]
+
+
+# ---------- IN-PROCESS LRU ----------
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _memory_get(key):
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+    return None
+
+
+def _memory_put(key, value):
+    with _memory_lock:
+        _memory_cache[key] = value
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def clear_memory_cache():
+    with _memory_lock:
+        _memory_cache.clear()
+
+
+# ---------- ON-DISK STORE ----------
+def _connect():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS translations ("
+        "lang TEXT NOT NULL, text TEXT NOT NULL, translated TEXT NOT NULL, "
+        "PRIMARY KEY (lang, text))"
+    )
+    return conn
+
+
+def _disk_get_many(texts, lang):
+    found = {}
+    conn = _connect()
+    try:
+        texts = list(texts)
+        for i in range(0, len(texts), 500):
+            chunk = texts[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT text, translated FROM translations "
+                f"WHERE lang = ? AND text IN ({placeholders})",
+                [lang, *chunk],
+            )
+            found.update(rows)
+    finally:
+        conn.close()
+    return found
+
+
+def _disk_put_many(pairs, lang):
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (lang, text, translated) VALUES (?, ?, ?)",
+                [(lang, text, translated) for text, translated in pairs],
+            )
+    finally:
+        conn.close()
+
+
+# ---------- PUBLIC API ----------
+def translate_batch(texts, lang):
+    """Translate a list of strings, sending only cache misses to the backend in one call."""
+    texts = list(texts)
+    if lang == "en":
+        return texts
+
+    catalog = load_catalog(lang)
+    results = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        cached = catalog.get(text) or _memory_get((text, lang))
+        if cached is not None:
+            results[text] = cached
+        elif text.strip():
+            missing.append(text)
+        else:
+            results[text] = text
+
+    if missing:
+        on_disk = _disk_get_many(missing, lang)
+        for text, translated in on_disk.items():
+            results[text] = translated
+            _memory_put((text, lang), translated)
+        missing = [t for t in missing if t not in on_disk]
+
+    if missing:
+        translated = _backend.translate_batch(missing, lang)
+        # None means the backend had no translation: show the English text, but
+        # only persist real translations, or one offline run would shadow them
+        _disk_put_many([(t, v) for t, v in zip(missing, translated) if v is not None], lang)
+        for text, value in zip(missing, translated):
+            value = text if value is None else value
+            results[text] = value
+            _memory_put((text, lang), value)
+
+    return [results[t] for t in texts]
+
 
 def translate_text(text, lang):
     if lang == "en":
         return text
-    return GoogleTranslator(source="en", target=lang).translate(text)
+    cached = load_catalog(lang).get(text) or _memory_get((text, lang))
+    if cached is not None:
+        return cached
+    return translate_batch([text], lang)[0]